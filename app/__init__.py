@@ -3,14 +3,27 @@ import logging
 from flask import Blueprint, Flask
 from flask_migrate import Migrate
 from flask_restful import Api
-from flask_sqlalchemy import SQLAlchemy
 
+from app import metrics
+from app.cache import LRUCache
+from app.compression import compress_response
+from app.routing import add_replica_bind, RoutingSQLAlchemy
 from config import Config
 
-db = SQLAlchemy()
+db = RoutingSQLAlchemy()
 migrate = Migrate()
 
+from app.catalog import exercise_catalog
+from app.instrumentation import sql_instrumentation
+from app.leaderboards import leaderboards
+from app.resources.analytics import Progress, Volume
+from app.resources.batch import Batch
+from app.resources.changes import Changes
 from app.resources.exercises import Exercises
+from app.resources.export import Export
+from app.resources.instrumentation import Instrumentation
+from app.resources.leaderboards import Leaderboards
+from app.resources.records import Records
 from app.resources.register import Register
 from app.resources.sessions import Sessions
 from app.resources.token import Token
@@ -26,16 +39,33 @@ def create_app(config_object=Config):
     app.logger.handlers = gunicorn_logger.handlers
     app.logger.setLevel(gunicorn_logger.level)
 
+    add_replica_bind(app)
     db.init_app(app)
     migrate.init_app(app, db)
+    metrics.init_app(app)
+    exercise_catalog.init_app(app)
+    sql_instrumentation.init_app(app)
+    leaderboards.init_app(app)
+    app.extensions['token_cache'] = LRUCache(app.config.get('TOKEN_CACHE_SIZE', 1024),
+                                             app.config.get('TOKEN_CACHE_TTL', 60))
+    app.extensions['analytics_cache'] = LRUCache(app.config.get('ANALYTICS_CACHE_SIZE', 256))
 
     bp = Blueprint('bp', __name__)
     api = Api(bp)
+    api.add_resource(Progress, '/analytics/progress/<exercise_name>')
+    api.add_resource(Volume, '/analytics/volume')
+    api.add_resource(Batch, '/sessions/batch')
+    api.add_resource(Changes, '/sessions/changes')
     api.add_resource(Exercises, '/exercises')
+    api.add_resource(Export, '/sessions/export')
+    api.add_resource(Instrumentation, '/instrumentation')
+    api.add_resource(Leaderboards, '/leaderboards/<exercise_name>')
+    api.add_resource(Records, '/records')
     api.add_resource(Register, '/register')
     api.add_resource(Sessions, '/sessions', '/sessions/<session_date>')
     api.add_resource(Token, '/token')
 
     app.register_blueprint(bp, url_prefix='/api')
+    app.after_request(compress_response)
 
     return app
@@ -0,0 +1,116 @@
+"""
+Vectorised analytics over a user's gym records
+"""
+import numpy as np
+
+from app import db
+from app.archive import archived_sets
+from app.models.session import Session
+from app.set_storage import expand_sets, set_model
+
+def load_records(user_id, exercise_ids=None):
+    """
+    Load a user's gym records, live and archived, optionally only of the given exercises, into NumPy arrays
+
+    Returns a dict of equal length arrays 'dates' (datetime64[D]), 'exercise_ids', 'reps'
+    and 'weights', ordered by session date.
+    """
+    Sets = set_model()
+    query = db.session \
+              .query(Session.date, Sets.exercise_id, Sets.reps, Sets.weight) \
+              .select_from(Sets) \
+              .join(Session) \
+              .filter(Session.user_id == user_id)
+    if exercise_ids is not None:
+        query = query.filter(Sets.exercise_id.in_(exercise_ids))
+    data = list(expand_sets(query.order_by(Session.date, Sets.record_id)))
+    archived = [(session_date, exercise_id, reps, weight)
+                for _, session_date, exercise_id, reps, weight in archived_sets(user_id, exercise_ids)]
+    if archived:
+        data = sorted(archived + data, key=lambda row: row[0])
+    dates, exercise_ids, reps, weights = zip(*data) if data else ((), (), (), ())
+    return {'dates': np.array(dates, dtype='datetime64[D]'),
+            'exercise_ids': np.array(exercise_ids, dtype=np.int64),
+            'reps': np.array(reps, dtype=np.int64),
+            'weights': np.array(weights, dtype=np.float64)}
+
+
+def week_starts(dates):
+    """Return the Monday beginning the week of each of an array of datetime64[D] dates"""
+    days = dates.astype(np.int64)
+    return (days - (days + 3) % 7).astype('datetime64[D]')  # 1970-01-01 was a Thursday
+
+
+def weekly_volume(records):
+    """
+    Aggregate gym records by week and exercise
+
+    Returns a dict of equal length arrays, sorted by week then exercise id: 'weeks' (the Monday
+    of each week), 'exercise_ids', 'tonnage' (sum of reps x weight), 'sets', 'reps' and
+    'intensity' (tonnage / reps, the average weight lifted per rep).
+    """
+    weeks = week_starts(records['dates'])
+    exercise_ids = records['exercise_ids']
+    keys = weeks.astype(np.int64) * (int(exercise_ids.max(initial=0)) + 1) + exercise_ids
+    groups, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    inverse = inverse.reshape(-1)
+
+    tonnage = np.bincount(inverse, weights=records['reps'] * records['weights'], minlength=len(groups))
+    sets = np.bincount(inverse, minlength=len(groups))
+    reps = np.bincount(inverse, weights=records['reps'], minlength=len(groups)).astype(np.int64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        intensity = np.where(reps > 0, tonnage / reps, 0.0)
+    return {'weeks': weeks[first],
+            'exercise_ids': exercise_ids[first],
+            'tonnage': tonnage,
+            'sets': sets,
+            'reps': reps,
+            'intensity': intensity}
+
+
+def session_progress(records):
+    """
+    Aggregate one exercise's gym records by session
+
+    Returns a dict of equal length arrays, one entry per session date in order: 'dates',
+    'top_set' (the heaviest weight lifted), 'estimated_1rm' (the best Epley estimate of any set,
+    as personal records take it) and 'volume' (sum of reps x weight).
+    """
+    dates, first = np.unique(records['dates'], return_index=True)
+    if not len(dates):
+        return {'dates': dates, 'top_set': np.zeros(0), 'estimated_1rm': np.zeros(0), 'volume': np.zeros(0)}
+    reps, weights = records['reps'], records['weights']
+    estimated_1rm = np.where(reps <= 1, weights, weights * (1 + reps / 30))
+    return {'dates': dates,
+            'top_set': np.maximum.reduceat(weights, first),
+            'estimated_1rm': np.maximum.reduceat(estimated_1rm, first),
+            'volume': np.add.reduceat(reps * weights, first)}
+
+
+def lttb(x, y, threshold):
+    """
+    Downsample a series to threshold points with Largest-Triangle-Three-Buckets
+
+    The first and last points are kept, and the points between are split into threshold - 2
+    buckets of consecutive points, from each of which the point forming the largest triangle with
+    the point kept from the bucket before and the average of the bucket after is kept, so peaks
+    and troughs survive. Returns the indices of the points kept, in order, or of every point if
+    there are no more than threshold. threshold must be at least 3.
+    """
+    if threshold < 3:
+        raise ValueError(f'LTTB keeps the first and last points and at least one between, not {threshold}')
+    n = len(x)
+    if n <= threshold:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    edges = np.append(edges, n)
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    kept = 0
+    for bucket in range(threshold - 2):
+        start, end, next_end = edges[bucket], edges[bucket + 1], edges[bucket + 2]
+        average_x, average_y = x[end:next_end].mean(), y[end:next_end].mean()
+        areas = np.abs((x[kept] - average_x) * (y[start:end] - y[kept])
+                       - (x[kept] - x[start:end]) * (average_y - y[kept]))
+        kept = indices[bucket + 1] = start + int(np.argmax(areas))
+    return indices
@@ -0,0 +1,108 @@
+"""
+Cold storage of old sessions
+
+The archive-sessions command moves sessions dated before a cutoff, ARCHIVE_AFTER_DAYS ago by
+default, out of sessions and the set tables into archived_sessions: one row per session keeping
+its id, user and date, with all of its sets compressed into one column. Old sessions then no
+longer take up rows and index entries of the tables every write touches.
+
+Archived sessions remain part of a user's history. Reads covering their dates merge them with
+live sessions, dates stay unique across both, deletes remove them, and personal records are
+rebuilt from both, so archiving does not change any response.
+
+Archived sessions keep their ids, so session ids must never be handed out again. On MySQL this
+requires 8.0 or later, which persists AUTO_INCREMENT counters across restarts.
+"""
+from datetime import datetime, timedelta
+from itertools import groupby
+
+from flask import current_app
+
+from app import db
+from app.models.archived_session import ArchivedSession
+from app.models.session import Session
+from app.set_storage import delete_sets, expand_sets, LAYOUTS, set_model
+
+ARCHIVE_BATCH_SIZE = 1000
+
+def archive_cutoff(days=None):
+    """Return the date before which sessions are archived, days or ARCHIVE_AFTER_DAYS ago"""
+    if days is None:
+        days = current_app.config.get('ARCHIVE_AFTER_DAYS', 365)
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    return today - timedelta(days=days)
+
+
+def archive_sessions(cutoff, batch_size=ARCHIVE_BATCH_SIZE):
+    """
+    Move every session dated before cutoff, with its sets, into archived_sessions
+
+    Sessions are moved a batch at a time, each batch committed in its own transaction so that
+    a long run neither holds its locks nor its memory for longer than a batch. Returns the
+    number of sessions archived.
+    """
+    archived = 0
+    while True:
+        sessions = db.session \
+                     .query(Session.session_id, Session.user_id, Session.date) \
+                     .filter(Session.date < cutoff) \
+                     .order_by(Session.session_id) \
+                     .limit(batch_size) \
+                     .all()
+        if not sessions:
+            return archived
+        session_ids = [session.session_id for session in sessions]
+        # sets are read from both layouts, as delete_sets deletes from both, whichever is configured
+        sets = {}
+        for layout in LAYOUTS:
+            Sets = set_model(layout)
+            data = expand_sets(db.session
+                                 .query(Sets.session_id, Sets.exercise_id, Sets.reps, Sets.weight)
+                                 .filter(Sets.session_id.in_(session_ids))
+                                 .order_by(Sets.session_id, Sets.record_id), layout)
+            for session_id, rows in groupby(data, key=lambda row: row[0]):
+                sets.setdefault(session_id, []).extend((exercise_id, reps, weight)
+                                                       for _, exercise_id, reps, weight in rows)
+
+        db.session.execute(ArchivedSession.__table__.insert(),
+                           [{'session_id': session.session_id, 'user_id': session.user_id, 'date': session.date,
+                             'sets': ArchivedSession.pack(sets.get(session.session_id, []))}
+                            for session in sessions])
+        delete_sets(session_ids)
+        db.session.execute(Session.__table__.delete().where(Session.session_id.in_(session_ids)))
+        db.session.commit()
+        archived += len(sessions)
+
+
+def archived_query(user_id, date_from=None, date_to=None):
+    """Query a user's archived sessions dated from and to the given dates inclusive, ordered by date"""
+    archived = ArchivedSession.query.filter_by(user_id = user_id)
+    if date_from is not None:
+        archived = archived.filter(ArchivedSession.date >= date_from)
+    if date_to is not None:
+        archived = archived.filter(ArchivedSession.date <= date_to)
+    return archived.order_by(ArchivedSession.date)
+
+
+def archived_sets(user_id, exercise_ids=None):
+    """
+    Return the sets of a user's archived sessions, optionally only of the given exercises
+
+    Rows are (session_id, date, exercise_id, reps, weight), ordered by date and then as performed.
+    """
+    return [(archived.session_id, archived.date, exercise_id, reps, weight)
+            for archived in archived_query(user_id)
+            for exercise_id, reps, weight in archived.records()
+            if exercise_ids is None or exercise_id in exercise_ids]
+
+
+def patch_archived(archived, remove=(), update=None, add=()):
+    """Apply a diff, as taken by set_storage.patch_sets, to the sets of an ArchivedSession, rewriting its one row"""
+    update = update or {}
+    positions, records = {}, []
+    for exercise_id, reps, weight in archived.records():
+        if exercise_id in remove:
+            continue
+        index = positions[exercise_id] = positions.get(exercise_id, -1) + 1
+        records.append((exercise_id, *update.get((exercise_id, index), (reps, weight))))
+    archived.sets = ArchivedSession.pack(records + list(add))
@@ -0,0 +1,138 @@
+from flask import current_app
+from sqlalchemy import func
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import db
+from app.models.exercise import Exercise
+from app.search import ExerciseIndex
+
+class _CatalogState():
+    """Per-application contents and hit/miss counters of the exercise catalog"""
+
+    def __init__(self):
+        self.ids = {}
+        self.names = {}
+        self.sorted_names = ()
+        self.index = ExerciseIndex()
+        self.version = None
+        self.loaded = False
+        self.hits = 0
+        self.misses = 0
+
+
+class ExerciseCatalog():
+    """
+    In-process cache of the exercises table
+
+    Maps exercise names to ids and ids to names. The catalog is loaded when the application
+    starts, updated when Exercises.post commits and reloaded whenever a lookup misses. Reads of
+    the whole catalog, which cannot miss, first compare the version it was loaded at with the
+    database's, and reload if behind, which picks up exercises added by other worker processes.
+    """
+
+    def init_app(self, app):
+        app.extensions['exercise_catalog'] = _CatalogState()
+        with app.app_context():
+            try:
+                self.load()
+            except SQLAlchemyError as exn:
+                # the exercises table may not exist yet, e.g. before 'flask db upgrade' has run
+                app.logger.info(f"Exercise catalog not loaded at start up: {exn.args}")
+                db.session.rollback()
+
+    @property
+    def _state(self):
+        return current_app.extensions['exercise_catalog']
+
+    def load(self):
+        """(Re)load the whole catalog from the database in one query"""
+        exercises = db.session.query(Exercise.exercise_id, Exercise.exercise_name).all()
+        self._set(dict((name, exercise_id) for exercise_id, name in exercises))
+
+    def add(self, exercise_ids):
+        """Write newly committed exercises, given as a dict of name to id, through to the catalog"""
+        ids = dict(self._state.ids)
+        ids.update(exercise_ids)
+        self._set(ids)
+
+    def _set(self, ids):
+        state = self._state
+        state.version = (len(ids), max(ids.values(), default=None))
+        state.ids = ids
+        state.names = {exercise_id: name for name, exercise_id in ids.items()}
+        state.sorted_names = tuple(sorted(ids))
+        state.index.add(ids)
+        state.loaded = True
+
+    def ids_for(self, names):
+        """Return a dict mapping each recognised exercise name to its id"""
+        state = self._state
+        missing = [name for name in names if name not in state.ids]
+        state.hits += len(names) - len(missing)
+        if missing or not state.loaded:
+            state.misses += len(missing)
+            self.load()
+        return {name: self._state.ids[name] for name in names if name in self._state.ids}
+
+    def names_for(self, exercise_ids):
+        """Return a dict mapping each recognised exercise id to its name"""
+        state = self._state
+        missing = [exercise_id for exercise_id in exercise_ids if exercise_id not in state.names]
+        state.hits += len(exercise_ids) - len(missing)
+        if missing or not state.loaded:
+            state.misses += len(missing)
+            self.load()
+        return {exercise_id: self._state.names[exercise_id]
+                for exercise_id in exercise_ids if exercise_id in self._state.names}
+
+    def sorted_names(self):
+        """Return every exercise name in alphabetical order"""
+        return list(self._loaded_state().sorted_names)
+
+    def search(self, query, limit=10):
+        """
+        Return up to limit exercise names matching query, by prefix or else by similarity, best first
+
+        Unlike a lookup, a search finding nothing does not reload the catalog, as most such
+        queries are simply typos.
+        """
+        return self._loaded_state().index.search(query, limit)
+
+    def suggest(self, name):
+        """Return the exercise name most similar to an unrecognised name, or None"""
+        return self._loaded_state().index.suggest(name)
+
+    def _loaded_state(self):
+        state = self._state
+        if state.loaded and not self._behind(self.version()):
+            state.hits += 1
+        else:
+            state.misses += 1
+            self.load()
+        return self._state
+
+    def refresh(self):
+        """Reload the catalog if the database has exercises it does not, returning the version it then holds"""
+        if not self._state.loaded or self._behind(self.version()):
+            self.load()
+        return self._state.version
+
+    def _behind(self, version):
+        # exercises are only ever added, so a catalog with fewer than the database is out of date, and
+        # one with more, as read from a lagging replica, is newer
+        return version[0] > self._state.version[0]
+
+    def version(self):
+        """
+        Return the version of the exercises table in the database, as (count, maximum id)
+
+        Exercises are only ever added, so every commit of Exercises.post moves the version on.
+        """
+        return tuple(db.session.query(func.count(Exercise.exercise_id), func.max(Exercise.exercise_id)).one())
+
+    def stats(self):
+        state = self._state
+        return {'size': len(state.ids), 'hits': state.hits, 'misses': state.misses}
+
+
+exercise_catalog = ExerciseCatalog()
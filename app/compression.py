@@ -0,0 +1,28 @@
+import gzip
+
+from flask import current_app, request
+
+def compress_response(response):
+    """
+    Gzip a response body when the client accepts it and the body is large enough to benefit
+
+    Registered as an after_request handler by create_app. Streamed responses are left alone.
+    """
+    if response.direct_passthrough or response.is_streamed or response.status_code != 200 \
+            or 'Content-Encoding' in response.headers:
+        return response
+
+    response.vary.add('Accept-Encoding')
+    if not request.accept_encodings['gzip'] \
+            or (response.content_length or 0) < current_app.config.get('COMPRESS_MIN_SIZE', 1024):
+        return response
+
+    response.set_data(gzip.compress(response.get_data(), current_app.config.get('COMPRESS_LEVEL', 6)))
+    response.headers['Content-Encoding'] = 'gzip'
+
+    # a strong ETag identifies the uncompressed bytes, so weaken it as other gzip layers do;
+    # conditional requests compare ETags weakly and still match
+    etag, weak = response.get_etag()
+    if etag is not None and not weak:
+        response.set_etag(etag, weak=True)
+    return response
@@ -0,0 +1,84 @@
+from threading import Lock
+import time
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+
+from app import db
+
+class _InstrumentationState():
+    """Per-application totals of the SQL issued by each resource method"""
+
+    def __init__(self):
+        self.lock = Lock()
+        self.totals = {}
+
+
+class SQLInstrumentation():
+    """
+    Count the SQL statements, and time spent in the database, of every request
+
+    Engine event hooks accumulate each request's statements and database time, which are
+    returned in a Server-Timing header and added to per-process totals for each resource
+    method, e.g. 'Sessions.get'. Statements issued outside of a request are not counted.
+    """
+
+    def init_app(self, app):
+        app.extensions['sql_instrumentation'] = _InstrumentationState()
+        binds = [None] + list(app.config.get('SQLALCHEMY_BINDS') or {})
+        for bind in binds:
+            engine = db.get_engine(app, bind)
+            event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+
+    @property
+    def _state(self):
+        return current_app.extensions['sql_instrumentation']
+
+    def stats(self):
+        """Return the totals for each resource method, keyed by e.g. 'Sessions.get'"""
+        state = self._state
+        with state.lock:
+            return {key: dict(totals) for key, totals in sorted(state.totals.items())}
+
+    def reset(self):
+        state = self._state
+        with state.lock:
+            state.totals.clear()
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['query_start'].pop()
+        if has_request_context() and 'sql_statements' in g:
+            g.sql_statements += 1
+            g.sql_time += elapsed
+
+    def _before_request(self):
+        g.sql_statements = 0
+        g.sql_time = 0.0
+
+    def _after_request(self, response):
+        if 'sql_statements' not in g:
+            return response
+        statements, duration = g.sql_statements, g.sql_time * 1000
+        response.headers.add('Server-Timing', f'db;dur={duration:.2f};desc="{statements} statements"')
+
+        view_class = getattr(current_app.view_functions.get(request.endpoint), 'view_class', None)
+        if view_class is not None:
+            key = f'{view_class.__name__}.{request.method.lower()}'
+            state = self._state
+            with state.lock:
+                totals = state.totals.setdefault(key, {'requests': 0, 'statements': 0,
+                                                       'max statements': 0, 'db time ms': 0.0})
+                totals['requests'] += 1
+                totals['statements'] += statements
+                totals['max statements'] = max(totals['max statements'], statements)
+                totals['db time ms'] += duration
+        return response
+
+
+sql_instrumentation = SQLInstrumentation()
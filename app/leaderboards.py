@@ -0,0 +1,161 @@
+"""
+Cross-user leaderboards of personal records
+
+Each user's best max weight and estimated 1RM for an exercise are already kept in
+personal_records, so a leaderboard ranks one row per user with a window function rather than
+aggregating every set. The users ranked within the top LEADERBOARD_SIZE of each (exercise,
+metric) are held in a bounded in-process cache: records raised by new sessions are merged into
+the cached boards when their transaction commits, and boards of exercises whose records were
+rebuilt, e.g. after a delete, are dropped to be recomputed on their next read. Boards also
+expire after LEADERBOARD_CACHE_TTL seconds, which bounds how stale those of other worker
+processes get.
+"""
+from bisect import insort
+from threading import Lock
+
+from flask import current_app, g, has_app_context
+from sqlalchemy import event, func
+
+from app import db
+from app.cache import LRUCache
+from app.models.personal_record import PersonalRecord
+from app.models.user import User
+from app.routing import RoutingSession
+
+METRICS = {'max_weight': PersonalRecord.max_weight, 'estimated_1rm': PersonalRecord.estimated_1rm}
+
+class TopK():
+    """
+    The users ranked in the top k by a metric, best first, ties in the order users registered
+
+    Users tied at the k-th rank are all held, so a board can hold more than k users. complete is
+    whether the board holds every user with a value.
+    """
+
+    def __init__(self, k, entries, complete):
+        self.k = k
+        self.complete = complete
+        self._entries = sorted((-value, user_id) for user_id, value in entries)
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def raise_value(self, user_id, value):
+        """Raise a user's value to value, as when they set a personal record"""
+        with self._lock:
+            current = next((entry for entry in self._entries if entry[1] == user_id), None)
+            if current is not None:
+                if -current[0] >= value:
+                    return
+                self._entries.remove(current)
+            elif not self.complete and value < -self._entries[-1][0]:
+                # the user's value was below the board, and still is
+                return
+            insort(self._entries, (-value, user_id))
+            # drop the users pushed out of the top k ranks, all of those tied on the last value at once
+            while True:
+                last = self._entries[-1][0]
+                rank = next(position for position, entry in enumerate(self._entries, start=1) if entry[0] == last)
+                if rank <= self.k:
+                    break
+                del self._entries[rank - 1:]
+                self.complete = False
+
+    def top(self, n):
+        """Return the first n entries as (rank, user_id, value), tied values sharing the higher rank"""
+        with self._lock:
+            entries = self._entries[:n]
+        ranked, rank, previous = [], 0, None
+        for position, (negated_value, user_id) in enumerate(entries, start=1):
+            if negated_value != previous:
+                rank, previous = position, negated_value
+            ranked.append((rank, user_id, -negated_value))
+        return ranked
+
+
+class LeaderboardCache():
+    """
+    In-process cache of the leaderboard of each exercise and metric, kept up to date with the
+    personal records committed through this process
+    """
+
+    def init_app(self, app):
+        app.extensions['leaderboards'] = LRUCache(app.config.get('LEADERBOARD_CACHE_SIZE', 256),
+                                                  app.config.get('LEADERBOARD_CACHE_TTL', 60))
+
+    @property
+    def _boards(self):
+        return current_app.extensions['leaderboards']
+
+    @property
+    def size(self):
+        return current_app.config.get('LEADERBOARD_SIZE', 100)
+
+    def top(self, exercise_id, metric, n):
+        """Return the top n users of an exercise by a metric of METRICS, as dicts of 'rank', 'username' and 'value'"""
+        board = self._boards.get((exercise_id, metric))
+        if board is None:
+            board = self.compute(exercise_id, metric)
+            self._boards.set((exercise_id, metric), board)
+        ranked = board.top(n)
+        user_ids = {user_id for _, user_id, _ in ranked}
+        usernames = dict(db.session.query(User.id, User.username).filter(User.id.in_(user_ids)))
+        if len(usernames) < len(user_ids):
+            # users raised into the board by this process may not have reached the read replica yet
+            read_replica, g.read_replica = g.get('read_replica', False), False
+            try:
+                usernames.update(db.session
+                                   .query(User.id, User.username)
+                                   .filter(User.id.in_(user_ids - set(usernames))))
+            finally:
+                g.read_replica = read_replica
+        return [{'rank': rank, 'username': usernames[user_id], 'value': value} for rank, user_id, value in ranked]
+
+    def compute(self, exercise_id, metric):
+        """Rank the users who have performed an exercise by a metric, reading one row of personal_records per user"""
+        column = METRICS[metric]
+        ranked = db.session \
+                   .query(PersonalRecord.user_id.label('user_id'),
+                          column.label('value'),
+                          func.rank().over(order_by=column.desc()).label('rank'),
+                          func.count().over().label('users')) \
+                   .filter(PersonalRecord.exercise_id == exercise_id) \
+                   .subquery()
+        rows = db.session \
+                 .query(ranked.c.user_id, ranked.c.value, ranked.c.users) \
+                 .filter(ranked.c.rank <= self.size) \
+                 .all()
+        return TopK(self.size, [(user_id, value) for user_id, value, _ in rows],
+                    complete=not rows or len(rows) == rows[0].users)
+
+    def apply(self, changes):
+        """Apply the changes to personal records committed by a transaction to the cached boards"""
+        for exercise_id in changes['rebuilt']:
+            for metric in METRICS:
+                self._boards.pop((exercise_id, metric))
+        for (user_id, exercise_id), values in changes['raised'].items():
+            if exercise_id in changes['rebuilt']:
+                continue
+            for metric, value in zip(METRICS, values):
+                board = self._boards.get((exercise_id, metric))
+                if board is not None:
+                    board.raise_value(user_id, value)
+
+    def stats(self):
+        return self._boards.stats()
+
+
+leaderboards = LeaderboardCache()
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _after_commit(session):
+    changes = session.info.pop('personal_records_changed', None)
+    if changes and has_app_context() and 'leaderboards' in current_app.extensions:
+        leaderboards.apply(changes)
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _after_rollback(session):
+    session.info.pop('personal_records_changed', None)
@@ -0,0 +1,91 @@
+"""
+Prometheus metrics for the application, served at /metrics
+
+Under gunicorn each worker process keeps its own metrics; set PROMETHEUS_MULTIPROC_DIR to a
+directory shared by the workers (gunicorn.conf.py does so) and /metrics aggregates the values
+written there by every worker, whichever one serves the scrape.
+"""
+import os
+import time
+
+from flask import g, request, Response
+from prometheus_client import CollectorRegistry, CONTENT_TYPE_LATEST, Counter, Gauge, generate_latest, \
+                              Histogram, REGISTRY
+from prometheus_client import multiprocess
+from sqlalchemy.pool import QueuePool
+
+REQUEST_LATENCY = Histogram('http_request_duration_seconds', 'Latency of HTTP requests',
+                            ['route', 'method', 'status'])
+REQUESTS_IN_FLIGHT = Gauge('http_requests_in_flight', 'HTTP requests currently being served',
+                           multiprocess_mode='livesum')
+AUTH_ATTEMPTS = Counter('auth_attempts_total', 'Outcomes of authentication attempts', ['scheme', 'outcome'])
+POOL_CHECKOUT_WAIT = Histogram('db_pool_checkout_wait_seconds', 'Time waited to check a connection out of the pool',
+                               buckets=(.0005, .001, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10, 30))
+POOL_SIZE = Gauge('db_pool_size', 'Configured size of the connection pools', multiprocess_mode='livesum')
+POOL_CHECKED_OUT = Gauge('db_pool_checked_out', 'Connections currently checked out of the pools',
+                         multiprocess_mode='livesum')
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool recording how long each checkout waits, its size and the connections checked out"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_CHECKOUT_WAIT.observe(time.perf_counter() - start)
+            POOL_SIZE.set(self.size())
+            POOL_CHECKED_OUT.set(self.checkedout())
+
+    def _do_return_conn(self, conn):
+        super()._do_return_conn(conn)
+        POOL_CHECKED_OUT.set(self.checkedout())
+
+
+def init_app(app):
+    """Instrument an application's requests and connection pool, and serve its metrics at /metrics"""
+    # SQLite engines use their own pools, which have no size or waits to measure
+    if not (app.config.get('SQLALCHEMY_DATABASE_URI') or '').startswith('sqlite'):
+        engine_options = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+        engine_options.setdefault('poolclass', InstrumentedQueuePool)
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options
+
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+    app.add_url_rule('/metrics', 'metrics', metrics)
+
+
+def record_auth(scheme, outcome):
+    """Count an authentication attempt, returning whether it succeeded"""
+    AUTH_ATTEMPTS.labels(scheme, outcome).inc()
+    return outcome == 'success'
+
+
+def metrics():
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ or 'prometheus_multiproc_dir' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
+
+
+def _before_request():
+    g.request_start = time.perf_counter()
+    REQUESTS_IN_FLIGHT.inc()
+
+
+def _after_request(response):
+    if 'request_start' in g:
+        # label by URL rule rather than path, so that dates and unmatched paths don't multiply the series
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        REQUEST_LATENCY.labels(route, request.method, response.status_code) \
+                       .observe(time.perf_counter() - g.request_start)
+    return response
+
+
+def _teardown_request(exc):
+    if g.pop('request_start', None) is not None:
+        REQUESTS_IN_FLIGHT.dec()
@@ -0,0 +1,30 @@
+import json
+import zlib
+
+from sqlalchemy import UniqueConstraint
+
+from app import db
+
+class ArchivedSession(db.Model):
+    """Object relational model of a session moved out of the live tables, its sets compressed into one row"""
+
+    __tablename__ = "archived_sessions"
+
+    session_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    date = db.Column(db.DateTime, nullable=False)
+    sets = db.Column(db.LargeBinary, nullable=False)
+
+    __table_args__ = (UniqueConstraint('user_id', 'date'),)
+
+    def __repr__(self):
+        return f"ArchivedSession(date='{self.date}', user_id='{self.user_id}')"
+
+    @staticmethod
+    def pack(records):
+        """Compress a session's sets, given in order as (exercise_id, reps, weight), for the sets column"""
+        return zlib.compress(json.dumps([list(record) for record in records], separators=(',', ':')).encode())
+
+    def records(self):
+        """Return the session's sets, in order, as (exercise_id, reps, weight)"""
+        return [tuple(record) for record in json.loads(zlib.decompress(self.sets))]
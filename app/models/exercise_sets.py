@@ -0,0 +1,21 @@
+from app import db
+
+class ExerciseSets(db.Model):
+    """Object relational model of all the sets of an exercise in a session, packed into one row"""
+
+    __tablename__ = "exercise_sets"
+
+    record_id = db.Column(db.Integer, primary_key=True)
+    session_id = db.Column(db.Integer, db.ForeignKey('sessions.session_id', ondelete='CASCADE'), nullable=False)
+    exercise_id = db.Column(db.Integer, db.ForeignKey('exercises.exercise_id'), nullable=False)
+    reps = db.Column(db.LargeBinary, nullable=False)
+    weights = db.Column(db.LargeBinary, nullable=False)
+
+    # lets queries select the columns of either layout by the same names
+    weight = db.synonym('weights')
+
+    __table_args__ = (db.Index('ix_exercise_sets_session_id_exercise_id', 'session_id', 'exercise_id', unique=True),
+                      db.Index('ix_exercise_sets_exercise_id', 'exercise_id'))
+
+    def __repr__(self):
+        return f"ExerciseSets(session_id='{self.session_id}', exercise_id={self.exercise_id})"
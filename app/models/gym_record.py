@@ -6,11 +6,15 @@ class GymRecord(db.Model):
     __tablename__ = "gym_records"
 
     record_id = db.Column(db.Integer, primary_key=True)
-    session_id = db.Column(db.Integer, db.ForeignKey('sessions.session_id'), nullable=False)
+    session_id = db.Column(db.Integer, db.ForeignKey('sessions.session_id', ondelete='CASCADE'), nullable=False)
     exercise_id = db.Column(db.Integer, db.ForeignKey('exercises.exercise_id'), nullable=False)
     reps = db.Column(db.Integer, nullable=False)
     weight = db.Column(db.Float, nullable=False)
 
+    # cover the per-session reads and the per-exercise aggregates without visiting the table
+    __table_args__ = (db.Index('ix_gym_records_session_id_exercise_id', 'session_id', 'exercise_id', 'reps', 'weight'),
+                      db.Index('ix_gym_records_exercise_id_session_id', 'exercise_id', 'session_id', 'reps', 'weight'))
+
     def __repr__(self):
         return f"Exercise(session_id='{self.session_id}', exercise_id={self.exercise_id}, " + \
                f"reps={self.reps}, weight={self.weight})"
@@ -0,0 +1,207 @@
+from collections import defaultdict
+
+from app import db
+from app.archive import archived_sets
+from app.models.session import Session
+from app.set_storage import expand_sets, set_model
+
+class PersonalRecord(db.Model):
+    """Object relational model of a user's personal records for an exercise"""
+
+    __tablename__ = "personal_records"
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    exercise_id = db.Column(db.Integer, db.ForeignKey('exercises.exercise_id'), primary_key=True)
+    max_weight = db.Column(db.Float, nullable=False)
+    max_weight_session_id = db.Column(db.Integer, nullable=False)
+    estimated_1rm = db.Column(db.Float, nullable=False)
+    estimated_1rm_session_id = db.Column(db.Integer, nullable=False)
+    last_performed = db.Column(db.DateTime, nullable=False)
+    last_performed_session_id = db.Column(db.Integer, nullable=False)
+
+    # leaderboards read every user's records of an exercise
+    __table_args__ = (db.Index('ix_personal_records_exercise_id', 'exercise_id', 'max_weight', 'estimated_1rm'),)
+
+    def __repr__(self):
+        return f"PersonalRecord(user_id={self.user_id}, exercise_id={self.exercise_id}, " + \
+               f"max_weight={self.max_weight}, estimated_1rm={self.estimated_1rm})"
+
+
+class RepRecord(db.Model):
+    """Object relational model of the most reps a user has performed at each weight of an exercise"""
+
+    __tablename__ = "rep_records"
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    exercise_id = db.Column(db.Integer, db.ForeignKey('exercises.exercise_id'), primary_key=True)
+    weight = db.Column(db.Float, primary_key=True)
+    reps = db.Column(db.Integer, nullable=False)
+    session_id = db.Column(db.Integer, nullable=False)
+
+    def __repr__(self):
+        return f"RepRecord(user_id={self.user_id}, exercise_id={self.exercise_id}, " + \
+               f"weight={self.weight}, reps={self.reps})"
+
+
+def personal_records_changed(session=None):
+    """
+    Return the changes to personal records made in a session's transaction, by default the current one
+
+    A dict of 'raised', mapping the (user_id, exercise_id) of each summary raised by new sets to
+    its (max_weight, estimated_1rm), and 'rebuilt', the set of ids of exercises whose records
+    were rebuilt, for consumers such as the leaderboards to apply once the transaction commits.
+    """
+    info = (session or db.session).info
+    return info.setdefault('personal_records_changed', {'raised': {}, 'rebuilt': set()})
+
+
+def estimated_one_rep_max(reps, weight):
+    """Epley estimate of the weight that could be lifted for a single rep"""
+    return weight if reps <= 1 else weight * (1 + reps / 30)
+
+
+def update_personal_records(user_id, sessions):
+    """
+    Fold the sets of newly added sessions into a user's personal records
+
+    sessions is a list of (session_id, session_date, records) triples, records being an iterable
+    of (exercise_id, reps, weight). Only the summaries of the exercises performed are read, in two
+    queries however many sessions there are, so no history is scanned. Returns a dict mapping
+    each session id to a dict mapping the id of each exercise on which the session beat an
+    existing record to a description of the records it beat.
+    """
+    sets = []
+    for session_id, session_date, records in sessions:
+        session_sets = defaultdict(list)
+        for exercise_id, reps, weight in records:
+            session_sets[exercise_id].append((reps, weight))
+        sets.append((session_date, session_id, session_sets))
+    exercise_ids = {exercise_id for _, _, session_sets in sets for exercise_id in session_sets}
+    if not exercise_ids:
+        return {}
+
+    summaries = {summary.exercise_id: summary for summary in PersonalRecord.query
+                                                                          .filter_by(user_id = user_id)
+                                                                          .filter(PersonalRecord.exercise_id.in_(exercise_ids))}
+    weights = {weight for _, _, session_sets in sets for exercise_sets in session_sets.values()
+                      for _, weight in exercise_sets}
+    rep_records = {(rep_record.exercise_id, rep_record.weight): rep_record
+                   for rep_record in RepRecord.query
+                                              .filter_by(user_id = user_id)
+                                              .filter(RepRecord.exercise_id.in_(exercise_ids))
+                                              .filter(RepRecord.weight.in_(weights))}
+
+    beaten = {}
+    for session_date, session_id, session_sets in sorted(sets, key=lambda s: s[0]):
+        for exercise_id, exercise_sets in session_sets.items():
+            exercise_beaten = fold_session(user_id, exercise_id, session_id, session_date, exercise_sets,
+                                            summaries, rep_records)
+            if exercise_beaten:
+                beaten.setdefault(session_id, {})[exercise_id] = exercise_beaten
+    raised = personal_records_changed()['raised']
+    for exercise_id, summary in summaries.items():
+        raised[(user_id, exercise_id)] = (summary.max_weight, summary.estimated_1rm)
+    return beaten
+
+
+def records_held_by(user_id, session_ids):
+    """
+    Return the ids of the exercises on which any of the given sessions holds one of the user's records
+
+    session_ids may be a list of ids or a select of them.
+    """
+    summaries = db.session \
+                  .query(PersonalRecord.exercise_id) \
+                  .filter_by(user_id = user_id) \
+                  .filter(db.or_(PersonalRecord.max_weight_session_id.in_(session_ids),
+                                 PersonalRecord.estimated_1rm_session_id.in_(session_ids),
+                                 PersonalRecord.last_performed_session_id.in_(session_ids)))
+    rep_records = db.session \
+                    .query(RepRecord.exercise_id) \
+                    .filter_by(user_id = user_id) \
+                    .filter(RepRecord.session_id.in_(session_ids))
+    return {exercise_id for exercise_id, in summaries.union(rep_records)}
+
+
+def rebuild_personal_records(user_id, exercise_ids):
+    """Recompute a user's personal records for the given exercises from their gym records, live and archived"""
+    if not exercise_ids:
+        return
+    personal_records_changed()['rebuilt'].update(exercise_ids)
+    PersonalRecord.query \
+                  .filter_by(user_id = user_id) \
+                  .filter(PersonalRecord.exercise_id.in_(exercise_ids)) \
+                  .delete(synchronize_session=False)
+    RepRecord.query \
+             .filter_by(user_id = user_id) \
+             .filter(RepRecord.exercise_id.in_(exercise_ids)) \
+             .delete(synchronize_session=False)
+
+    Sets = set_model()
+    data = expand_sets(db.session
+                         .query(Sets.exercise_id, Session.session_id, Session.date, Sets.reps, Sets.weight)
+                         .select_from(Sets)
+                         .join(Session)
+                         .filter(Session.user_id == user_id)
+                         .filter(Sets.exercise_id.in_(exercise_ids))
+                         .order_by(Session.date, Sets.record_id))
+
+    sets = defaultdict(list)
+    for exercise_id, session_id, session_date, reps, weight in data:
+        sets[(session_date, session_id, exercise_id)].append((reps, weight))
+    for session_id, session_date, exercise_id, reps, weight in archived_sets(user_id, set(exercise_ids)):
+        sets[(session_date, session_id, exercise_id)].append((reps, weight))
+    summaries, rep_records = {}, {}
+    for (session_date, session_id, exercise_id), exercise_sets in sorted(sets.items(), key=lambda item: item[0][0]):
+        fold_session(user_id, exercise_id, session_id, session_date, exercise_sets, summaries, rep_records)
+
+
+def fold_session(user_id, exercise_id, session_id, session_date, sets, summaries, rep_records, add=None):
+    """
+    Fold one session's sets of an exercise into the summaries and rep_records already loaded
+
+    A record is only replaced when it is strictly beaten, so ties stay with the session that
+    set them first. Records set on an exercise or weight not performed before are not reported.
+    New records are passed to add, by default db.session.add.
+    """
+    add = add or db.session.add
+    beaten = {}
+    max_weight = max(weight for _, weight in sets)
+    estimated_1rm = max(estimated_one_rep_max(reps, weight) for reps, weight in sets)
+
+    summary = summaries.get(exercise_id)
+    if summary is None:
+        summary = PersonalRecord(user_id=user_id,
+                                 exercise_id=exercise_id,
+                                 max_weight=max_weight,
+                                 max_weight_session_id=session_id,
+                                 estimated_1rm=estimated_1rm,
+                                 estimated_1rm_session_id=session_id,
+                                 last_performed=session_date,
+                                 last_performed_session_id=session_id)
+        add(summary)
+        summaries[exercise_id] = summary
+    else:
+        if max_weight > summary.max_weight:
+            summary.max_weight, summary.max_weight_session_id = max_weight, session_id
+            beaten['max weight'] = max_weight
+        if estimated_1rm > summary.estimated_1rm:
+            summary.estimated_1rm, summary.estimated_1rm_session_id = estimated_1rm, session_id
+            beaten['estimated 1rm'] = estimated_1rm
+        if session_date >= summary.last_performed:
+            summary.last_performed, summary.last_performed_session_id = session_date, session_id
+
+    best_reps = {}
+    for reps, weight in sets:
+        best_reps[weight] = max(reps, best_reps.get(weight, reps))
+    for weight, reps in sorted(best_reps.items()):
+        rep_record = rep_records.get((exercise_id, weight))
+        if rep_record is None:
+            rep_record = RepRecord(user_id=user_id, exercise_id=exercise_id, weight=weight,
+                                   reps=reps, session_id=session_id)
+            add(rep_record)
+            rep_records[(exercise_id, weight)] = rep_record
+        elif reps > rep_record.reps:
+            rep_record.reps, rep_record.session_id = reps, session_id
+            beaten.setdefault('reps at weight', []).append({'weight': weight, 'reps': reps})
+    return beaten
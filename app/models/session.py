@@ -1,12 +1,9 @@
-from datetime import datetime
-from itertools import groupby
-
 from sqlalchemy import UniqueConstraint
 
 from app import db
+from app.catalog import exercise_catalog
 from app.models.exercise import Exercise
-from app.models.gym_record import GymRecord
-from app.models.user import User
+from app.set_storage import expand_sets, set_model
 
 class Session(db.Model):
     """Object relational model of user sessions"""
@@ -17,26 +14,71 @@ class Session(db.Model):
     date = db.Column(db.DateTime, nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
 
-    __table_args__ = (UniqueConstraint('user_id', 'date'),)
+    # archived sessions keep their ids, which personal records point to, so ids must never be
+    # handed out again; SQLite only guarantees that for AUTOINCREMENT tables, and MySQL from 8.0
+    __table_args__ = (UniqueConstraint('user_id', 'date'), {'sqlite_autoincrement': True})
 
-    records = db.relationship('GymRecord', backref='session')
+    records = db.relationship('GymRecord', backref='session', order_by='GymRecord.record_id', passive_deletes=True)
 
     def __repr__(self):
         return f"Session(date='{self.date}', user_id='{self.user_id}')"
 
 
 class ResponseObject():
-    def __init__(self, session):
-        self.date = session.date
-        self.username = User.query.get(session.user_id).username
+    def __init__(self, date, username, exercises=None, reps=None, weights=None):
+        self.date = date
+        self.username = username
+        self.exercises = exercises if exercises is not None else []
+        self.reps = reps if reps is not None else []
+        self.weights = weights if weights is not None else []
+
+    @classmethod
+    def from_query(cls, sessions_query, username):
+        """
+        Build a ResponseObject for each session selected by sessions_query
+
+        Issues two queries however many sessions are selected - one for the sessions
+        themselves and one for all of their gym records - and groups the gym records
+        by session and exercise in a single pass.
+        """
+        sessions = sessions_query.all()
+        if not sessions:
+            return []
+
+        Sets = set_model()
+        selected = sessions_query.with_entities(Session.session_id).subquery()
         data = db.session \
-                 .query(Exercise.exercise_name, GymRecord.reps, GymRecord.weight) \
-                 .select_from(Exercise) \
-                 .join(GymRecord) \
-                 .join(Session) \
-                 .filter(Session.session_id == session.session_id) \
-                 .order_by(Exercise.exercise_name, GymRecord.record_id) \
+                 .query(Sets.session_id, Exercise.exercise_name, Sets.reps, Sets.weight) \
+                 .select_from(Sets) \
+                 .join(Exercise) \
+                 .join(selected, selected.c.session_id == Sets.session_id) \
+                 .order_by(Sets.session_id, Exercise.exercise_name, Sets.record_id) \
                  .all()
-        self.exercises = [k for k, _ in groupby(data, key=lambda x: x[0])]
-        self.reps = [[r[1] for r in v] for _, v in groupby(data, key=lambda x: x[0])]
-        self.weights = [[r[2] for r in v] for _, v in groupby(data, key=lambda x: x[0])]
+
+        responses = {session.session_id: cls(session.date, username) for session in sessions}
+        for session_id, exercise_name, reps, weight in expand_sets(data):
+            responses[session_id].add_record(exercise_name, reps, weight)
+        return [responses[session.session_id] for session in sessions]
+
+    @classmethod
+    def from_archive(cls, archived_sessions, username):
+        """Build a ResponseObject for each of a list of ArchivedSessions, its exercises ordered as from_query orders them"""
+        records = [archived.records() for archived in archived_sessions]
+        names = exercise_catalog.names_for({exercise_id for session_records in records
+                                                        for exercise_id, _, _ in session_records})
+        responses = []
+        for archived, session_records in zip(archived_sessions, records):
+            response = cls(archived.date, username)
+            for exercise_id, reps, weight in sorted(session_records, key=lambda record: names[record[0]]):
+                response.add_record(names[exercise_id], reps, weight)
+            responses.append(response)
+        return responses
+
+    def add_record(self, exercise_name, reps, weight):
+        """Append a set, starting a new exercise unless it continues the last exercise added"""
+        if not self.exercises or self.exercises[-1] != exercise_name:
+            self.exercises.append(exercise_name)
+            self.reps.append([])
+            self.weights.append([])
+        self.reps[-1].append(reps)
+        self.weights[-1].append(weight)
@@ -0,0 +1,100 @@
+from datetime import datetime
+
+from sqlalchemy import exists, func, literal, select
+
+from app import db
+from app.models.user import User
+
+class SessionChange(db.Model):
+    """Object relational model of the log of sessions created and deleted, in the order they happened"""
+
+    __tablename__ = "session_changes"
+
+    change_id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    date = db.Column(db.DateTime, nullable=False)
+    operation = db.Column(db.String(8), nullable=False)
+    changed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (db.Index('ix_session_changes_user_id_change_id', 'user_id', 'change_id'),)
+
+    def __repr__(self):
+        return f"SessionChange(change_id={self.change_id}, user_id={self.user_id}, " + \
+               f"date='{self.date}', operation='{self.operation}')"
+
+
+def lock_user_changes(user_id):
+    """
+    Lock a user's row until the caller's transaction ends, before logging any change of theirs
+
+    Change ids are allocated as changes are logged, but only become visible as transactions
+    commit; were two of a user's transactions to commit out of id order, a client reading in
+    between would move its cursor past the change still to commit and never see it. Holding the
+    user's row lock from before a change id is allocated makes each user's changes commit in the
+    order of their ids. The lock is FOR NO KEY UPDATE: by the time changes are logged, a
+    transaction's inserts referencing the user hold FOR KEY SHARE on the row, and on PostgreSQL
+    two such transactions each taking FOR UPDATE would deadlock on the other's share lock.
+    SQLite ignores these locks, but only ever has one writing transaction.
+    """
+    db.session.query(User.id).filter_by(id = user_id).with_for_update(key_share=True).one()
+
+
+def log_created(user_id, dates):
+    """Log the creation, or update, of a user's sessions on the given dates, in the caller's transaction"""
+    if dates:
+        lock_user_changes(user_id)
+        changed_at = datetime.utcnow()
+        db.session.execute(SessionChange.__table__.insert(),
+                           [{'user_id': user_id, 'date': session_date, 'operation': 'created', 'changed_at': changed_at}
+                            for session_date in sorted(dates)])
+
+
+def log_deleted(user_id, dates):
+    """
+    Log the deletion of a user's sessions, in the caller's transaction
+
+    dates is a select of the dates of the sessions about to be deleted, which are copied into
+    the log by one INSERT ... SELECT statement, however many sessions there are.
+    """
+    lock_user_changes(user_id)
+    dates = dates.alias()
+    db.session.execute(SessionChange.__table__
+                                    .insert()
+                                    .from_select(['user_id', 'date', 'operation', 'changed_at'],
+                                                 select([literal(user_id), dates.c.date, literal('deleted'),
+                                                         literal(datetime.utcnow())])
+                                                 .order_by(dates.c.date)))
+
+
+def compact_changes(cutoff):
+    """
+    Compact the change log, in the caller's transaction
+
+    Changes superseded by a later change to the same user and date are deleted, as a client
+    applying the later one ends up the same either way. Changes made before cutoff are deleted
+    too, and each user's changes_horizon raised to the last of theirs deleted, so that a client
+    whose cursor is older than that is told to resync in full. Returns the number of changes
+    deleted.
+    """
+    later = SessionChange.__table__.alias('later')
+    superseded = db.session.execute(SessionChange.__table__
+                                                 .delete()
+                                                 .where(exists()
+                                                        .where(later.c.user_id == SessionChange.user_id)
+                                                        .where(later.c.date == SessionChange.date)
+                                                        .where(later.c.change_id > SessionChange.change_id))).rowcount
+
+    horizons = db.session \
+                 .query(SessionChange.user_id, func.max(SessionChange.change_id)) \
+                 .filter(SessionChange.changed_at < cutoff) \
+                 .group_by(SessionChange.user_id) \
+                 .all()
+    for user_id, horizon in horizons:
+        User.query \
+            .filter_by(id = user_id) \
+            .filter(User.changes_horizon < horizon) \
+            .update({'changes_horizon': horizon}, synchronize_session=False)
+    expired = db.session.execute(SessionChange.__table__
+                                              .delete()
+                                              .where(SessionChange.changed_at < cutoff)).rowcount
+    return superseded + expired
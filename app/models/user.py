@@ -13,8 +13,10 @@ class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(128), unique=True, nullable=False)
     password_hash = db.Column(db.String(128), unique=True, nullable=False)
-    access_token = db.Column(db.String(128))
+    access_token = db.Column(db.String(128), index=True)
     token_expiry = db.Column(db.DateTime)
+    data_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    changes_horizon = db.Column(db.Integer, nullable=False, default=0, server_default='0')
 
     sessions = db.relationship('Session', backref='user')
 
@@ -32,3 +34,7 @@ class User(db.Model):
     def set_token(self, expires_in=900):
         self.access_token = token_urlsafe()
         self.token_expiry = datetime.utcnow() + timedelta(seconds=expires_in)
+
+    def sessions_changed(self):
+        """Bump the version of the user's session data, as part of the transaction changing it"""
+        self.data_version = User.data_version + 1
@@ -1,9 +1,16 @@
 from datetime import datetime
+from functools import wraps
+from hashlib import sha1
 
-from flask import g
+from flask import current_app, g, request, Response
 from flask_httpauth import HTTPBasicAuth, HTTPTokenAuth
+from flask_restful.utils import unpack
+from werkzeug.http import quote_etag
 
+from app import db
+from app.metrics import record_auth
 from app.models.user import User
+from app.routing import REPLICA_BIND
 
 http_auth = HTTPBasicAuth()
 token_auth = HTTPTokenAuth()
@@ -11,13 +18,116 @@ token_auth = HTTPTokenAuth()
 @http_auth.verify_password
 def verify_password(username, password):
     user = User.query.filter_by(username=username).first()
-    return user is not None and user.check_password(password)
+    return record_auth('password', 'success' if user is not None and user.check_password(password) else 'failure')
+
+
+class CachedUser():
+    """
+    The user a cached access token belongs to
+
+    Holds the id and username from the token cache, which is all most handlers use, and loads
+    the User itself, from the primary, only when any other attribute is first used.
+    """
+
+    def __init__(self, user_id, username):
+        self.id = user_id
+        self.username = username
+        self._user = None
+
+    def __getattr__(self, name):
+        if self._user is None:
+            # replica_read compares the replica's data version against the primary's
+            read_replica, g.read_replica = g.get('read_replica', False), False
+            try:
+                self._user = User.query.get(self.id)
+            finally:
+                g.read_replica = read_replica
+        return getattr(self._user, name)
 
 
 @token_auth.verify_token
 def verify_token(access_token):
-    user = User.query.filter_by(access_token=access_token).first()
-    if user is None or user.token_expiry < datetime.utcnow():
-        return False
+    # the token cache maps access tokens to (user id, username, expiry), so repeat requests
+    # make no query to authenticate. Replacing a token evicts it from this worker's cache; other
+    # workers accept it until their entry expires, at most TOKEN_CACHE_TTL seconds later. Unknown
+    # tokens are not cached: clients do not repeat them, and entries for guessed tokens would
+    # only evict those of valid ones
+    token_cache = current_app.extensions['token_cache']
+    cached = token_cache.get(access_token)
+    if cached is None:
+        user = User.query.filter_by(access_token=access_token).first()
+        if user is None:
+            return record_auth('token', 'unknown')
+        cached = (user.id, user.username, user.token_expiry)
+        token_cache.set(access_token, cached, ttl=(user.token_expiry - datetime.utcnow()).total_seconds())
+    else:
+        user = CachedUser(*cached[:2])
+    if cached[2] < datetime.utcnow():
+        token_cache.pop(access_token)
+        return record_auth('token', 'expired')
     g.current_user = user  # set current user on global object
-    return True
+    return record_auth('token', 'success')
+
+
+def conditional(version):
+    """
+    Serve a GET method conditionally on an ETag
+
+    version(resource, *args, **kwargs) must cheaply return a value that changes whenever the response
+    would; the ETag is derived from it, the request path and query string. A request whose
+    If-None-Match matches gets a 304 without the decorated method being called at all.
+    """
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            etag = sha1(repr((version(*args, **kwargs), request.path, sorted(request.args.items(multi=True))))
+                        .encode()).hexdigest()
+            headers = {'ETag': quote_etag(etag)}
+            if request.if_none_match.contains_weak(etag):
+                return Response(status=304, headers=headers)
+            data, code, response_headers = unpack(f(*args, **kwargs))
+            return data, code, dict(response_headers or {}, **headers)
+        return wrapper
+    return decorator
+
+
+def replica_read(f):
+    """
+    Serve a read-only method from the read replica, when one is configured
+
+    Place below token_auth.login_required, so that tokens are still verified on the primary. As
+    the user was loaded from the primary, a replica still behind the user's data version is
+    bypassed, so users always read their own writes; set REPLICA_READ_YOUR_WRITES to False to
+    read from the replica regardless. The replica's version is kept for read_version.
+    """
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        if REPLICA_BIND not in (current_app.config.get('SQLALCHEMY_BINDS') or {}):
+            return f(*args, **kwargs)
+        g.read_replica = True
+        try:
+            if 'current_user' in g:
+                replica_version = db.session \
+                                    .query(User.data_version) \
+                                    .filter_by(id = g.current_user.id) \
+                                    .scalar()
+                if current_app.config.get('REPLICA_READ_YOUR_WRITES', True):
+                    g.read_replica = replica_version is not None and replica_version >= g.current_user.data_version
+                if g.read_replica:
+                    g.read_version = replica_version
+            return f(*args, **kwargs)
+        finally:
+            g.read_replica = False
+            g.pop('read_version', None)
+    return wrapper
+
+
+def read_version():
+    """
+    Return the data version of the current user as of the data this request reads
+
+    While replica_read serves the request from the replica this is the replica's version, which
+    can be behind the user's when REPLICA_READ_YOUR_WRITES is False, so results memoized against
+    it are never stored under a version whose data they lack.
+    """
+    return g.read_version if 'read_version' in g else g.current_user.data_version
@@ -0,0 +1,88 @@
+from flask import abort, current_app, g
+from flask_restful import fields, marshal_with, Resource, reqparse
+from flask_restful.inputs import int_range
+import numpy as np
+
+from app import exercise_catalog
+from app.analytics import lttb, load_records, session_progress, weekly_volume
+from app.resources import read_version, replica_read, token_auth
+
+VOLUME_FIELDS = {'week': fields.String(),
+                 'exercise name': fields.String(),
+                 'tonnage': fields.Float(),
+                 'sets': fields.Integer(),
+                 'reps': fields.Integer(),
+                 'average intensity': fields.Float()}
+
+PROGRESS_SERIES = {'top set': 'top_set', 'estimated 1rm': 'estimated_1rm', 'volume': 'volume'}
+DEFAULT_PROGRESS_POINTS = 100
+
+class Volume(Resource):
+
+    @token_auth.login_required
+    @replica_read
+    @marshal_with(fields=VOLUME_FIELDS)
+    def get(self):
+        # results are memoized against the version of the user's data read, which every session write bumps
+        analytics_cache = current_app.extensions['analytics_cache']
+        key = ('volume', g.current_user.id, read_version())
+        volume = analytics_cache.get(key)
+        if volume is None:
+            volume = self.weekly_volume(g.current_user.id)
+            analytics_cache.set(key, volume)
+        return volume
+
+    def weekly_volume(self, user_id):
+        volume = weekly_volume(load_records(user_id))
+        exercise_names = exercise_catalog.names_for(set(volume['exercise_ids'].tolist()))
+        return [{'week': str(week),
+                 'exercise name': exercise_names.get(exercise_id),
+                 'tonnage': tonnage,
+                 'sets': sets,
+                 'reps': reps,
+                 'average intensity': intensity}
+                for week, exercise_id, tonnage, sets, reps, intensity
+                in zip(volume['weeks'], volume['exercise_ids'].tolist(), volume['tonnage'].tolist(),
+                       volume['sets'].tolist(), volume['reps'].tolist(), volume['intensity'].tolist())]
+
+
+class Progress(Resource):
+    """
+    A user's progress at an exercise, session by session, downsampled for charting
+
+    Returns {'exercise name', 'sessions', 'top set', 'estimated 1rm', 'volume'}, each series
+    {'dates', 'values'} of at most 'points' sessions chosen by LTTB to keep the shape of the full
+    history, however many sessions it covers.
+    """
+
+    @token_auth.login_required
+    @replica_read
+    def get(self, exercise_name):
+        # LTTB keeps the first and last sessions and at least one between
+        max_points = current_app.config.get('MAX_PROGRESS_POINTS', 1000)
+        parser = reqparse.RequestParser()
+        parser.add_argument('points', type=int_range(3, max_points),
+                            default=min(DEFAULT_PROGRESS_POINTS, max_points), location='args')
+        args = parser.parse_args(strict=True)
+
+        exercise_ids = exercise_catalog.ids_for([exercise_name])
+        if exercise_name not in exercise_ids:
+            abort(404, f"Exercise '{exercise_name}' not recognised")
+
+        analytics_cache = current_app.extensions['analytics_cache']
+        key = ('progress', g.current_user.id, exercise_ids[exercise_name], args['points'], read_version())
+        progress = analytics_cache.get(key)
+        if progress is None:
+            progress = self.progress(g.current_user.id, exercise_ids[exercise_name], args['points'])
+            analytics_cache.set(key, progress)
+        return {'exercise name': exercise_name, **progress}, 200
+
+    def progress(self, user_id, exercise_id, points):
+        series = session_progress(load_records(user_id, [exercise_id]))
+        days = series['dates'].astype(np.int64).astype(np.float64)
+        progress = {'sessions': len(days)}
+        for name, column in PROGRESS_SERIES.items():
+            kept = lttb(days, series[column], points)
+            progress[name] = {'dates': [str(session_date) for session_date in series['dates'][kept]],
+                              'values': series[column][kept].tolist()}
+        return progress
@@ -0,0 +1,97 @@
+from sqlalchemy.exc import IntegrityError
+
+from flask import current_app, g
+from flask_restful import abort, Resource, reqparse
+from flask_restful.inputs import date
+
+from app import db, exercise_catalog
+from app.models.archived_session import ArchivedSession
+from app.models.session import Session
+from app.resources import token_auth
+from app.resources.sessions import add_session_records, parse_exercises
+
+MAX_BATCH_SIZE = 1000
+
+class Batch(Resource):
+
+    @token_auth.login_required
+    def post(self):
+        # validate JSON data
+        parser = reqparse.RequestParser()
+        parser.add_argument('sessions', type=self.parse_sessions, required=True, location='json')
+        items = parser.parse_args(strict=True)['sessions']
+
+        # every item must be valid before anything is written
+        exercise_ids = exercise_catalog.ids_for({exercise['exercise name']
+                                                 for item in items if isinstance(item, dict)
+                                                 for exercise in item.get('exercises') or []
+                                                 if isinstance(exercise, dict)
+                                                 and isinstance(exercise.get('exercise name'), str)})
+        sessions, errors = [], {}
+        for index, item in enumerate(items):
+            try:
+                if not isinstance(item, dict):
+                    raise ValueError('Each session must be a JSON object')
+                for key in ('date', 'exercises'):
+                    if key not in item:
+                        raise ValueError(f"Missing required parameter '{key}' in the JSON body")
+                sessions.append((date(item['date']), parse_exercises(item['exercises'], exercise_ids)))
+            except Exception as exn:
+                errors[str(index)] = str(exn)
+        if errors:
+            abort(400, message={'sessions': errors})
+
+        # sessions clashing with a live or archived session, or an earlier one in the batch, are reported as conflicts
+        existing = {session_date for session_date, in db.session
+                                                        .query(Session.date)
+                                                        .filter_by(user_id = g.current_user.id)
+                                                        .filter(Session.date.in_([d for d, _ in sessions]))
+                                                        .union(db.session
+                                                                 .query(ArchivedSession.date)
+                                                                 .filter_by(user_id = g.current_user.id)
+                                                                 .filter(ArchivedSession.date.in_([d for d, _ in sessions])))}
+        new_sessions, conflicts = [], set()
+        for index, (session_date, exercises) in enumerate(sessions):
+            if session_date in existing:
+                conflicts.add(index)
+            else:
+                existing.add(session_date)
+                new_sessions.append((session_date, exercises))
+
+        # insert every new session, and then all of their records, with one statement each
+        session_ids, personal_records = {}, {}
+        if new_sessions:
+            try:
+                db.session.execute(Session.__table__.insert(), [{'date': session_date, 'user_id': g.current_user.id}
+                                                                for session_date, _ in new_sessions])
+                session_ids = dict(db.session
+                                     .query(Session.date, Session.session_id)
+                                     .filter_by(user_id = g.current_user.id)
+                                     .filter(Session.date.in_([d for d, _ in new_sessions])))
+                personal_records = add_session_records(g.current_user,
+                                                       [(session_ids[session_date], session_date, exercises)
+                                                        for session_date, exercises in new_sessions])
+                db.session.commit()
+            except IntegrityError as exn:
+                # a session was added concurrently for one of the dates
+                current_app.logger.error(exn.args)
+                db.session.rollback()
+                return {'message': 'error: sessions must be unique across dates for each user - please retry'}, 409
+
+        results = []
+        for index, (session_date, _) in enumerate(sessions):
+            if index in conflicts:
+                results.append({'date': session_date.date().isoformat(), 'status': 409,
+                                'message': 'error: sessions must be unique across dates for each user'})
+            else:
+                results.append({'date': session_date.date().isoformat(), 'status': 201,
+                                'message': 'Record successfully created',
+                                'personal records': personal_records[session_ids[session_date]]})
+        return results, 200
+
+    def parse_sessions(self, sessions):
+        if not isinstance(sessions, list):
+            raise ValueError("'sessions' must be a list of sessions")
+        if len(sessions) > MAX_BATCH_SIZE:
+            raise ValueError(f"No more than {MAX_BATCH_SIZE} sessions may be added in one batch")
+        return sessions
@@ -0,0 +1,73 @@
+from flask import g
+from flask_restful import marshal, Resource, reqparse
+from flask_restful.inputs import int_range, natural
+from sqlalchemy import func
+
+from app import db
+from app.archive import archived_query
+from app.models.archived_session import ArchivedSession
+from app.models.session import ResponseObject, Session
+from app.models.session_change import SessionChange
+from app.resources import conditional, replica_read, token_auth
+from app.resources.sessions import MAX_PAGE_SIZE, SESSION_FIELDS
+
+class Changes(Resource):
+    """
+    The sessions created, updated and deleted since a cursor, for clients keeping a copy of their sessions in sync
+
+    Returns {'cursor', 'more', 'created', 'deleted'}: the sessions created or updated since the
+    cursor, as now stored, which clients should upsert, and the dates of those deleted, taking only
+    the last change to each date into account. Clients pass the cursor returned as 'since' on
+    their next request, and request again straight away while 'more' is true. Changes older than
+    the log keeps are compacted away; a cursor from before then gets a 410 carrying the latest
+    cursor, and clients resync from GET /api/sessions and continue from that cursor.
+    """
+
+    @token_auth.login_required
+    @conditional(lambda resource: (g.current_user.id, g.current_user.data_version, g.current_user.changes_horizon))
+    @replica_read
+    def get(self):
+        parser = reqparse.RequestParser()
+        parser.add_argument('since', type=natural, required=True, location='args')
+        parser.add_argument('limit', type=int_range(1, MAX_PAGE_SIZE), default=MAX_PAGE_SIZE, location='args')
+        args = parser.parse_args(strict=True)
+
+        user = g.current_user
+        if args['since'] < user.changes_horizon:
+            latest = db.session \
+                       .query(func.max(SessionChange.change_id)) \
+                       .filter_by(user_id = user.id) \
+                       .scalar()
+            return {'message': f"Changes since '{args['since']}' have been compacted away - please resync all sessions",
+                    'cursor': max(latest or 0, user.changes_horizon)}, 410
+
+        changes = SessionChange.query \
+                               .filter_by(user_id = user.id) \
+                               .filter(SessionChange.change_id > args['since']) \
+                               .order_by(SessionChange.change_id) \
+                               .limit(args['limit']) \
+                               .all()
+        operations = {change.date: change.operation for change in changes}
+        created = sorted(session_date for session_date, operation in operations.items() if operation == 'created')
+        deleted = sorted(session_date for session_date, operation in operations.items() if operation == 'deleted')
+
+        # a session created and then deleted since is left to the deletion, which comes on a later page
+        sessions = []
+        if created:
+            sessions = ResponseObject.from_query(db.session
+                                                   .query(Session)
+                                                   .filter_by(user_id = user.id)
+                                                   .filter(Session.date.in_(created))
+                                                   .order_by(Session.date),
+                                                 user.username)
+            if len(sessions) < len(created):
+                sessions = sorted(sessions + ResponseObject.from_archive(archived_query(user.id)
+                                                                         .filter(ArchivedSession.date.in_(created))
+                                                                         .all(),
+                                                                         user.username),
+                                  key=lambda session: session.date)
+
+        return {'cursor': changes[-1].change_id if changes else args['since'],
+                'more': len(changes) == args['limit'],
+                'created': marshal(sessions, SESSION_FIELDS),
+                'deleted': [session_date.date().isoformat() for session_date in deleted]}, 200
@@ -1,19 +1,30 @@
-from flask import abort, make_response, jsonify
+from sqlalchemy.exc import IntegrityError
+
+from flask import abort, current_app, make_response, jsonify
 from flask_restful import Resource, reqparse
+from flask_restful.inputs import int_range
 
-from app import db
+from app import db, exercise_catalog
 from app.models.exercise import Exercise
-from app.resources import token_auth
+from app.resources import conditional, replica_read, token_auth
+
+MAX_SEARCH_RESULTS = 50
 
 class Exercises(Resource):
 
     @token_auth.login_required
+    @conditional(lambda resource: exercise_catalog.refresh())
+    @replica_read
     def get(self):
-        exercises = db.session \
-                      .query(Exercise.exercise_name) \
-                      .order_by(Exercise.exercise_name) \
-                      .all()
-        return [e[0] for e in exercises], 200
+        # validate query string
+        parser = reqparse.RequestParser()
+        parser.add_argument('q', location='args')
+        parser.add_argument('limit', type=int_range(1, MAX_SEARCH_RESULTS), default=10, location='args')
+        args = parser.parse_args(strict=True)
+
+        if args['q'] is None:
+            return exercise_catalog.sorted_names(), 200
+        return exercise_catalog.search(args['q'], args['limit']), 200
 
     @token_auth.login_required
     def post(self):
@@ -23,17 +34,22 @@ class Exercises(Resource):
         exercises = parser.parse_args(strict=True)['exercises']
 
         # return 409 if content duplicated
-        for exercise in exercises:
-            if db.session \
-                 .query(Exercise) \
-                 .filter_by(exercise_name = exercise) \
-                 .first() is not None:
-                abort(409)
-
-        # create new Exercise object
-        for exercise_name in exercises:
-            db.session.add(Exercise(exercise_name=exercise_name))
-        db.session.commit()
+        if exercise_catalog.ids_for(exercises):
+            abort(409)
+
+        # create new Exercise objects and write them through to the catalog
+        new_exercises = [Exercise(exercise_name=exercise_name) for exercise_name in exercises]
+        try:
+            db.session.add_all(new_exercises)
+            db.session.flush()
+            new_exercise_ids = {e.exercise_name: e.exercise_id for e in new_exercises}
+            db.session.commit()
+        except IntegrityError as exn:
+            # another worker added the same exercise since the catalog was last loaded
+            current_app.logger.error(exn.args)
+            db.session.rollback()
+            abort(409)
+        exercise_catalog.add(new_exercise_ids)
 
         return exercises, 201
 
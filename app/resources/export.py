@@ -0,0 +1,53 @@
+from heapq import merge
+import json
+
+from flask import g, Response, stream_with_context
+from flask_restful import marshal, Resource
+
+from app import db
+from app.archive import archived_query
+from app.models.archived_session import ArchivedSession
+from app.models.session import ResponseObject, Session
+from app.resources import token_auth
+from app.resources.sessions import SESSION_FIELDS
+
+EXPORT_BATCH_SIZE = 1000
+
+def pages(query, date_column, build):
+    """
+    Yield the ResponseObjects of a query ordered by date, reading EXPORT_BATCH_SIZE sessions at a time
+
+    Each page is read in full by build before any of it is yielded, so no cursor is left open
+    between pages and pages of other queries can be read in between, as unbuffered MySQL cursors
+    require.
+    """
+    last = None
+    while True:
+        page = query if last is None else query.filter(date_column > last)
+        responses = build(page.limit(EXPORT_BATCH_SIZE))
+        yield from responses
+        if len(responses) < EXPORT_BATCH_SIZE:
+            return
+        last = responses[-1].date
+
+
+class Export(Resource):
+
+    @token_auth.login_required
+    def get(self):
+        user_id, username = g.current_user.id, g.current_user.username
+        live_sessions = pages(db.session
+                                .query(Session)
+                                .filter_by(user_id = user_id)
+                                .order_by(Session.date),
+                              Session.date,
+                              lambda page: ResponseObject.from_query(page, username))
+        archived_sessions = pages(archived_query(user_id),
+                                  ArchivedSession.date,
+                                  lambda page: ResponseObject.from_archive(page.all(), username))
+
+        def generate():
+            for response in merge(live_sessions, archived_sessions, key=lambda session: session.date):
+                yield json.dumps(marshal(response, SESSION_FIELDS)) + '\n'
+
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
@@ -0,0 +1,11 @@
+from flask_restful import Resource
+
+from app import sql_instrumentation
+from app.resources import token_auth
+
+class Instrumentation(Resource):
+
+    @token_auth.login_required
+    def get(self):
+        """SQL statements and database time per resource method, for this worker process"""
+        return sql_instrumentation.stats()
@@ -0,0 +1,28 @@
+from flask import abort
+from flask_restful import fields, marshal, Resource, reqparse
+from flask_restful.inputs import int_range
+
+from app import exercise_catalog, leaderboards
+from app.resources import replica_read, token_auth
+
+METRIC_FIELDS = {'max_weight': 'max weight', 'estimated_1rm': 'estimated 1rm'}
+
+class Leaderboards(Resource):
+
+    @token_auth.login_required
+    @replica_read
+    def get(self, exercise_name):
+        parser = reqparse.RequestParser()
+        parser.add_argument('metric', choices=tuple(METRIC_FIELDS), default='max_weight', location='args')
+        parser.add_argument('limit', type=int_range(1, leaderboards.size), default=10, location='args')
+        args = parser.parse_args(strict=True)
+
+        exercise_ids = exercise_catalog.ids_for([exercise_name])
+        if exercise_name not in exercise_ids:
+            abort(404, f"Exercise '{exercise_name}' not recognised")
+
+        key = METRIC_FIELDS[args['metric']]
+        leaderboard_fields = {'rank': fields.Integer(), 'username': fields.String(), key: fields.Float()}
+        return marshal([{'rank': entry['rank'], 'username': entry['username'], key: entry['value']}
+                        for entry in leaderboards.top(exercise_ids[exercise_name], args['metric'], args['limit'])],
+                       leaderboard_fields), 200
@@ -0,0 +1,40 @@
+from collections import defaultdict
+
+from flask import g
+from flask_restful import fields, marshal_with, Resource
+
+from app import exercise_catalog
+from app.models.personal_record import PersonalRecord, RepRecord
+from app.resources import replica_read, token_auth
+
+RECORD_FIELDS = {'exercise name': fields.String(),
+                 'max weight': fields.Float(),
+                 'estimated 1rm': fields.Float(),
+                 'last performed': fields.DateTime(dt_format='rfc822'),
+                 'reps at weight': fields.List(fields.Nested({'weight': fields.Float(),
+                                                              'reps': fields.Integer()}))}
+
+class Records(Resource):
+
+    @token_auth.login_required
+    @replica_read
+    @marshal_with(fields=RECORD_FIELDS)
+    def get(self):
+        summaries = PersonalRecord.query \
+                                  .filter_by(user_id = g.current_user.id) \
+                                  .all()
+        rep_records = defaultdict(list)
+        for rep_record in RepRecord.query \
+                                   .filter_by(user_id = g.current_user.id) \
+                                   .order_by(RepRecord.weight) \
+                                   .all():
+            rep_records[rep_record.exercise_id].append({'weight': rep_record.weight, 'reps': rep_record.reps})
+
+        exercise_names = exercise_catalog.names_for([summary.exercise_id for summary in summaries])
+        records = [{'exercise name': exercise_names.get(summary.exercise_id),
+                    'max weight': summary.max_weight,
+                    'estimated 1rm': summary.estimated_1rm,
+                    'last performed': summary.last_performed,
+                    'reps at weight': rep_records[summary.exercise_id]}
+                   for summary in summaries]
+        return sorted(records, key=lambda record: record['exercise name'])
@@ -1,44 +1,279 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as Base64Error
 from datetime import datetime
+from heapq import merge
+from itertools import islice
 
+from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
 
 from flask import abort, current_app, g
-from flask_restful import fields, marshal_with, Resource, reqparse
-from flask_restful.inputs import date
+from flask_restful import fields, marshal, Resource, reqparse
+from flask_restful.inputs import date, int_range
 
-from app import db
-from app.models.exercise import Exercise
-from app.models.gym_record import GymRecord
+from app import db, exercise_catalog
+from app.archive import archived_query, patch_archived
+from app.models.archived_session import ArchivedSession
+from app.models.personal_record import PersonalRecord, rebuild_personal_records, records_held_by, \
+                                       update_personal_records
 from app.models.session import ResponseObject, Session
-from app.resources import token_auth
+from app.models.session_change import log_created, log_deleted
+from app.resources import conditional, replica_read, token_auth
+from app.set_storage import delete_sets, insert_sets, patch_sets, session_sets
+
+MAX_PAGE_SIZE = 500
+
+SESSION_FIELDS = {'session': {'date': fields.DateTime(dt_format='rfc822'),
+                              'username': fields.String(),
+                              'exercises': fields.List(fields.String()),
+                              'reps': fields.List(fields.List(fields.Integer())),
+                              'weights': fields.List(fields.List(fields.Integer()))}}
+
+def encode_cursor(session_date):
+    """Encode the date of the last session on a page as an opaque cursor for the next page"""
+    return urlsafe_b64encode(session_date.isoformat().encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by encode_cursor back into the date of the last session seen"""
+    try:
+        return datetime.fromisoformat(urlsafe_b64decode(cursor.encode()).decode())
+    except (Base64Error, UnicodeDecodeError, ValueError):
+        raise ValueError(f"Bad cursor parameter provided '{cursor}'")
+
+
+def parse_exercises(exercises, exercise_ids=None):
+    """
+    Validate the exercises of a session in a JSON body
+
+    exercise_ids maps exercise names to ids; by default the names are resolved through the
+    exercise catalog. Returns a list of dicts of 'exercise name', 'exercise id', 'reps' and
+    'weights', raising ValueError if the exercises are not valid.
+    """
+    try:
+        if exercise_ids is None:
+            exercise_ids = exercise_catalog.ids_for({exercise['exercise name'] for exercise in exercises
+                                                     if isinstance(exercise['exercise name'], str)})
+        parsed_exercises = []
+        for exercise in exercises:
+            exercise_name = exercise['exercise name']
+            if not isinstance(exercise_name, str):
+                raise ValueError(f"'exercise name' must be a string, not {exercise_name!r}")
+            if exercise_name not in exercise_ids:
+                suggestion = exercise_catalog.suggest(exercise_name)
+                hint = f" - did you mean '{suggestion}'?" if suggestion is not None else ''
+                raise ValueError(f"Exercise '{exercise_name}' not recognised - please add as an exercise{hint}")
+            reps = list(map(int, exercise['reps']))
+            weights = list(map(int, exercise['weights']))
+            if len(reps) != len(weights):
+                raise ValueError(f"Mismatch between 'reps' ({reps}) and 'weights' ({weights})")
+            parsed_exercises.append({'exercise name': exercise_name,
+                                     'exercise id': exercise_ids[exercise_name],
+                                     'reps': reps,
+                                     'weights': list(map(float, exercise['weights']))})
+        return parsed_exercises
+    except KeyError as exn:
+        current_app.logger.error(exn.args)
+        raise ValueError(f'Missing required parameter {exn} in the JSON body')
+
+
+def parse_set_updates(updates):
+    """
+    Validate the sets to update in a PATCH body
+
+    Each update names an exercise, the index of one of its sets, counting from 0 in the order
+    performed, and either or both of its new reps and weight. Returns a list of dicts of
+    'exercise name', 'exercise id', 'set', 'reps' and 'weight', raising ValueError if the updates
+    are not valid.
+    """
+    if not isinstance(updates, list):
+        raise ValueError("'update' must be a list of sets")
+    try:
+        exercise_ids = exercise_catalog.ids_for({update['exercise name'] for update in updates
+                                                 if isinstance(update['exercise name'], str)})
+        parsed_updates = []
+        for update in updates:
+            exercise_name = update['exercise name']
+            if not isinstance(exercise_name, str):
+                raise ValueError(f"'exercise name' must be a string, not {exercise_name!r}")
+            if exercise_name not in exercise_ids:
+                raise ValueError(f"Exercise '{exercise_name}' not recognised")
+            if update.get('reps') is None and update.get('weight') is None:
+                raise ValueError(f"Either or both of 'reps' and 'weight' must be provided to update "
+                                 f"a set of '{exercise_name}'")
+            parsed_updates.append({'exercise name': exercise_name,
+                                   'exercise id': exercise_ids[exercise_name],
+                                   'set': int(update['set']),
+                                   'reps': int(update['reps']) if update.get('reps') is not None else None,
+                                   'weight': float(update['weight']) if update.get('weight') is not None else None})
+        return parsed_updates
+    except KeyError as exn:
+        current_app.logger.error(exn.args)
+        raise ValueError(f'Missing required parameter {exn} in the JSON body')
+
+
+def parse_exercise_names(exercise_names):
+    """Resolve the names of exercises to remove in a PATCH body, returning a dict mapping each id to its name"""
+    if not isinstance(exercise_names, list) or not all(isinstance(name, str) for name in exercise_names):
+        raise ValueError("'remove' must be a list of exercise names")
+    exercise_ids = exercise_catalog.ids_for(set(exercise_names))
+    for exercise_name in exercise_names:
+        if exercise_name not in exercise_ids:
+            raise ValueError(f"Exercise '{exercise_name}' not recognised")
+    return {exercise_ids[exercise_name]: exercise_name for exercise_name in exercise_names}
+
+
+def add_session_records(user, sessions):
+    """
+    Insert the gym records of newly inserted sessions, in the caller's transaction
+
+    sessions is a list of (session_id, date, exercises) triples, exercises as returned by
+    parse_exercises. All records are inserted with one bulk statement, in the configured layout, and the user's personal
+    records, change log and data version are updated to match. Returns a dict mapping each session id to
+    the personal records it beat, as reported by POST /api/sessions.
+    """
+    records = [{'session_id': session_id,
+                'exercise_id': exercise['exercise id'],
+                'reps': reps,
+                'weight': weight}
+               for session_id, _, exercises in sessions
+               for exercise in exercises
+               for reps, weight in zip(exercise['reps'], exercise['weights'])]
+    insert_sets(records)
+
+    beaten = update_personal_records(user.id, [(session_id, session_date,
+                                                [(exercise['exercise id'], reps, weight)
+                                                 for exercise in exercises
+                                                 for reps, weight in zip(exercise['reps'], exercise['weights'])])
+                                               for session_id, session_date, exercises in sessions])
+    log_created(user.id, [session_date for _, session_date, _ in sessions])
+    user.sessions_changed()
+
+    personal_records = {}
+    for session_id, _, exercises in sessions:
+        session_beaten = beaten.get(session_id, {})
+        exercise_names = dict((exercise['exercise id'], exercise['exercise name']) for exercise in exercises)
+        personal_records[session_id] = [dict(session_beaten[exercise_id], **{'exercise name': exercise_name})
+                                        for exercise_id, exercise_name in exercise_names.items()
+                                        if exercise_id in session_beaten]
+    return personal_records
+
+
+def delete_sessions(user, date_from=None, date_to=None):
+    """
+    Delete a user's sessions from and to the given dates inclusive, live and archived, in the caller's transaction
+
+    A set-based DELETE statement is issued for each table however many sessions are selected; the
+    ON DELETE CASCADE on the session_id of the sets backs up those of the sets. The deletions are
+    logged, the personal records the sessions held rebuilt, and the user's data version bumped.
+    Returns the number of sessions deleted.
+    """
+    criteria = {}
+    for model in (Session, ArchivedSession):
+        criteria[model] = [model.user_id == user.id]
+        if date_from is not None:
+            criteria[model].append(model.date >= date_from)
+        if date_to is not None:
+            criteria[model].append(model.date <= date_to)
+    session_ids = select([Session.session_id]).where(db.and_(*criteria[Session]))
+    archived_ids = select([ArchivedSession.session_id]).where(db.and_(*criteria[ArchivedSession]))
+    held_records = records_held_by(user.id, session_ids.union(archived_ids))
+    log_deleted(user.id, select([Session.date]).where(db.and_(*criteria[Session])).union_all(
+                         select([ArchivedSession.date]).where(db.and_(*criteria[ArchivedSession]))))
+    delete_sets(session_ids)
+    deleted = sum(db.session.execute(model.__table__.delete().where(db.and_(*model_criteria))).rowcount
+                  for model, model_criteria in criteria.items())
+    if deleted:
+        rebuild_personal_records(user.id, held_records)
+        user.sessions_changed()
+    return deleted
+
 
 class Sessions(Resource):
 
     @token_auth.login_required
-    @marshal_with(fields={'session': {'date': fields.DateTime(dt_format='rfc822'),
-                                      'username': fields.String(),
-                                      'exercises': fields.List(fields.String()),
-                                      'reps': fields.List(fields.List(fields.Integer())),
-                                      'weights': fields.List(fields.List(fields.Integer()))}})
+    @conditional(lambda resource, session_date=None: (g.current_user.id, g.current_user.data_version))
+    @replica_read
     def get(self, session_date=None):
-        if session_date is None:
-            sessions = db.session \
-                         .query(Session) \
-                         .filter_by(user_id = g.current_user.id) \
-                         .order_by(Session.date) \
-                         .all()
-        else:
+        # validate query string
+        parser = reqparse.RequestParser()
+        parser.add_argument('format', choices=('objects', 'columnar'), default='objects', location='args')
+
+        sessions = db.session \
+                     .query(Session) \
+                     .filter_by(user_id = g.current_user.id)
+        if session_date is not None:
+            args = parser.parse_args()
             try:
-                date = datetime.strptime(session_date, '%Y-%m-%d')
-                sessions = db.session \
-                             .query(Session) \
-                             .filter_by(date = date) \
-                             .filter_by(user_id = g.current_user.id) \
-                             .all()
+                session_day = datetime.strptime(session_date, '%Y-%m-%d')
             except ValueError as exn:
                 current_app.logger.error(exn.args)
                 abort(400, f"Bad date parameter provided '{session_date}' - could not be parsed in format 'YYYY-MM-DD'")
-        return [ResponseObject(session) for session in sessions]
+            response = ResponseObject.from_query(sessions.filter_by(date = session_day), g.current_user.username) \
+                       or ResponseObject.from_archive(archived_query(g.current_user.id, session_day, session_day).all(),
+                                                      g.current_user.username)
+            return self.represent(response, args['format']), 200
+
+        # sessions are paged by date, which is unique for each user
+        parser.add_argument('from', dest='date_from', type=date, location='args')
+        parser.add_argument('to', dest='date_to', type=date, location='args')
+        parser.add_argument('limit', type=int_range(1, MAX_PAGE_SIZE), location='args')
+        parser.add_argument('cursor', type=decode_cursor, location='args')
+        args = parser.parse_args(strict=True)
+
+        # archived sessions are selected alike, and merged with the live sessions by date
+        archived = archived_query(g.current_user.id, args['date_from'], args['date_to'])
+        if args['date_from'] is not None:
+            sessions = sessions.filter(Session.date >= args['date_from'])
+        if args['date_to'] is not None:
+            sessions = sessions.filter(Session.date <= args['date_to'])
+        if args['cursor'] is not None:
+            sessions = sessions.filter(Session.date > args['cursor'])
+            archived = archived.filter(ArchivedSession.date > args['cursor'])
+        sessions = sessions.order_by(Session.date)
+        if args['limit'] is not None:
+            sessions = sessions.limit(args['limit'])
+            archived = archived.limit(args['limit'])
+
+        response = ResponseObject.from_query(sessions, g.current_user.username)
+        archived = archived.all()
+        if archived:
+            response = list(islice(merge(response, ResponseObject.from_archive(archived, g.current_user.username),
+                                         key=lambda session: session.date),
+                                   args['limit']))
+        headers = {}
+        if args['limit'] is not None and len(response) == args['limit']:
+            headers['X-Next-Cursor'] = encode_cursor(response[-1].date)
+        return self.represent(response, args['format']), 200, headers
+
+    def represent(self, response, output_format):
+        """
+        Marshal ResponseObjects in the requested format
+
+        'objects' is a list of {'session': {...}} objects. 'columnar' is a single object of parallel
+        arrays: session i has the exercises indexed by 'exercises'[k] into the 'exercise names'
+        table for 'exercise offsets'[i] <= k < 'exercise offsets'[i + 1], and exercise k has
+        the sets 'reps'[j] and 'weights'[j] for 'set offsets'[k] <= j < 'set offsets'[k + 1].
+        """
+        if output_format == 'objects':
+            return marshal(response, SESSION_FIELDS)
+
+        exercise_names, exercise_index = [], {}
+        columns = {'username': g.current_user.username,
+                   'dates': [], 'exercise names': exercise_names, 'exercise offsets': [0],
+                   'exercises': [], 'set offsets': [0], 'reps': [], 'weights': []}
+        for session in response:
+            columns['dates'].append(session.date.strftime('%Y-%m-%d'))
+            for exercise_name, reps, weights in zip(session.exercises, session.reps, session.weights):
+                if exercise_name not in exercise_index:
+                    exercise_index[exercise_name] = len(exercise_names)
+                    exercise_names.append(exercise_name)
+                columns['exercises'].append(exercise_index[exercise_name])
+                columns['reps'].extend(reps)
+                columns['weights'].extend(int(weight) for weight in weights)
+                columns['set offsets'].append(len(columns['reps']))
+            columns['exercise offsets'].append(len(columns['exercises']))
+        return columns
 
     @token_auth.login_required
     def post(self):
@@ -48,80 +283,169 @@ class Sessions(Resource):
         parser.add_argument('exercises', type=self.parse_exercises, required=True, case_sensitive=False, location='json')
         data = parser.parse_args(strict=True)
 
-        # create a gym session object
+        # create the gym session and all of its gym records in a single transaction
+        if archived_query(g.current_user.id, data['date'], data['date']).first() is not None:
+            return {'message': 'error: sessions must be unique across dates for each user'}, 409
         gym_session = Session(date=data['date'], user_id=g.current_user.id)
         try:
             db.session.add(gym_session)
-            db.session.commit()
+            db.session.flush()
         except IntegrityError as exn:
             current_app.logger.error(exn.args)
             db.session.rollback()
             return {'message': 'error: sessions must be unique across dates for each user'}, 409
 
-        # create gym record objects and link the to the session
         try:
-            for exercise in data['exercises']:
-                exercise_id = db.session \
-                                .query(Exercise.exercise_id) \
-                                .filter_by(exercise_name = exercise['exercise name']) \
-                                .scalar()
-                for reps, weight in zip(exercise['reps'], exercise['weights']):
-                    record = GymRecord(session_id=gym_session.session_id,
-                                       exercise_id=exercise_id,
-                                       reps=reps,
-                                       weight=weight)
-                    db.session.add(record)
-                    db.session.commit()
-            return {'Message': 'Record successfully created'}, 201
+            personal_records = add_session_records(g.current_user, [(gym_session.session_id, gym_session.date,
+                                                                     data['exercises'])])
+            db.session.commit()
+            return {'Message': 'Record successfully created',
+                    'personal records': personal_records[gym_session.session_id]}, 201
         except Exception as exn:
             current_app.logger.error(exn.args)
+            db.session.rollback()
             abort(500)
 
     def parse_exercises(self, exercises):
+        return parse_exercises(exercises)
+
+    @token_auth.login_required
+    def patch(self, session_date=None):
+        """
+        Apply a diff to the sets of one session, as PATCH /api/sessions/<date>
+
+        The JSON body has any of 'remove', a list of the names of exercises whose sets are removed;
+        'update', a list of sets to change, as parsed by parse_set_updates; and 'add', a list of
+        exercises whose sets are appended, as in POST /api/sessions. They are applied in that
+        order, in one transaction writing only the rows of the sets changed.
+        """
+        if session_date is None:
+            abort(405)
         try:
-            for exercise in exercises:
-                exercise_name = exercise['exercise name']
-                exercise_id = db.session \
-                                .query(Exercise.exercise_id) \
-                                .filter_by(exercise_name = exercise['exercise name']) \
-                                .scalar()
-                if exercise_id is None:
-                    raise ValueError(f"Exercise '{exercise_name}' not recognised - please add as an exercise")
-                reps = list(map(int, exercise['reps']))
-                weights = list(map(int, exercise['weights']))
-                if len(reps) != len(weights):
-                    raise ValueError(f"Mismatch between 'reps' ({reps}) and 'weights' ({weights})")
-            return exercises
-        except KeyError as exn:
+            date = datetime.strptime(session_date, '%Y-%m-%d')
+        except ValueError as exn:
+            current_app.logger.error(exn.args)
+            abort(400, f"Bad date parameter provided '{session_date}' - could not be parsed in format 'YYYY-MM-DD'")
+
+        parser = reqparse.RequestParser()
+        parser.add_argument('remove', type=parse_exercise_names, default={}, location='json')
+        parser.add_argument('update', type=parse_set_updates, default=[], location='json')
+        parser.add_argument('add', type=self.parse_exercises, default=[], location='json')
+        data = parser.parse_args(strict=True)
+        if not (data['remove'] or data['update'] or data['add']):
+            abort(400, "One or more of 'remove', 'update' and 'add' must be provided to update a session")
+
+        user = g.current_user
+        description = f"user '{user.username}' on '{date.date()}'"
+        gym_session = Session.query.filter_by(user_id = user.id, date = date).first()
+        archived = None
+        if gym_session is None:
+            archived = archived_query(user.id, date, date).first()
+            if archived is None:
+                abort(400, f"Session for {description} not found")
+        session_id = gym_session.session_id if gym_session is not None else archived.session_id
+
+        remove = data['remove']
+        add = [(exercise['exercise id'], reps, weight) for exercise in data['add']
+                                                       for reps, weight in zip(exercise['reps'], exercise['weights'])]
+        exercise_ids = set(remove) | {update['exercise id'] for update in data['update']} | \
+                       {exercise_id for exercise_id, _, _ in add}
+        if gym_session is not None:
+            sets = session_sets(session_id, exercise_ids)
+        else:
+            sets = {}
+            for exercise_id, reps, weight in archived.records():
+                if exercise_id in exercise_ids:
+                    sets.setdefault(exercise_id, []).append((None, reps, weight))
+
+        for exercise_id, exercise_name in remove.items():
+            if exercise_id not in sets:
+                abort(400, f"Exercise '{exercise_name}' not in session for {description}")
+        update = {}
+        for set_update in data['update']:
+            exercise_sets = [] if set_update['exercise id'] in remove else sets.get(set_update['exercise id'], [])
+            if not 0 <= set_update['set'] < len(exercise_sets):
+                abort(400, f"Set {set_update['set']} of exercise '{set_update['exercise name']}' not in session "
+                           f"for {description}")
+            _, reps, weight = exercise_sets[set_update['set']]
+            update[(set_update['exercise id'], set_update['set'])] = \
+                (set_update['reps'] if set_update['reps'] is not None else reps,
+                 set_update['weight'] if set_update['weight'] is not None else weight)
+
+        try:
+            if gym_session is not None:
+                patch_sets(session_id, sets, remove, update, add)
+            else:
+                patch_archived(archived, remove, update, add)
+
+            # sets only appended to the latest session of each exercise are folded into the personal
+            # records, as on POST; otherwise the records of the exercises changed are rebuilt
+            beaten = {}
+            if not remove and not update and not PersonalRecord.query \
+                                                              .filter_by(user_id = user.id) \
+                                                              .filter(PersonalRecord.exercise_id.in_(exercise_ids)) \
+                                                              .filter(PersonalRecord.last_performed > date) \
+                                                              .first():
+                beaten = update_personal_records(user.id, [(session_id, date, add)]).get(session_id, {})
+            else:
+                rebuild_personal_records(user.id, exercise_ids)
+            log_created(user.id, [date])
+            user.sessions_changed()
+            db.session.commit()
+        except Exception as exn:
             current_app.logger.error(exn.args)
-            raise ValueError(f'Missing required parameter {exn} in the JSON body')
+            db.session.rollback()
+            abort(500)
+
+        exercise_names = dict((exercise['exercise id'], exercise['exercise name']) for exercise in data['add'])
+        return {'Message': 'Session successfully updated',
+                'personal records': [dict(beaten[exercise_id], **{'exercise name': exercise_name})
+                                     for exercise_id, exercise_name in exercise_names.items()
+                                     if exercise_id in beaten]}, 200
 
     @token_auth.login_required
-    def delete(self, session_date):
+    def delete(self, session_date=None):
+        if session_date is None:
+            return self.delete_range()
+
         try:
             date = datetime.strptime(session_date, '%Y-%m-%d')
-            session = db.session \
-                        .query(Session) \
-                        .filter_by(date = date) \
-                        .filter_by(user_id = g.current_user.id) \
-                        .one_or_none()
-            if session:
-                try:
-                    records = GymRecord.query \
-                                       .filter_by(session_id = session.session_id) \
-                                       .all()
-                    for record in records:
-                        db.session.delete(record)
-                    db.session.commit()
-                    db.session.delete(session)
-                    db.session.commit()
-                    return f"Session for user '{g.current_user.username}' on '{date.date()}' deleted", 201
-                except IntegrityError as exn:
-                    current_app.logger.error(exn.args)
-                    db.session.rollback()
-                    abort(400, f"Session for user '{g.current_user.username}' on '{date.date()}' failed to delete")
-            else:
-                abort(400, f"Session for user '{g.current_user.username}' on '{date.date()}' not found")
         except ValueError as exn:
             current_app.logger.error(exn.args)
             abort(400, f"Bad date parameter provided '{session_date}' - could not be parsed in format 'YYYY-MM-DD'")
+
+        try:
+            deleted = delete_sessions(g.current_user, date, date)
+            if not deleted:
+                db.session.rollback()
+                abort(400, f"Session for user '{g.current_user.username}' on '{date.date()}' not found")
+            db.session.commit()
+            return f"Session for user '{g.current_user.username}' on '{date.date()}' deleted", 201
+        except IntegrityError as exn:
+            current_app.logger.error(exn.args)
+            db.session.rollback()
+            abort(400, f"Session for user '{g.current_user.username}' on '{date.date()}' failed to delete")
+
+    def delete_range(self):
+        """Delete every session from and to the given dates inclusive, as DELETE /api/sessions?from=...&to=..."""
+        parser = reqparse.RequestParser()
+        parser.add_argument('from', dest='date_from', type=date, location='args')
+        parser.add_argument('to', dest='date_to', type=date, location='args')
+        args = parser.parse_args(strict=True)
+        if args['date_from'] is None and args['date_to'] is None:
+            abort(400, "Either or both of 'from' and 'to' must be provided to delete a range of sessions")
+
+        date_range = ' '.join(f"{bound} '{args[key].date()}'" for bound, key in (('from', 'date_from'), ('to', 'date_to'))
+                              if args[key] is not None)
+
+        try:
+            deleted = delete_sessions(g.current_user, args['date_from'], args['date_to'])
+            if not deleted:
+                db.session.rollback()
+                abort(400, f"No sessions for user '{g.current_user.username}' found {date_range}")
+            db.session.commit()
+            return f"{deleted} sessions for user '{g.current_user.username}' {date_range} deleted", 201
+        except IntegrityError as exn:
+            current_app.logger.error(exn.args)
+            db.session.rollback()
+            abort(400, f"Sessions for user '{g.current_user.username}' {date_range} failed to delete")
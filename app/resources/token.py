@@ -1,4 +1,4 @@
-from flask import request
+from flask import current_app, request
 from flask_restful import Resource
 
 from app import db
@@ -10,6 +10,7 @@ class Token(Resource):
     @http_auth.login_required
     def get(self):
         user = User.query.filter(User.username == request.authorization.username).first()
+        current_app.extensions['token_cache'].pop(user.access_token)
         user.set_token()
         db.session.commit()
         return {'token': user.access_token}
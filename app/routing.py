@@ -0,0 +1,31 @@
+from flask import g, has_app_context
+from flask_sqlalchemy import get_state, SignallingSession, SQLAlchemy
+from sqlalchemy import orm
+
+REPLICA_BIND = 'replica'
+
+class RoutingSession(SignallingSession):
+    """
+    Session sending the queries of read-only resource methods to a read replica
+
+    Queries go to the replica bind while g.read_replica is set, as it is by the replica_read
+    decorator, and to the primary otherwise; flushes always go to the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None):
+        if has_app_context() and g.get('read_replica') and not self._flushing:
+            return get_state(self.app).db.get_engine(self.app, bind=REPLICA_BIND)
+        return super().get_bind(mapper, clause)
+
+
+class RoutingSQLAlchemy(SQLAlchemy):
+
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+
+def add_replica_bind(app):
+    """Add a bind for the replica named by SQLALCHEMY_REPLICA_URI, if any, to an application's config"""
+    replica_uri = app.config.get('SQLALCHEMY_REPLICA_URI')
+    if replica_uri:
+        app.config['SQLALCHEMY_BINDS'] = dict(app.config.get('SQLALCHEMY_BINDS') or {}, **{REPLICA_BIND: replica_uri})
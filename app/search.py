@@ -0,0 +1,99 @@
+from collections import Counter
+from threading import Lock
+
+SIMILARITY_THRESHOLD = 0.3
+
+def normalise(text):
+    """Lower case text and collapse its whitespace, as names and queries are compared"""
+    return ' '.join(text.lower().split())
+
+
+def trigrams(text):
+    """The trigrams of normalised text, padded so that the starts and ends of words count"""
+    padded = '  ' + text.replace(' ', '  ') + ' '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class _TrieNode():
+    __slots__ = ('children', 'names')
+
+    def __init__(self):
+        self.children = {}
+        self.names = set()
+
+
+class ExerciseIndex():
+    """
+    In-memory search index of exercise names
+
+    A trie holds every word-aligned suffix of each name, so a query matches names it is a
+    prefix of, or that have a word it is a prefix of, e.g. 'curl' matches 'Seated Dumbbell
+    Curl'. Each trie node keeps the names below it, so a prefix is answered by walking its
+    characters. An inverted index of trigrams ranks names by similarity to the query, to
+    suggest names despite typos. Names are only ever added, one at a time or in bulk.
+    """
+
+    def __init__(self, names=()):
+        self._lock = Lock()
+        self._root = _TrieNode()
+        self._trigrams = {}
+        self._trigram_counts = {}
+        self.add(names)
+
+    def __len__(self):
+        return len(self._trigram_counts)
+
+    def add(self, names):
+        """Index any of the names not already indexed"""
+        with self._lock:
+            for name in names:
+                if name in self._trigram_counts:
+                    continue
+                key = normalise(name)
+                words = key.split(' ')
+                for i in range(len(words)):
+                    node = self._root
+                    for char in ' '.join(words[i:]):
+                        node = node.children.setdefault(char, _TrieNode())
+                        node.names.add(name)
+                name_trigrams = trigrams(key)
+                for trigram in name_trigrams:
+                    self._trigrams.setdefault(trigram, set()).add(name)
+                self._trigram_counts[name] = len(name_trigrams)
+
+    def search(self, query, limit=10):
+        """
+        Return up to limit names matching query, best first
+
+        Names the query is a prefix of come first, then names with a word it is a prefix of,
+        each alphabetically. Only if there are none are names ranked by trigram similarity.
+        """
+        key = normalise(query)
+        if not key:
+            return []
+        with self._lock:
+            node = self._root
+            for char in key:
+                node = node.children.get(char)
+                if node is None:
+                    break
+            if node is not None:
+                return sorted(node.names, key=lambda name: (not normalise(name).startswith(key), name))[:limit]
+            return self._similar(key)[:limit]
+
+    def suggest(self, name):
+        """Return the indexed name most similar to name, or None if none is similar enough"""
+        if not isinstance(name, str):
+            return None
+        with self._lock:
+            similar = self._similar(normalise(name))
+        return similar[0] if similar else None
+
+    def _similar(self, key):
+        # the Jaccard similarity of trigram sets, counting shared trigrams through the inverted index
+        key_trigrams = trigrams(key)
+        shared = Counter(name for trigram in key_trigrams for name in self._trigrams.get(trigram, ()))
+        scores = ((shared_count / (len(key_trigrams) + self._trigram_counts[name] - shared_count), name)
+                  for name, shared_count in shared.items())
+        return [name for score, name in sorted(scores, key=lambda s: (-s[0], s[1]))
+                if score >= SIMILARITY_THRESHOLD]
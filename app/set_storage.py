@@ -0,0 +1,201 @@
+"""
+The two layouts in which the sets of gym sessions can be stored
+
+'rows' stores each set as a row of gym_records. 'packed' stores all the sets of an exercise in a
+session as one row of exercise_sets, the reps and weights packed into little-endian arrays, which
+saves the per-row overhead and index entries of every set. SET_STORAGE chooses the layout; both
+tables are always present, and the convert-sets command moves existing data between them.
+
+Readers select the session_id, exercise_id, record_id, reps and weight columns of set_model(),
+which both models share, and pass the rows through expand_sets so that they get one row per set
+whichever the layout.
+"""
+import struct
+
+from flask import current_app
+from sqlalchemy import bindparam
+
+from app import db
+from app.models.exercise_sets import ExerciseSets
+from app.models.gym_record import GymRecord
+
+LAYOUTS = ('rows', 'packed')
+
+def packed():
+    return current_app.config.get('SET_STORAGE', 'rows') == 'packed'
+
+
+def set_model(layout=None):
+    """Return the model storing sets in the given layout, by default the configured one"""
+    if layout is None:
+        return ExerciseSets if packed() else GymRecord
+    return ExerciseSets if layout == 'packed' else GymRecord
+
+
+def pack(reps, weights):
+    """Pack lists of reps and weights into the reps and weights columns of exercise_sets"""
+    return struct.pack(f'<{len(reps)}i', *reps), struct.pack(f'<{len(weights)}d', *weights)
+
+
+def unpack(reps, weights):
+    """Return the (reps, weight) of each set packed into the reps and weights columns of exercise_sets"""
+    return zip(struct.unpack(f'<{len(reps) // 4}i', reps), struct.unpack(f'<{len(weights) // 8}d', weights))
+
+
+def expand_sets(rows, layout=None):
+    """
+    Expand query rows whose last two columns are reps and weight into one row per set
+
+    Rows of gym_records already have one row per set and are passed through. A row whose reps
+    are None, as from an outer join, is passed through too.
+    """
+    if set_model(layout) is GymRecord:
+        yield from rows
+        return
+    for row in rows:
+        *key, reps, weights = row
+        if reps is None:
+            yield row
+            continue
+        for set_reps, set_weight in unpack(reps, weights):
+            yield (*key, set_reps, set_weight)
+
+
+def pack_records(records):
+    """
+    Group a list of gym_records row dicts by session and exercise into exercise_sets row dicts
+
+    Groups keep the order in which their first set appears, and sets their order within groups.
+    """
+    groups = {}
+    for record in records:
+        group = groups.setdefault((record['session_id'], record['exercise_id']), ([], []))
+        group[0].append(record['reps'])
+        group[1].append(record['weight'])
+    packed_records = []
+    for (session_id, exercise_id), (reps, weights) in groups.items():
+        packed_reps, packed_weights = pack(reps, weights)
+        packed_records.append({'session_id': session_id, 'exercise_id': exercise_id,
+                               'reps': packed_reps, 'weights': packed_weights})
+    return packed_records
+
+
+def insert_sets(records, layout=None):
+    """Insert the sets of new sessions, given as gym_records row dicts, by default in the configured layout"""
+    if not records:
+        return
+    if set_model(layout) is ExerciseSets:
+        db.session.execute(ExerciseSets.__table__.insert(), pack_records(records))
+    else:
+        db.session.execute(GymRecord.__table__.insert(), records)
+
+
+def session_sets(session_id, exercise_ids, layout=None):
+    """
+    Return the sets of the given exercises in a session, by default in the configured layout
+
+    Returns a dict mapping the id of each exercise performed to a list of its sets, in order, as
+    (record_id, reps, weight). In the packed layout, sets have the record_id of the row packing them.
+    """
+    if not exercise_ids:
+        return {}
+    Sets = set_model(layout)
+    rows = db.session \
+             .query(Sets.exercise_id, Sets.record_id, Sets.reps, Sets.weight) \
+             .filter(Sets.session_id == session_id) \
+             .filter(Sets.exercise_id.in_(exercise_ids)) \
+             .order_by(Sets.record_id)
+    sets = {}
+    for exercise_id, record_id, reps, weight in expand_sets(rows, layout):
+        sets.setdefault(exercise_id, []).append((record_id, reps, weight))
+    return sets
+
+
+def patch_sets(session_id, sets, remove=(), update=None, add=(), layout=None):
+    """
+    Apply a diff to the sets of one session, in the caller's transaction
+
+    sets are the session's sets as returned by session_sets, for at least every exercise named by
+    the diff. remove is a collection of ids of exercises whose sets are deleted, update maps the
+    (exercise_id, index) of a set within its exercise to its new (reps, weight), and add is a list
+    of (exercise_id, reps, weight) appended to the session. Only the rows of the sets changed are
+    written, or in the packed layout those of the exercises changed.
+    """
+    update = update or {}
+    sets = {exercise_id: rows for exercise_id, rows in sets.items() if exercise_id not in remove}
+    if remove:
+        model = set_model(layout)
+        db.session.execute(model.__table__
+                                .delete()
+                                .where(model.session_id == session_id)
+                                .where(model.exercise_id.in_(remove)))
+
+    if set_model(layout) is GymRecord:
+        if update:
+            table = GymRecord.__table__
+            db.session.execute(table.update()
+                                    .where(table.c.record_id == bindparam('b_record_id'))
+                                    .values(reps=bindparam('b_reps'), weight=bindparam('b_weight')),
+                               [{'b_record_id': sets[exercise_id][index][0], 'b_reps': reps, 'b_weight': weight}
+                                for (exercise_id, index), (reps, weight) in update.items()])
+        insert_sets([{'session_id': session_id, 'exercise_id': exercise_id, 'reps': reps, 'weight': weight}
+                     for exercise_id, reps, weight in add], layout)
+        return
+
+    # each exercise changed has its row repacked, or inserted if it was not performed before
+    exercise_sets = {exercise_id: [(reps, weight) for _, reps, weight in rows] for exercise_id, rows in sets.items()}
+    for (exercise_id, index), changed in update.items():
+        exercise_sets[exercise_id][index] = changed
+    for exercise_id, reps, weight in add:
+        exercise_sets.setdefault(exercise_id, []).append((reps, weight))
+    changed = {exercise_id for exercise_id, _ in update} | {exercise_id for exercise_id, _, _ in add}
+    repacked = [(exercise_id, pack(*zip(*exercise_sets[exercise_id]))) for exercise_id in sorted(changed)]
+
+    table = ExerciseSets.__table__
+    updated = [{'b_record_id': sets[exercise_id][0][0], 'b_reps': reps, 'b_weights': weights}
+               for exercise_id, (reps, weights) in repacked if exercise_id in sets]
+    if updated:
+        db.session.execute(table.update()
+                                .where(table.c.record_id == bindparam('b_record_id'))
+                                .values(reps=bindparam('b_reps'), weights=bindparam('b_weights')),
+                           updated)
+    inserted = [{'session_id': session_id, 'exercise_id': exercise_id, 'reps': reps, 'weights': weights}
+                for exercise_id, (reps, weights) in repacked if exercise_id not in sets]
+    if inserted:
+        db.session.execute(table.insert(), inserted)
+
+
+def delete_sets(session_ids):
+    """Delete every set of the given sessions, a list or select of their ids, from both layouts"""
+    for model in (GymRecord, ExerciseSets):
+        db.session.execute(model.__table__.delete().where(model.session_id.in_(session_ids)))
+
+
+def convert_sets(layout, batch_size=10000):
+    """
+    Move every set stored in the other layout into the given one, in the caller's transaction
+
+    Sessions are converted a batch at a time, so memory use is bounded by batch_size sessions.
+    Returns the number of sets moved.
+    """
+    source_layout = 'rows' if layout == 'packed' else 'packed'
+    source = set_model(source_layout)
+    moved = 0
+    while True:
+        session_ids = [session_id for session_id, in db.session
+                                                       .query(source.session_id)
+                                                       .distinct()
+                                                       .order_by(source.session_id)
+                                                       .limit(batch_size)]
+        if not session_ids:
+            return moved
+        rows = db.session \
+                 .query(source.session_id, source.exercise_id, source.reps, source.weight) \
+                 .filter(source.session_id.in_(session_ids)) \
+                 .order_by(source.record_id) \
+                 .all()
+        records = [{'session_id': session_id, 'exercise_id': exercise_id, 'reps': reps, 'weight': weight}
+                   for session_id, exercise_id, reps, weight in expand_sets(rows, source_layout)]
+        insert_sets(records, layout)
+        db.session.execute(source.__table__.delete().where(source.session_id.in_(session_ids)))
+        moved += len(records)
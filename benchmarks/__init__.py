@@ -0,0 +1,58 @@
+from base64 import b64encode
+from contextlib import contextmanager
+import time
+
+from sqlalchemy import event
+
+from app import db
+from app.models.exercise import Exercise
+
+class StatementCounter():
+    """Count the SQL statements issued against an engine while active"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._before_cursor_execute)
+        return self
+
+    def __exit__(self, *exc_info):
+        event.remove(self.engine, 'before_cursor_execute', self._before_cursor_execute)
+
+
+@contextmanager
+def timer(timings):
+    """Append the elapsed wall-clock time of the block, in milliseconds, to timings"""
+    start = time.perf_counter()
+    yield
+    timings.append((time.perf_counter() - start) * 1000)
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list of values"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def register_user(test_client, username='bench', password='pass'):
+    """Register a user and return the headers needed to authenticate as them"""
+    test_client.post('/api/register', json={'username': username, 'password': password})
+    credentials = b64encode(f'{username}:{password}'.encode())
+    token = test_client.get('/api/token', headers={'Authorization': b'Basic ' + credentials}) \
+                       .json.get('token')
+    return {'Authorization': 'Bearer ' + token}
+
+
+def add_exercises(count):
+    """Add exercises named 'exercise0'...'exercise{count - 1}' and return their names"""
+    names = [f'exercise{i}' for i in range(count)]
+    for name in names:
+        db.session.add(Exercise(exercise_name=name))
+    db.session.commit()
+    return names
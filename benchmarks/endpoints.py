@@ -0,0 +1,174 @@
+"""
+Benchmark the main endpoints against databases of increasing size and write a JSON report
+
+    python -m benchmarks.endpoints --sizes 10,100,1000 --output benchmark-report.json
+
+For each size a fresh database is seeded with the synthetic dataset generator, that many sessions
+per user, and every endpoint is driven through the test client. Latency percentiles and SQL
+statements per request are measured over --repeats requests, and peak Python memory per request
+over a separate, shorter pass under tracemalloc so that tracing does not skew the latencies.
+Endpoints whose statements per request grow with the dataset are listed in the report, as that
+is how an N+1 query shows up; a latency curve growing with the dataset points to a full scan.
+"""
+import argparse
+from base64 import b64encode
+from datetime import date, timedelta
+import json
+import platform
+from statistics import mean
+import tracemalloc
+
+from app import create_app, db
+from app.models.session import Session
+from app.models.user import User
+from benchmarks import percentile, StatementCounter, timer
+from python_helper_functions.synthetic_data import load
+from tests import TestConfig
+
+USERS = 5
+SETS_PER_SESSION = 20
+REPEATS = 50
+MEMORY_REPEATS = 5
+FIRST_POST_DATE = date(2030, 1, 1)
+
+
+class Client():
+    """Sends each benchmarked request as the first synthetic user, keeping their token current"""
+
+    def __init__(self, test_client, username):
+        self.test_client = test_client
+        self.basic = {'Authorization': b'Basic ' + b64encode(f'{username}:{username}'.encode())}
+        self.get_token()
+        self.user = User.query.filter_by(username=username).first()
+        self.session_dates = [session_date.date().isoformat() for session_date, in db.session
+                                                                                     .query(Session.date)
+                                                                                     .filter_by(user_id = self.user.id)]
+        self.posted = 0
+
+    def get_token(self, i=0):
+        response = self.test_client.get('/api/token', headers=self.basic)
+        self.bearer = {'Authorization': 'Bearer ' + response.json['token']}
+        return response
+
+    def get_exercises(self, i):
+        return self.test_client.get('/api/exercises', headers=self.bearer)
+
+    def post_exercises(self, i):
+        return self.test_client.post('/api/exercises', headers=self.bearer,
+                                     json={'exercises': [f'benchmark exercise {self.posted + i}']})
+
+    def get_sessions(self, i):
+        return self.test_client.get('/api/sessions', headers=self.bearer)
+
+    def get_session(self, i):
+        session_date = self.session_dates[i % len(self.session_dates)]
+        return self.test_client.get(f'/api/sessions/{session_date}', headers=self.bearer)
+
+    def post_session(self, i):
+        json = {'date': (FIRST_POST_DATE + timedelta(days=self.posted + i)).isoformat(),
+                'exercises': [{'exercise name': 'dumbbell bench press', 'reps': [8] * 4, 'weights': [60] * 4},
+                              {'exercise name': 'seated row', 'reps': [10] * 4, 'weights': [50] * 4}]}
+        return self.test_client.post('/api/sessions', headers=self.bearer, json=json)
+
+    def patch_session(self, i):
+        session_date = self.session_dates[i % len(self.session_dates)]
+        return self.test_client.patch(f'/api/sessions/{session_date}', headers=self.bearer,
+                                      json={'add': [{'exercise name': 'seated row', 'reps': [10], 'weights': [50]}]})
+
+    def delete_session(self, i):
+        session_date = (FIRST_POST_DATE + timedelta(days=self.posted + i)).isoformat()
+        return self.test_client.delete(f'/api/sessions/{session_date}', headers=self.bearer)
+
+
+# each POST is followed by the DELETE of the same sessions, so their dates are only advanced after both
+ENDPOINTS = [('GET /api/token', Client.get_token, 200),
+             ('GET /api/exercises', Client.get_exercises, 200),
+             ('POST /api/exercises', Client.post_exercises, 201),
+             ('GET /api/sessions', Client.get_sessions, 200),
+             ('GET /api/sessions/<date>', Client.get_session, 200),
+             ('POST /api/sessions', Client.post_session, 201),
+             ('PATCH /api/sessions/<date>', Client.patch_session, 200),
+             ('DELETE /api/sessions/<date>', Client.delete_session, 201)]
+
+
+def measure(client, engine, send, status, repeats):
+    timings, statements = [], []
+    for i in range(repeats):
+        with StatementCounter(engine) as counter, timer(timings):
+            response = send(client, i)
+        assert response.status_code == status, (response.status_code, response.get_data(as_text=True))
+        statements.append(counter.count)
+
+    peaks = []
+    for i in range(repeats, repeats + MEMORY_REPEATS):
+        # each request is traced afresh, as resetting the peak of a running trace needs Python 3.9
+        tracemalloc.start()
+        response = send(client, i)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        assert response.status_code == status, (response.status_code, response.get_data(as_text=True))
+
+    return {'requests': repeats,
+            'latency ms': {'mean': mean(timings),
+                           'p50': percentile(timings, 50),
+                           'p95': percentile(timings, 95),
+                           'p99': percentile(timings, 99),
+                           'max': max(timings)},
+            'statements': {'mean': mean(statements), 'max': max(statements)},
+            'peak memory kb': max(peaks) / 1024}
+
+
+def run(sizes, users=USERS, sets=SETS_PER_SESSION, repeats=REPEATS):
+    results = {}
+    for size in sizes:
+        app = create_app(TestConfig)
+        with app.app_context():
+            db.create_all()
+            load(db.engine, users, size, sets, log=lambda message: None)
+            client = Client(app.test_client(), 'user1')
+            engine = db.engine
+
+        # each request pushes an app context of its own, as in production, so that none of its
+        # queries is answered from the identity map of a context shared with earlier requests
+        results[size] = {}
+        for name, send, status in ENDPOINTS:
+            results[size][name] = measure(client, engine, send, status, repeats)
+            if send in (Client.post_exercises, Client.delete_session):
+                client.posted += repeats + MEMORY_REPEATS
+        with app.app_context():
+            db.drop_all()
+
+    names = [name for name, _, _ in ENDPOINTS]
+    return {'python': platform.python_version(),
+            'database': TestConfig.SQLALCHEMY_DATABASE_URI,
+            'users': users,
+            'sets per session': sets,
+            'sessions per user': sizes,
+            'results': {name: {str(size): results[size][name] for size in sizes} for name in names},
+            'statements scale with data': [name for name in names
+                                           if len({results[size][name]['statements']['max'] for size in sizes}) > 1]}
+
+
+def print_report(report):
+    print(f"{'endpoint':<28} {'sessions':>9} {'statements':>11} {'p50 ms':>8} {'p95 ms':>8} {'peak kb':>9}")
+    for name, by_size in report['results'].items():
+        for size, result in by_size.items():
+            print(f"{name:<28} {size:>9} {result['statements']['mean']:>11.1f} {result['latency ms']['p50']:>8.2f} "
+                  f"{result['latency ms']['p95']:>8.2f} {result['peak memory kb']:>9.1f}")
+    if report['statements scale with data']:
+        print('statements per request grow with the dataset for: ' + ', '.join(report['statements scale with data']))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default='10,100,1000', help='comma separated sessions per user')
+    parser.add_argument('--users', type=int, default=USERS)
+    parser.add_argument('--sets', type=int, default=SETS_PER_SESSION, help='sets per session')
+    parser.add_argument('--repeats', type=int, default=REPEATS)
+    parser.add_argument('--output', default='benchmark-report.json')
+    args = parser.parse_args()
+
+    report = run([int(size) for size in args.sizes.split(',')], args.users, args.sets, args.repeats)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print_report(report)
@@ -0,0 +1,49 @@
+"""
+Benchmark statements and latency per POST /api/sessions as the number of sets grows
+
+    python -m benchmarks.post_session
+"""
+from datetime import date, timedelta
+from statistics import mean
+
+from app import create_app, db
+from benchmarks import add_exercises, percentile, register_user, StatementCounter, timer
+from tests import TestConfig
+
+EXERCISES_PER_SESSION = 6
+SETS_PER_EXERCISE = (1, 5, 10, 25, 50)
+REPEATS = 50
+
+def build_session(session_date, exercise_names, sets_per_exercise):
+    return {'date': session_date.isoformat(),
+            'exercises': [{'exercise name': name,
+                           'reps': [8] * sets_per_exercise,
+                           'weights': [100] * sets_per_exercise}
+                          for name in exercise_names]}
+
+
+def run():
+    print(f"{'sets':>6} {'statements':>11} {'mean ms':>9} {'p50 ms':>8} {'p95 ms':>8}")
+    for sets_per_exercise in SETS_PER_EXERCISE:
+        app = create_app(TestConfig)
+        with app.app_context():
+            db.create_all()
+            test_client = app.test_client()
+            headers = register_user(test_client)
+            exercise_names = add_exercises(EXERCISES_PER_SESSION)
+
+            timings, statements = [], []
+            for i in range(REPEATS):
+                json = build_session(date(2019, 1, 1) + timedelta(days=i), exercise_names, sets_per_exercise)
+                with StatementCounter(db.engine) as counter, timer(timings):
+                    response = test_client.post('/api/sessions', headers=headers, json=json)
+                assert response.status_code == 201, response.json
+                statements.append(counter.count)
+
+            print(f'{EXERCISES_PER_SESSION * sets_per_exercise:>6} {mean(statements):>11.1f} '
+                  f'{mean(timings):>9.2f} {percentile(timings, 50):>8.2f} {percentile(timings, 95):>8.2f}')
+            db.drop_all()
+
+
+if __name__ == '__main__':
+    run()
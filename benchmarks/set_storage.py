@@ -0,0 +1,70 @@
+"""
+Compare the size and read latency of the 'rows' and 'packed' set storage layouts
+
+    python -m benchmarks.set_storage --users 20 --sessions 200 --sets 20
+
+The same synthetic dataset is loaded into a SQLite file in each layout. Sizes are the bytes of
+the table holding the sets and its indexes, from SQLite's dbstat table.
+"""
+import argparse
+import os
+from statistics import mean
+import tempfile
+
+from app import create_app, db
+from benchmarks import percentile, timer
+from benchmarks.endpoints import Client
+from python_helper_functions.synthetic_data import load
+from tests import TestConfig
+
+REPEATS = 20
+TABLES = {'rows': 'gym_records', 'packed': 'exercise_sets'}
+
+def table_bytes(table):
+    """Bytes of a table and its indexes, as stored by SQLite"""
+    return db.session.execute('SELECT SUM(dbstat.pgsize) '
+                              '  FROM dbstat '
+                              '  JOIN sqlite_master ON dbstat.name = sqlite_master.name '
+                              ' WHERE sqlite_master.tbl_name = :table', {'table': table}).scalar()
+
+
+def run(users, sessions, sets, repeats=REPEATS):
+    print(f"{'layout':>7} {'table kb':>9} {'request':<28} {'mean ms':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    for layout, table in TABLES.items():
+        with tempfile.TemporaryDirectory() as directory:
+            config = type('SetStorageConfig', (TestConfig,), {
+                'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(directory, 'benchmark.db'),
+                'SET_STORAGE': layout})
+            app = create_app(config)
+            with app.app_context():
+                db.create_all()
+                load(db.engine, users, sessions, sets, log=lambda message: None, layout=layout)
+                db.session.execute('VACUUM')
+                size = table_bytes(table) / 1024
+
+                client = Client(app.test_client(), 'user1')
+                requests = {'GET /api/sessions': Client.get_sessions,
+                            'GET /api/sessions/<date>': Client.get_session,
+                            'GET /api/sessions/export': lambda client, i: client.test_client.get(
+                                '/api/sessions/export', headers=client.bearer)}
+                for name, send in requests.items():
+                    timings = []
+                    for i in range(repeats):
+                        with timer(timings):
+                            response = send(client, i)
+                            response.get_data()
+                        assert response.status_code == 200, response.status_code
+                    print(f'{layout:>7} {size:>9.0f} {name:<28} {mean(timings):>8.2f} '
+                          f'{percentile(timings, 50):>8.2f} {percentile(timings, 95):>8.2f}')
+                db.session.remove()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--sessions', type=int, default=200, help='sessions per user')
+    parser.add_argument('--sets', type=int, default=20, help='sets per session')
+    parser.add_argument('--repeats', type=int, default=REPEATS)
+    args = parser.parse_args()
+
+    run(args.users, args.sessions, args.sets, args.repeats)
@@ -0,0 +1,26 @@
+"""
+Gunicorn configuration
+
+Shares a directory between the workers in which each writes its Prometheus metrics, so that
+/metrics aggregates them whichever worker serves the scrape. The directory is emptied when
+gunicorn starts, and the live gauges of a worker are discarded when it exits.
+"""
+import os
+import shutil
+import tempfile
+
+# prometheus_client chooses how to store values when first imported, so the directory must be in
+# the environment the workers inherit before anything imports it; older releases read the lower
+# case name
+multiproc_dir = os.environ.get('PROMETHEUS_MULTIPROC_DIR') \
+                or os.path.join(tempfile.gettempdir(), 'prometheus-multiproc')
+os.environ['PROMETHEUS_MULTIPROC_DIR'] = os.environ['prometheus_multiproc_dir'] = multiproc_dir
+
+def on_starting(server):
+    shutil.rmtree(multiproc_dir, ignore_errors=True)
+    os.makedirs(multiproc_dir)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
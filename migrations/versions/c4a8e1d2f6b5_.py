@@ -0,0 +1,42 @@
+"""index gym_records by session and by exercise
+
+Revision ID: c4a8e1d2f6b5
+Revises: b7e2d4f1a9c3
+Create Date: 2026-10-18 10:03:12.504611
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4a8e1d2f6b5'
+down_revision = 'b7e2d4f1a9c3'
+branch_labels = None
+depends_on = None
+
+INDEXES = {'ix_gym_records_session_id_exercise_id': ['session_id', 'exercise_id', 'reps', 'weight'],
+           'ix_gym_records_exercise_id_session_id': ['exercise_id', 'session_id', 'reps', 'weight']}
+
+
+def concurrently():
+    # on PostgreSQL build and drop the indexes without locking out writes to gym_records; as
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block, end the one Alembic began
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('COMMIT')
+        return True
+    return False
+
+
+def upgrade():
+    postgresql_concurrently = concurrently()
+    for index_name, columns in INDEXES.items():
+        op.create_index(index_name, 'gym_records', columns, unique=False,
+                        postgresql_concurrently=postgresql_concurrently)
+
+
+def downgrade():
+    postgresql_concurrently = concurrently()
+    for index_name in INDEXES:
+        op.drop_index(index_name, table_name='gym_records',
+                      postgresql_concurrently=postgresql_concurrently)
@@ -0,0 +1,38 @@
+"""cascade deletes of sessions to their gym_records
+
+Revision ID: f4b1e8c7a2d6
+Revises: e2a7c9d4b8f1
+Create Date: 2026-10-18 15:22:47.318904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4b1e8c7a2d6'
+down_revision = 'e2a7c9d4b8f1'
+branch_labels = None
+depends_on = None
+
+# the constraint was created unnamed, so it has whatever name the database gave it: PostgreSQL's
+# and MySQL's are read back by the inspector, while SQLite's has none and, as SQLite cannot alter
+# constraints, is named by this convention when batch mode recreates the table
+NAMING_CONVENTION = {'fk': 'fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s'}
+
+
+def replace_foreign_key(ondelete):
+    name = next(foreign_key['name'] for foreign_key in sa.inspect(op.get_bind()).get_foreign_keys('gym_records')
+                if foreign_key['referred_table'] == 'sessions') \
+           or 'fk_gym_records_session_id_sessions'
+    with op.batch_alter_table('gym_records', naming_convention=NAMING_CONVENTION) as batch_op:
+        batch_op.drop_constraint(name, type_='foreignkey')
+        batch_op.create_foreign_key(name, 'sessions', ['session_id'], ['session_id'], ondelete=ondelete)
+
+
+def upgrade():
+    replace_foreign_key(ondelete='CASCADE')
+
+
+def downgrade():
+    replace_foreign_key(ondelete=None)
@@ -0,0 +1,41 @@
+"""never reuse the ids of sessions, which archived sessions keep
+
+Revision ID: f8a2c6e4b9d1
+Revises: d2e7a4c8f5b1
+Create Date: 2026-10-19 09:41:26.518337
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f8a2c6e4b9d1'
+down_revision = 'd2e7a4c8f5b1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # SQLite hands out the largest rowid + 1, so the id of the last session archived was given to
+    # the next session added; only AUTOINCREMENT tables, created as such, never reuse ids
+    bind = op.get_bind()
+    archived = bind.execute(sa.text('SELECT MAX(session_id) FROM archived_sessions')).scalar()
+    if bind.dialect.name == 'sqlite':
+        with op.batch_alter_table('sessions', recreate='always', table_kwargs={'sqlite_autoincrement': True}):
+            pass
+        if archived is not None:
+            op.execute(sa.text("DELETE FROM sqlite_sequence WHERE name = 'sessions'"))
+            op.execute(sa.text("INSERT INTO sqlite_sequence (name, seq) "
+                               "SELECT 'sessions', MAX(session_id) FROM "
+                               "(SELECT session_id FROM sessions UNION ALL SELECT session_id FROM archived_sessions)"))
+    elif bind.dialect.name == 'mysql' and archived is not None:
+        # MySQL only moves the counter forward, so this leaves it alone if it is already past; before
+        # 8.0 the counter is reset to the largest live id on restart, so archiving requires 8.0
+        op.execute(f'ALTER TABLE sessions AUTO_INCREMENT = {archived + 1}')
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        with op.batch_alter_table('sessions', recreate='always'):
+            pass
@@ -3,6 +3,14 @@ import os
 from dotenv import load_dotenv
 import sqlalchemy
 
+AGGREGATED_DATA_QUERY = '''
+        SELECT users.username, sessions.date, exercises.exercise_name, gym_records.reps, gym_records.weight
+          FROM users
+          JOIN sessions ON users.id = sessions.user_id
+          JOIN gym_records ON sessions.session_id = gym_records.session_id
+          JOIN exercises ON gym_records.exercise_id = exercises.exercise_id
+         ORDER BY sessions.date, exercises.exercise_name'''
+
 if __name__ == '__main__':
     basedir = os.path.abspath(os.path.split(os.path.dirname(__file__))[0])
     load_dotenv(os.path.join(basedir, '.env'))
@@ -10,14 +18,7 @@ if __name__ == '__main__':
     engine = sqlalchemy.create_engine(SQLALCHEMY_DATABASE_URI)
     conn = engine.connect()
 
-    conn.execute('''
-        CREATE OR REPLACE VIEW aggregated_data AS
-        SELECT users.username, sessions.date, exercises.exercise_name, gym_records.reps, gym_records.weight
-          FROM users
-          JOIN sessions ON users.id = sessions.user_id
-          JOIN gym_records ON sessions.session_id = gym_records.session_id
-          JOIN exercises ON gym_records.exercise_id = exercises.exercise_id
-         ORDER BY sessions.date, exercises.exercise_name;''')
+    conn.execute(f'CREATE OR REPLACE VIEW aggregated_data AS {AGGREGATED_DATA_QUERY};')
 
     conn.execute('''
         CREATE OR REPLACE VIEW sessions_with_duplicate_id_date_combinations AS
@@ -10,6 +10,16 @@ from app.models.session import Session
 from app.models.user import User
 from config import Config
 
+EXERCISE_NAMES = ['bulgarian split squat',
+                  'cable flys',
+                  'dumbbell bench press',
+                  'dumbbell step up',
+                  'seated barbell press',
+                  'seated dumbbell curl',
+                  'seated row',
+                  'tricep pushdown',
+                  'underhand lat pulldown']
+
 class BaseHelper():
 
     def __init__(self):
@@ -34,16 +44,7 @@ class ExerciseHelper(BaseHelper):
 
     @classmethod
     def create_exercises(cls):
-        exercises = ['bulgarian split squat',
-                     'cable flys',
-                     'dumbbell bench press',
-                     'dumbbell step up',
-                     'seated barbell press',
-                     'seated dumbbell curl',
-                     'seated row',
-                     'tricep pushdown',
-                     'underhand lat pulldown']
-        for exercise in exercises:
+        for exercise in EXERCISE_NAMES:
             yield cls(exercise)
 
     @classmethod
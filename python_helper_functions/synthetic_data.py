@@ -0,0 +1,199 @@
+"""
+Generate a synthetic dataset of users x sessions x sets and bulk load it for load testing
+
+    python -m python_helper_functions.synthetic_data --users 1000 --sessions 200 --sets 20 --seed 0 [--layout packed]
+
+Rows are built in memory from a seeded random number generator, so the same parameters always
+produce the same data, and are loaded table by table in a single transaction: with COPY on
+PostgreSQL and executemany inserts elsewhere. Personal records are derived from the generated
+sets as they are built, so the personal_records and rep_records tables are consistent with the
+sets loaded, and the creation of each session is logged in session_changes. The sets are stored
+in gym_records, or packed into exercise_sets with --layout packed (see app/set_storage.py). Ids
+are allocated after the largest already in each table, so a dataset can be loaded alongside
+existing data.
+"""
+import argparse
+import csv
+import datetime
+import hashlib
+import io
+import random
+import time
+
+import sqlalchemy
+
+from app.models.exercise import Exercise
+from app.models.exercise_sets import ExerciseSets
+from app.models.gym_record import GymRecord
+from app.models.personal_record import fold_session, PersonalRecord, RepRecord
+from app.models.session import Session
+from app.models.session_change import SessionChange
+from app.models.user import User
+from app.set_storage import LAYOUTS, pack_records
+from python_helper_functions.helper import EXERCISE_NAMES
+
+FIRST_DATE = datetime.datetime(2018, 1, 1)
+SETS_PER_EXERCISE = 4
+# the password of each user is their username, salted with it too so that hashes are deterministic,
+# and hashed with a single iteration as a dataset of users would otherwise take minutes to hash
+PASSWORD_METHOD = 'pbkdf2:sha256:1'
+
+TABLES = [Exercise.__table__,
+          User.__table__,
+          Session.__table__,
+          SessionChange.__table__,
+          GymRecord.__table__,
+          ExerciseSets.__table__,
+          PersonalRecord.__table__,
+          RepRecord.__table__]
+
+
+def generate(users, sessions, sets, seed=0, next_ids=None, exercise_ids=None, layout='rows'):
+    """
+    Build the rows of a synthetic dataset in memory
+
+    Each of the users performs the given number of sessions on distinct dates, each session
+    consisting of the given number of sets spread over a few exercises. next_ids maps each table
+    name to the first id to allocate in it, and exercise_ids maps the names of exercises already
+    in the database to their ids. Sets are generated as rows of gym_records, and packed into
+    exercise_sets if layout is 'packed'. Returns a dict mapping each table name to a list of row dicts.
+    """
+    rng = random.Random(seed)
+    next_ids = next_ids or {}
+    exercise_ids = dict(exercise_ids or {})
+    rows = {table.name: [] for table in TABLES}
+
+    next_exercise_id = next_ids.get('exercises', 1)
+    for exercise_name in EXERCISE_NAMES:
+        if exercise_name not in exercise_ids:
+            exercise_ids[exercise_name] = next_exercise_id
+            rows['exercises'].append({'exercise_id': next_exercise_id, 'exercise_name': exercise_name})
+            next_exercise_id += 1
+    exercise_ids = sorted(exercise_ids.values())
+
+    user_id = next_ids.get('users', 1)
+    session_id = next_ids.get('sessions', 1)
+    record_id = next_ids.get('gym_records', 1)
+    change_id = next_ids.get('session_changes', 1)
+    exercises_per_session = min(len(exercise_ids), max(1, -(-sets // SETS_PER_EXERCISE)))
+    for _ in range(users):
+        username = f'user{user_id}'
+        rows['users'].append({'id': user_id,
+                              'username': username,
+                              'password_hash': _password_hash(username),
+                              'data_version': 0})
+        base_weights = {exercise_id: rng.randint(8, 40) * 2.5 for exercise_id in exercise_ids}
+        summaries, rep_records = {}, {}
+
+        days = sorted(rng.sample(range(max(2 * sessions, 365)), sessions))
+        for day in days:
+            session_date = FIRST_DATE + datetime.timedelta(days=day)
+            rows['sessions'].append({'session_id': session_id, 'date': session_date, 'user_id': user_id})
+            rows['session_changes'].append({'change_id': change_id, 'user_id': user_id, 'date': session_date,
+                                            'operation': 'created', 'changed_at': session_date})
+            change_id += 1
+
+            performed = rng.sample(exercise_ids, exercises_per_session)
+            session_sets = {}
+            for i in range(sets):
+                exercise_id = performed[i * exercises_per_session // sets]
+                reps = rng.randint(1, 15)
+                weight = max(2.5, base_weights[exercise_id] + rng.randint(-4, 4) * 2.5)
+                rows['gym_records'].append({'record_id': record_id, 'session_id': session_id,
+                                            'exercise_id': exercise_id, 'reps': reps, 'weight': weight})
+                session_sets.setdefault(exercise_id, []).append((reps, weight))
+                record_id += 1
+
+            # records are folded as the app folds them, into rows that are never added to a session
+            for exercise_id, exercise_sets in session_sets.items():
+                fold_session(user_id, exercise_id, session_id, session_date, exercise_sets,
+                             summaries, rep_records, add=lambda record: None)
+            session_id += 1
+
+        rows['personal_records'].extend(_row(summaries[key]) for key in sorted(summaries))
+        rows['rep_records'].extend(_row(rep_records[key]) for key in sorted(rep_records))
+        user_id += 1
+
+    if layout == 'packed':
+        rows['exercise_sets'], rows['gym_records'] = pack_records(rows['gym_records']), []
+    return rows
+
+
+def load(engine, users, sessions, sets, seed=0, log=print, layout='rows'):
+    """Generate a synthetic dataset and bulk load it through the given engine, logging rows/sec"""
+    with engine.begin() as conn:
+        next_ids = {table.name: (conn.execute(sqlalchemy.func.max(table.primary_key.columns.values()[0]))
+                                     .scalar() or 0) + 1
+                    for table in TABLES if len(table.primary_key.columns) == 1}
+        exercise_ids = {exercise_name: exercise_id for exercise_name, exercise_id
+                        in conn.execute(sqlalchemy.select([Exercise.exercise_name, Exercise.exercise_id]))}
+
+        start = time.perf_counter()
+        rows = generate(users, sessions, sets, seed, next_ids, exercise_ids, layout)
+        generated = time.perf_counter() - start
+        total = sum(len(table_rows) for table_rows in rows.values())
+        log(f'generated {total} rows in {generated:.2f}s ({total / generated:.0f} rows/sec)')
+
+        start = time.perf_counter()
+        for table in TABLES:
+            table_start = time.perf_counter()
+            _insert(conn, table, rows[table.name])
+            elapsed = time.perf_counter() - table_start
+            log(f'{table.name:>16}: {len(rows[table.name]):>10} rows in {elapsed:.2f}s '
+                f'({len(rows[table.name]) / elapsed:.0f} rows/sec)')
+        if conn.dialect.name == 'postgresql':
+            _reset_sequences(conn)
+        loaded = time.perf_counter() - start
+        log(f'loaded {total} rows in {loaded:.2f}s ({total / loaded:.0f} rows/sec)')
+    return {table_name: len(table_rows) for table_name, table_rows in rows.items()}
+
+
+def _row(record):
+    """Return the row dict of a model instance"""
+    return {column.name: getattr(record, column.name) for column in record.__table__.columns}
+
+
+def _password_hash(password):
+    digest = hashlib.pbkdf2_hmac('sha256', password.encode(), password.encode(), 1).hex()
+    return f'{PASSWORD_METHOD}${password}${digest}'
+
+
+def _insert(conn, table, rows):
+    if not rows:
+        return
+    if conn.dialect.name != 'postgresql':
+        conn.execute(table.insert(), rows)
+        return
+
+    columns = list(rows[0])
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # bytea columns are read from CSV in PostgreSQL's hex format
+    writer.writerows([('\\x' + row[column].hex()) if isinstance(row[column], bytes) else row[column]
+                      for column in columns] for row in rows)
+    buffer.seek(0)
+    with conn.connection.cursor() as cursor:
+        cursor.copy_expert(f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH CSV", buffer)
+
+
+def _reset_sequences(conn):
+    # ids were allocated explicitly, so move each serial sequence past them
+    for table in TABLES:
+        if len(table.primary_key.columns) == 1:
+            column = table.primary_key.columns.values()[0].name
+            conn.execute(f"SELECT setval(pg_get_serial_sequence('{table.name}', '{column}'), "
+                         f"COALESCE(MAX({column}), 1)) FROM {table.name}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--sessions', type=int, default=100, help='sessions per user')
+    parser.add_argument('--sets', type=int, default=20, help='sets per session')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--layout', choices=LAYOUTS, default='rows', help='set storage layout')
+    args = parser.parse_args()
+
+    from config import Config
+    engine = sqlalchemy.create_engine(Config.SQLALCHEMY_DATABASE_URI)
+    load(engine, args.users, args.sessions, args.sets, args.seed, layout=args.layout)
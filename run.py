@@ -1,15 +1,63 @@
 """
 Entry point for 'flask run' command
 """
-from app import create_app, db
+from datetime import datetime, timedelta
+
+import click
+
+from app import create_app, db, exercise_catalog
+from app.archive import archive_cutoff, archive_sessions
+from app.models.archived_session import ArchivedSession
 from app.models.exercise import Exercise
+from app.models.exercise_sets import ExerciseSets
 from app.models.gym_record import GymRecord
+from app.models.personal_record import PersonalRecord, RepRecord
 from app.models.session import Session
+from app.models.session_change import compact_changes, SessionChange
 from app.models.user import User
+from app.set_storage import convert_sets, LAYOUTS
 
 app = create_app()
 
 @app.shell_context_processor
 def make_shell_context():
     """Launch a Python interpreter pre-populated with an application context"""
-    return {'db': db, 'Exercise': Exercise, 'GymRecord': GymRecord, 'Session': Session, 'User': User}
+    return {'db': db, 'exercise_catalog': exercise_catalog, 'ArchivedSession': ArchivedSession,
+            'Exercise': Exercise, 'ExerciseSets': ExerciseSets, 'GymRecord': GymRecord,
+            'PersonalRecord': PersonalRecord, 'RepRecord': RepRecord, 'Session': Session,
+            'SessionChange': SessionChange, 'User': User}
+
+
+@app.cli.command('convert-sets')
+@click.argument('layout', type=click.Choice(LAYOUTS))
+def convert_sets_command(layout):
+    """Move all sets into the given storage layout; set SET_STORAGE to match"""
+    moved = convert_sets(layout)
+    db.session.commit()
+    click.echo(f"Moved {moved} sets into the '{layout}' layout")
+
+
+@app.cli.command('archive-sessions')
+@click.option('--days', type=click.IntRange(min=0), help='archive sessions older than this, by default ARCHIVE_AFTER_DAYS')
+def archive_sessions_command(days):
+    """Move sessions older than the cutoff out of the live tables into archived_sessions"""
+    # before 8.0, MySQL resets AUTO_INCREMENT to the largest live id on restart, handing the ids of
+    # archived sessions out again
+    dialect = db.engine.dialect
+    if dialect.name == 'mysql' and dialect.server_version_info < (8, 0):
+        raise click.ClickException('Archiving sessions requires MySQL 8.0 or later')
+    cutoff = archive_cutoff(days)
+    archived = archive_sessions(cutoff)
+    click.echo(f"Archived {archived} sessions dated before '{cutoff.date()}'")
+
+
+@app.cli.command('compact-changes')
+@click.option('--days', type=click.IntRange(min=0), help='drop changes older than this, by default CHANGE_LOG_RETENTION_DAYS')
+def compact_changes_command(days):
+    """Delete superseded and expired changes from the session change log"""
+    if days is None:
+        days = app.config.get('CHANGE_LOG_RETENTION_DAYS', 90)
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    deleted = compact_changes(cutoff)
+    db.session.commit()
+    click.echo(f"Deleted {deleted} changes, dropping those made before '{cutoff.isoformat(timespec='seconds')}'")
@@ -1,11 +1,13 @@
 from base64 import b64encode
 from datetime import datetime
 import unittest
+import unittest.mock as mock
 
 from tests import BaseTestClass
 
 from app import db
 from app.models.exercise import Exercise
+from app.models.gym_record import GymRecord
 from app.models.session import Session
 
 class TestAddRecordJSONValidation(BaseTestClass, unittest.TestCase):
@@ -195,6 +197,16 @@ class TestAddRecordCreatesRecord(BaseTestClass, unittest.TestCase):
         self.assertEqual(records[-1].reps, 6)
         self.assertEqual(records[-1].weight, 60)
 
+    @mock.patch.object(db.session, 'execute')
+    def test_add_record_with_sql_failure_leaves_no_partial_session(self, MockExecute):
+        MockExecute.side_effect = Exception('insert failed')
+        response = self.test_client.post('/api/sessions',
+                                         headers={'Authorization': 'Bearer ' + self.token},
+                                         json=self.json)
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(db.session.query(Session).count(), 0)
+        self.assertEqual(db.session.query(GymRecord).count(), 0)
+
 
 class TestIntegration(BaseTestClass, unittest.TestCase):
 
@@ -0,0 +1,176 @@
+from base64 import b64encode
+import unittest
+
+from flask import current_app
+import numpy as np
+
+from tests import BaseTestClass
+
+from app import db
+from app.analytics import lttb
+from app.models.exercise import Exercise
+
+class TestWeeklyVolume(BaseTestClass, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.test_client.post('/api/register', json={'username': 'test', 'password': 'pass'})
+        self.token = self.test_client.get('/api/token',
+                                          headers={'Authorization': b'Basic ' + b64encode(b'test:pass')}) \
+                                     .json.get('token')
+
+        for ex in ['exercise1', 'exercise2']:
+            db.session.add(Exercise(exercise_name=ex))
+        db.session.commit()
+
+        # 2019-06-24 and 2019-06-30 fall in the week beginning Monday 2019-06-24
+        json1 = {"date" : "2019-06-24",
+                 "exercises" : [{"exercise name" : "exercise1", "reps": [8, 8], "weights": [100, 100]},
+                                {"exercise name" : "exercise2", "reps": [10], "weights": [50]}]}
+        json2 = {"date" : "2019-06-30",
+                 "exercises" : [{"exercise name" : "exercise1", "reps": [4], "weights": [120]}]}
+        json3 = {"date" : "2019-07-01",
+                 "exercises" : [{"exercise name" : "exercise2", "reps": [12, 10], "weights": [40, 50]}]}
+        for json in [json1, json2, json3]:
+            self.post_session(json)
+
+    def post_session(self, json):
+        return self.test_client.post('/api/sessions', headers={'Authorization': 'Bearer ' + self.token}, json=json)
+
+    def get_volume(self):
+        response = self.test_client.get('/api/analytics/volume', headers={'Authorization': 'Bearer ' + self.token})
+        self.assertEqual(response.status_code, 200)
+        return response.json
+
+    def test_volume_is_aggregated_by_week_and_exercise(self):
+        self.assertEqual(self.get_volume(),
+                         [{'week': '2019-06-24', 'exercise name': 'exercise1',
+                           'tonnage': 2080, 'sets': 3, 'reps': 20, 'average intensity': 104},
+                          {'week': '2019-06-24', 'exercise name': 'exercise2',
+                           'tonnage': 500, 'sets': 1, 'reps': 10, 'average intensity': 50},
+                          {'week': '2019-07-01', 'exercise name': 'exercise2',
+                           'tonnage': 980, 'sets': 2, 'reps': 22, 'average intensity': 980 / 22}])
+
+    def test_volume_is_memoized_until_sessions_change(self):
+        analytics_cache = current_app.extensions['analytics_cache']
+        self.get_volume()
+        self.get_volume()
+        self.assertEqual(analytics_cache.stats()['hits'], 1)
+
+        self.post_session({"date" : "2019-07-02",
+                           "exercises" : [{"exercise name" : "exercise2", "reps": [10], "weights": [50]}]})
+        volume = self.get_volume()
+        self.assertEqual(analytics_cache.stats()['hits'], 1)
+        self.assertEqual(volume[-1]['tonnage'], 1480)
+
+        self.test_client.delete('/api/sessions/2019-07-01', headers={'Authorization': 'Bearer ' + self.token})
+        self.assertEqual(self.get_volume()[-1]['tonnage'], 500)
+
+    def test_volume_with_no_sessions_is_empty(self):
+        for session_date in ['2019-06-24', '2019-06-30', '2019-07-01']:
+            self.test_client.delete('/api/sessions/' + session_date, headers={'Authorization': 'Bearer ' + self.token})
+        self.assertEqual(self.get_volume(), [])
+
+
+class TestLTTB(unittest.TestCase):
+
+    def test_short_series_are_kept_whole(self):
+        self.assertEqual(lttb(np.arange(5.0), np.arange(5.0), 5).tolist(), [0, 1, 2, 3, 4])
+
+    def test_peaks_survive_downsampling(self):
+        x = np.arange(100.0)
+        y = np.zeros(100)
+        y[37], y[71] = 50, -50
+        kept = lttb(x, y, 6).tolist()
+        self.assertEqual(len(kept), 6)
+        self.assertEqual((kept[0], kept[-1]), (0, 99))
+        self.assertIn(37, kept)
+        self.assertIn(71, kept)
+        self.assertEqual(kept, sorted(kept))
+
+    def test_threshold_below_three_is_rejected(self):
+        with self.assertRaises(ValueError):
+            lttb(np.arange(5.0), np.arange(5.0), 2)
+
+
+class TestProgress(BaseTestClass, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.test_client.post('/api/register', json={'username': 'test', 'password': 'pass'})
+        self.token = self.test_client.get('/api/token',
+                                          headers={'Authorization': b'Basic ' + b64encode(b'test:pass')}) \
+                                     .json.get('token')
+
+        for ex in ['exercise1', 'exercise2']:
+            db.session.add(Exercise(exercise_name=ex))
+        db.session.commit()
+
+        sessions = [("2019-06-24", [8, 8], [100, 100]),
+                    ("2019-06-30", [4, 1], [120, 125]),
+                    ("2019-07-01", [10], [90]),
+                    ("2019-07-08", [3], [130])]
+        for session_date, reps, weights in sessions:
+            self.post_session({"date" : session_date,
+                               "exercises" : [{"exercise name" : "exercise1", "reps": reps, "weights": weights},
+                                              {"exercise name" : "exercise2", "reps": [10], "weights": [50]}]})
+
+    def post_session(self, json):
+        return self.test_client.post('/api/sessions', headers={'Authorization': 'Bearer ' + self.token}, json=json)
+
+    def get_progress(self, query='', exercise_name='exercise1'):
+        return self.test_client.get(f'/api/analytics/progress/{exercise_name}{query}',
+                                    headers={'Authorization': 'Bearer ' + self.token})
+
+    def test_progress_is_aggregated_by_session(self):
+        response = self.get_progress()
+        self.assertEqual(response.status_code, 200)
+        dates = ['2019-06-24', '2019-06-30', '2019-07-01', '2019-07-08']
+        self.assertEqual(response.json, {'exercise name': 'exercise1', 'sessions': 4,
+                                         'top set': {'dates': dates, 'values': [100, 125, 90, 130]},
+                                         'estimated 1rm': {'dates': dates, 'values': [100 * (1 + 8 / 30), 136,
+                                                                                      120, 143]},
+                                         'volume': {'dates': dates, 'values': [1600, 605, 900, 390]}})
+
+    def test_progress_is_downsampled_to_the_points_requested(self):
+        progress = self.get_progress('?points=3').json
+        self.assertEqual(progress['sessions'], 4)
+        # the first and last sessions are always kept, and the one between furthest from the line joining them
+        self.assertEqual(progress['top set'], {'dates': ['2019-06-24', '2019-07-01', '2019-07-08'],
+                                               'values': [100, 90, 130]})
+        # each series keeps the sessions that best preserve its own shape
+        self.assertEqual(progress['volume'], {'dates': ['2019-06-24', '2019-06-30', '2019-07-08'],
+                                              'values': [1600, 605, 390]})
+
+    def test_progress_is_memoized_until_sessions_change(self):
+        analytics_cache = current_app.extensions['analytics_cache']
+        self.get_progress()
+        self.get_progress()
+        self.assertEqual(analytics_cache.stats()['hits'], 1)
+        self.get_progress('?points=3')
+        self.assertEqual(analytics_cache.stats()['hits'], 1)
+
+        self.post_session({"date" : "2019-07-15",
+                           "exercises" : [{"exercise name" : "exercise1", "reps": [1], "weights": [140]}]})
+        self.assertEqual(self.get_progress().json['top set']['values'][-1], 140)
+
+    def test_points_are_limited_to_max_progress_points(self):
+        self.app.config['MAX_PROGRESS_POINTS'] = 3
+        self.assertEqual(self.get_progress('?points=4').status_code, 400)
+        progress = self.get_progress().json
+        self.assertEqual(progress['sessions'], 4)
+        self.assertEqual(len(progress['top set']['dates']), 3)
+
+    def test_exercise_never_performed(self):
+        self.test_client.delete('/api/sessions?from=2019-01-01', headers={'Authorization': 'Bearer ' + self.token})
+        self.assertEqual(self.get_progress().json, {'exercise name': 'exercise1', 'sessions': 0,
+                                                    'top set': {'dates': [], 'values': []},
+                                                    'estimated 1rm': {'dates': [], 'values': []},
+                                                    'volume': {'dates': [], 'values': []}})
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.get_progress(exercise_name='exercise3').status_code, 404)
+        for points in ('-1', '0', '2', '1001', 'many'):
+            with self.subTest(points=points):
+                self.assertEqual(self.get_progress('?points=' + points).status_code, 400)
+        self.assertEqual(self.get_progress('?metric=volume').status_code, 400)
@@ -0,0 +1,150 @@
+from base64 import b64encode
+from datetime import datetime
+import unittest
+
+from tests import BaseTestClass
+
+from app import db
+from app.archive import archive_sessions
+from app.models.archived_session import ArchivedSession
+from app.models.exercise import Exercise
+from app.models.gym_record import GymRecord
+from app.models.session import Session
+
+URLS = ['/api/sessions', '/api/sessions?format=columnar', '/api/sessions?from=2019-06-01',
+        '/api/sessions?to=2019-06-30', '/api/sessions/2019-05-31', '/api/sessions/2019-06-30',
+        '/api/sessions/export', '/api/records', '/api/analytics/volume']
+CUTOFF = datetime(2019, 7, 1)
+
+class TestArchive(BaseTestClass, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.test_client.post('/api/register', json={'username': 'test', 'password': 'pass'})
+        self.token = self.test_client.get('/api/token',
+                                          headers={'Authorization': b'Basic ' + b64encode(b'test:pass')}) \
+                                     .json.get('token')
+
+        for ex in ['exercise1', 'exercise2', 'exercise3']:
+            db.session.add(Exercise(exercise_name=ex))
+        db.session.commit()
+
+    def post_sessions(self):
+        json1 = {"date" : "2019-05-31",
+                 "exercises" : [{"exercise name" : "exercise2", "reps": [6, 5], "weights": [100, 102.5]},
+                                {"exercise name" : "exercise1", "reps": [8, 8, 8], "weights": [100, 100, 100]},
+                                {"exercise name" : "exercise2", "reps": [3], "weights": [110]}]}
+        json2 = {"date" : "2019-06-30",
+                 "exercises" : [{"exercise name" : "exercise1", "reps": [8, 7], "weights": [105, 105]},
+                                {"exercise name" : "exercise3", "reps": [12, 10, 8], "weights": [120, 80, 60]}]}
+        json3 = {"date" : "2019-07-31",
+                 "exercises" : [{"exercise name" : "exercise1", "reps": [5], "weights": [102.5]}]}
+        json4 = {"date" : "2019-08-31", "exercises" : []}
+        for json in (json1, json2, json3, json4):
+            response = self.test_client.post('/api/sessions', headers={'Authorization': 'Bearer ' + self.token},
+                                             json=json)
+            self.assertEqual(response.status_code, 201)
+
+    def get(self, url):
+        return self.test_client.get(url, headers={'Authorization': 'Bearer ' + self.token})
+
+    def responses(self):
+        return [self.get(url).get_data(as_text=True) for url in URLS]
+
+    def pages(self):
+        dates, url = [], '/api/sessions?limit=1'
+        while True:
+            response = self.get(url)
+            dates.extend(session['session']['date'] for session in response.json)
+            if 'X-Next-Cursor' not in response.headers:
+                return dates
+            url = '/api/sessions?limit=1&cursor=' + response.headers['X-Next-Cursor']
+
+    def test_archive_moves_sessions_before_cutoff(self):
+        self.post_sessions()
+        self.assertEqual(archive_sessions(CUTOFF, batch_size=1), 2)
+        self.assertEqual([session.date for session in Session.query.order_by(Session.date)],
+                         [datetime(2019, 7, 31), datetime(2019, 8, 31)])
+        self.assertEqual(GymRecord.query.count(), 1)
+        archived = ArchivedSession.query.order_by(ArchivedSession.date).all()
+        self.assertEqual([session.date for session in archived], [datetime(2019, 5, 31), datetime(2019, 6, 30)])
+        self.assertEqual(archived[0].records(), [(2, 6, 100.0), (2, 5, 102.5), (1, 8, 100.0), (1, 8, 100.0),
+                                                 (1, 8, 100.0), (2, 3, 110.0)])
+        self.assertEqual(archive_sessions(CUTOFF), 0)
+
+    def test_archive_keeps_sets_not_yet_converted_to_the_configured_layout(self):
+        self.post_sessions()
+        self.app.config['SET_STORAGE'] = 'packed'
+        self.assertEqual(archive_sessions(CUTOFF), 2)
+        self.assertEqual(GymRecord.query.count(), 1)
+        archived = ArchivedSession.query.order_by(ArchivedSession.date).first()
+        self.assertEqual(archived.records(), [(2, 6, 100.0), (2, 5, 102.5), (1, 8, 100.0), (1, 8, 100.0),
+                                              (1, 8, 100.0), (2, 3, 110.0)])
+
+    def test_ids_of_archived_sessions_are_not_reused(self):
+        self.post_sessions()
+        self.assertEqual(archive_sessions(datetime(2019, 9, 1)), 4)
+        response = self.test_client.post('/api/sessions', headers={'Authorization': 'Bearer ' + self.token},
+                                         json={"date" : "2019-09-15", "exercises" : []})
+        self.assertEqual(response.status_code, 201)
+        archived_ids = {session.session_id for session in ArchivedSession.query}
+        self.assertNotIn(Session.query.one().session_id, archived_ids)
+        self.assertEqual(archive_sessions(datetime(2019, 10, 1)), 1)
+        self.assertEqual(ArchivedSession.query.count(), 5)
+
+    def test_archived_sessions_serve_identical_responses(self):
+        for layout in ('rows', 'packed'):
+            with self.subTest(layout=layout):
+                self.tearDown()
+                self.setUp()
+                self.app.config['SET_STORAGE'] = layout
+                self.post_sessions()
+                archive_sessions(CUTOFF)
+                archived, archived_pages = self.responses(), self.pages()
+
+                self.tearDown()
+                self.setUp()
+                self.app.config['SET_STORAGE'] = layout
+                self.post_sessions()
+                self.assertEqual(archived, self.responses())
+                self.assertEqual(archived_pages, self.pages())
+
+    def test_post_session_on_archived_date(self):
+        self.post_sessions()
+        archive_sessions(CUTOFF)
+        response = self.test_client.post('/api/sessions', headers={'Authorization': 'Bearer ' + self.token},
+                                         json={'date': '2019-05-31', 'exercises': []})
+        self.assertEqual(response.status_code, 409)
+
+        response = self.test_client.post('/api/sessions/batch', headers={'Authorization': 'Bearer ' + self.token},
+                                         json={'sessions': [{'date': '2019-06-30', 'exercises': []},
+                                                            {'date': '2019-06-29', 'exercises': []}]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result['status'] for result in response.json], [409, 201])
+
+    def test_delete_archived_session(self):
+        self.post_sessions()
+        archive_sessions(CUTOFF)
+        response = self.test_client.delete('/api/sessions/2019-06-30', headers={'Authorization': 'Bearer ' + self.token})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(ArchivedSession.query.count(), 1)
+        self.assertEqual(self.get('/api/sessions/2019-06-30').json, [])
+
+        # the personal records held by the deleted session are rebuilt from the archived and live sessions left
+        records = {record['exercise name']: record for record in self.get('/api/records').json}
+        self.assertEqual(records['exercise1']['max weight'], 102.5)
+        self.assertNotIn('exercise3', records)
+
+    def test_delete_range_spanning_archived_and_live_sessions(self):
+        self.post_sessions()
+        archive_sessions(CUTOFF)
+        response = self.test_client.delete('/api/sessions?from=2019-06-01&to=2019-07-31',
+                                           headers={'Authorization': 'Bearer ' + self.token})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json, "2 sessions for user 'test' from '2019-06-01' to '2019-07-31' deleted")
+        self.assertEqual([session['session']['date'] for session in self.get('/api/sessions').json],
+                         ['Fri, 31 May 2019 00:00:00 -0000', 'Sat, 31 Aug 2019 00:00:00 -0000'])
+
+
+if __name__ == "__main__":
+    unittest.main()
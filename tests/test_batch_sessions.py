@@ -0,0 +1,90 @@
+from base64 import b64encode
+import unittest
+
+from tests import BaseTestClass
+
+from app import db
+from app.models.exercise import Exercise
+from app.models.gym_record import GymRecord
+from app.models.session import Session
+
+class TestBatchSessions(BaseTestClass, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.test_client.post('/api/register', json={'username': 'test', 'password': 'pass'})
+        self.token = self.test_client.get('/api/token',
+                                          headers={'Authorization': b'Basic ' + b64encode(b'test:pass')}) \
+                                     .json.get('token')
+
+        for ex in ['exercise1', 'exercise2', 'exercise3']:
+            db.session.add(Exercise(exercise_name=ex))
+        db.session.commit()
+
+        self.json1 = {"date" : "2019-05-31",
+                      "exercises" : [{"exercise name" : "exercise1", "reps": [8, 8, 8], "weights": [100, 100, 100]},
+                                     {"exercise name" : "exercise2", "reps": [6, 5], "weights": [100, 100]}]}
+        self.json2 = {"date" : "2019-06-30",
+                      "exercises" : [{"exercise name" : "exercise1", "reps": [5], "weights": [120]}]}
+        self.json3 = {"date" : "2019-07-31",
+                      "exercises" : [{"exercise name" : "exercise3", "reps": [12, 10], "weights": [60, 80]}]}
+
+    def post_batch(self, sessions):
+        return self.test_client.post('/api/sessions/batch',
+                                     headers={'Authorization': 'Bearer ' + self.token},
+                                     json={'sessions': sessions})
+
+    def test_batch_creates_all_sessions_and_records(self):
+        response = self.post_batch([self.json1, self.json2, self.json3])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([(r['date'], r['status']) for r in response.json],
+                         [('2019-05-31', 201), ('2019-06-30', 201), ('2019-07-31', 201)])
+        self.assertEqual(response.json[1]['personal records'], [{'exercise name': 'exercise1', 'max weight': 120,
+                                                                 'estimated 1rm': 140}])
+        self.assertEqual(Session.query.count(), 3)
+        self.assertEqual(GymRecord.query.count(), 8)
+
+        sessions = self.test_client.get('/api/sessions', headers={'Authorization': 'Bearer ' + self.token}).json
+        self.assertEqual(sessions[0]['session']['exercises'], ['exercise1', 'exercise2'])
+        self.assertEqual(sessions[0]['session']['reps'], [[8, 8, 8], [6, 5]])
+        self.assertEqual(sessions[2]['session']['weights'], [[60, 80]])
+
+    def test_batch_reports_conflicts_without_aborting(self):
+        self.test_client.post('/api/sessions', headers={'Authorization': 'Bearer ' + self.token}, json=self.json2)
+        response = self.post_batch([self.json1, self.json2, self.json3, self.json1])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([(r['date'], r['status']) for r in response.json],
+                         [('2019-05-31', 201), ('2019-06-30', 409), ('2019-07-31', 201), ('2019-05-31', 409)])
+        self.assertEqual(response.json[1]['message'], 'error: sessions must be unique across dates for each user')
+        self.assertEqual(Session.query.count(), 3)
+        self.assertEqual(GymRecord.query.count(), 8)
+
+    def test_batch_is_validated_before_anything_is_written(self):
+        self.json2['exercises'][0]['exercise name'] = 'abc123'
+        self.json3.pop('date')
+        response = self.post_batch([self.json1, self.json2, self.json3])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json['message']['sessions'],
+                         {'1': "Exercise 'abc123' not recognised - please add as an exercise",
+                          '2': "Missing required parameter 'date' in the JSON body"})
+        self.assertEqual(Session.query.count(), 0)
+
+    def test_batch_reports_exercise_names_that_are_not_strings(self):
+        self.json2['exercises'][0]['exercise name'] = ['Squat']
+        response = self.post_batch([self.json1, self.json2])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json['message']['sessions'],
+                         {'1': "'exercise name' must be a string, not ['Squat']"})
+        self.assertEqual(Session.query.count(), 0)
+
+    def test_batch_rejects_bad_date(self):
+        self.json1['date'] = 'abc123'
+        response = self.post_batch([self.json1])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json['message']['sessions'],
+                         {'0': "time data 'abc123' does not match format '%Y-%m-%d'"})
+
+    def test_batch_must_be_a_list(self):
+        response = self.post_batch(42)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json['message']['sessions'], "'sessions' must be a list of sessions")
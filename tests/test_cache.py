@@ -0,0 +1,36 @@
+import unittest
+import unittest.mock as mock
+
+from app.cache import LRUCache
+
+class TestLRUCache(unittest.TestCase):
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = LRUCache(maxsize=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 3)
+
+    @mock.patch('app.cache.monotonic')
+    def test_entries_expire_after_ttl(self, MockMonotonic):
+        MockMonotonic.return_value = 100
+        cache = LRUCache(maxsize=2, ttl=10)
+        cache.set('a', 1)
+        cache.set('b', 2, ttl=5)
+        MockMonotonic.return_value = 106
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        MockMonotonic.return_value = 111
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(len(cache), 0)
+
+    def test_stats_count_hits_and_misses(self):
+        cache = LRUCache(maxsize=2)
+        cache.set('a', 1)
+        cache.get('a')
+        cache.get('b')
+        self.assertEqual(cache.stats(), {'size': 1, 'hits': 1, 'misses': 1})
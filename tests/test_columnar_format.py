@@ -0,0 +1,77 @@
+from base64 import b64encode
+import gzip
+import unittest
+
+from tests import BaseTestClass
+
+from app import db
+from app.models.exercise import Exercise
+
+class TestColumnarFormat(BaseTestClass, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.test_client.post('/api/register', json={'username': 'test', 'password': 'pass'})
+        self.token = self.test_client.get('/api/token',
+                                          headers={'Authorization': b'Basic ' + b64encode(b'test:pass')}) \
+                                     .json.get('token')
+
+        for ex in ['exercise1', 'exercise2', 'exercise3']:
+            db.session.add(Exercise(exercise_name=ex))
+        db.session.commit()
+
+        json1 = {"date" : "2019-05-31",
+                 "exercises" : [{"exercise name" : "exercise1", "reps": [8, 8, 8], "weights": [100, 100, 100]},
+                                {"exercise name" : "exercise3", "reps": [12, 10], "weights": [120, 100]}]}
+        json2 = {"date" : "2019-06-30", "exercises" : []}
+        json3 = {"date" : "2019-07-31",
+                 "exercises" : [{"exercise name" : "exercise2", "reps": [8, 7, 6], "weights": [100, 110, 120]},
+                                {"exercise name" : "exercise3", "reps": [5], "weights": [130]}]}
+        for json in [json1, json2, json3]:
+            self.test_client.post('/api/sessions', headers={'Authorization': 'Bearer ' + self.token}, json=json)
+
+    def get(self, url, query_string=None, **headers):
+        headers['Authorization'] = 'Bearer ' + self.token
+        return self.test_client.get(url, headers=headers, query_string=query_string)
+
+    def test_columnar_format_returns_parallel_arrays(self):
+        response = self.get('/api/sessions', query_string={'format': 'columnar'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json,
+                         {'username': 'test',
+                          'dates': ['2019-05-31', '2019-06-30', '2019-07-31'],
+                          'exercise names': ['exercise1', 'exercise3', 'exercise2'],
+                          'exercise offsets': [0, 2, 2, 4],
+                          'exercises': [0, 1, 2, 1],
+                          'set offsets': [0, 3, 5, 8, 9],
+                          'reps': [8, 8, 8, 12, 10, 8, 7, 6, 5],
+                          'weights': [100, 100, 100, 120, 100, 100, 110, 120, 130]})
+
+    def test_columnar_format_for_single_session(self):
+        response = self.get('/api/sessions/2019-07-31', query_string={'format': 'columnar'})
+        self.assertEqual(response.json['dates'], ['2019-07-31'])
+        self.assertEqual(response.json['exercise names'], ['exercise2', 'exercise3'])
+
+    def test_unknown_format_is_rejected(self):
+        response = self.get('/api/sessions', query_string={'format': 'xml'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_response_is_gzipped_when_accepted(self):
+        self.app.config['COMPRESS_MIN_SIZE'] = 0
+        plain = self.get('/api/sessions')
+        compressed = self.get('/api/sessions', **{'Accept-Encoding': 'gzip, deflate'})
+        self.assertNotIn('Content-Encoding', plain.headers)
+        self.assertEqual(compressed.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(compressed.headers['Vary'], 'Accept-Encoding')
+        self.assertEqual(gzip.decompress(compressed.data), plain.data)
+
+    def test_small_response_is_not_gzipped(self):
+        response = self.get('/api/sessions/2019-06-30', **{'Accept-Encoding': 'gzip'})
+        self.assertNotIn('Content-Encoding', response.headers)
+
+    def test_gzipped_response_etag_is_weakened_and_still_matches(self):
+        self.app.config['COMPRESS_MIN_SIZE'] = 0
+        response = self.get('/api/sessions', **{'Accept-Encoding': 'gzip'})
+        self.assertTrue(response.headers['ETag'].startswith('W/'))
+        response = self.get('/api/sessions', **{'Accept-Encoding': 'gzip', 'If-None-Match': response.headers['ETag']})
+        self.assertEqual(response.status_code, 304)
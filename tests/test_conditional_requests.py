@@ -0,0 +1,81 @@
+from base64 import b64encode
+import unittest
+
+from sqlalchemy import event
+
+from tests import BaseTestClass
+
+from app import db
+from app.models.exercise import Exercise
+
+class TestConditionalRequests(BaseTestClass, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.test_client.post('/api/register', json={'username': 'test', 'password': 'pass'})
+        self.token = self.test_client.get('/api/token',
+                                          headers={'Authorization': b'Basic ' + b64encode(b'test:pass')}) \
+                                     .json.get('token')
+
+        for ex in ['exercise1', 'exercise2']:
+            db.session.add(Exercise(exercise_name=ex))
+        db.session.commit()
+
+        self.post_session('2019-06-30')
+
+    def post_session(self, session_date):
+        json = {"date" : session_date,
+                "exercises" : [{"exercise name" : "exercise1", "reps": [8, 8], "weights": [100, 100]}]}
+        return self.test_client.post('/api/sessions', headers={'Authorization': 'Bearer ' + self.token}, json=json)
+
+    def get(self, url, etag=None, query_string=None):
+        headers = {'Authorization': 'Bearer ' + self.token}
+        if etag is not None:
+            headers['If-None-Match'] = etag
+        return self.test_client.get(url, headers=headers, query_string=query_string)
+
+    def test_matching_etag_returns_not_modified_without_querying_sessions(self):
+        etag = self.get('/api/sessions').headers['ETag']
+        statements = []
+        def capture_statement(conn, cursor, statement, *args):
+            statements.append(statement)
+        event.listen(db.engine, 'before_cursor_execute', capture_statement)
+        try:
+            response = self.get('/api/sessions', etag=etag)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', capture_statement)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b'')
+        self.assertEqual(response.headers['ETag'], etag)
+        self.assertFalse([statement for statement in statements if 'FROM sessions' in statement])
+
+    def test_etag_changes_when_sessions_change(self):
+        etag = self.get('/api/sessions').headers['ETag']
+        self.post_session('2019-07-31')
+        response = self.get('/api/sessions', etag=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json), 2)
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+        etag = response.headers['ETag']
+        self.test_client.delete('/api/sessions/2019-07-31', headers={'Authorization': 'Bearer ' + self.token})
+        self.assertEqual(self.get('/api/sessions', etag=etag).status_code, 200)
+
+    def test_etag_depends_on_request(self):
+        etag = self.get('/api/sessions').headers['ETag']
+        self.assertNotEqual(self.get('/api/sessions/2019-06-30').headers['ETag'], etag)
+        self.assertNotEqual(self.get('/api/sessions', query_string={'limit': 1}).headers['ETag'], etag)
+        self.assertEqual(self.get('/api/sessions', etag=etag, query_string={'limit': 1}).status_code, 200)
+
+    def test_weak_etag_matches(self):
+        etag = self.get('/api/sessions').headers['ETag']
+        self.assertEqual(self.get('/api/sessions', etag='W/' + etag).status_code, 304)
+
+    def test_exercises_etag_changes_when_exercise_added(self):
+        etag = self.get('/api/exercises').headers['ETag']
+        self.assertEqual(self.get('/api/exercises', etag=etag).status_code, 304)
+        self.test_client.post('/api/exercises', headers={'Authorization': 'Bearer ' + self.token},
+                              json={'exercises': 'exercise3'})
+        response = self.get('/api/exercises', etag=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json, ['Exercise3', 'exercise1', 'exercise2'])
@@ -2,13 +2,16 @@ from base64 import b64encode
 import unittest
 import unittest.mock as mock
 
+from sqlalchemy import event
 from sqlalchemy.exc import IntegrityError
 
 from tests import BaseTestClass
 
 from app import db
 from app.models.exercise import Exercise
+from app.models.gym_record import GymRecord
 from app.models.session import Session
+from app.models.user import User
 
 class TestGetRecord(BaseTestClass, unittest.TestCase):
 
@@ -56,7 +59,7 @@ class TestGetRecord(BaseTestClass, unittest.TestCase):
         self.assertEqual(response.status_code, 400)
         self.assertEqual(response.json['message'], "Session for user 'test' on '2019-06-29' not found")
 
-    @mock.patch.object(db.session, 'delete')
+    @mock.patch.object(db.session, 'execute')
     def test_delete_session_with_sql_failure_informs_user(self, MockDeleteSession):
         MockDeleteSession.side_effect = IntegrityError('', [], None)
         self.assertEqual(Session.query.count(), 3)
@@ -74,3 +77,83 @@ class TestGetRecord(BaseTestClass, unittest.TestCase):
         self.assertEqual(response.status_code, 400)
         self.assertEqual(response.json['message'],
                 "Bad date parameter provided '2019-06-29xxx' - could not be parsed in format 'YYYY-MM-DD'")
+
+    def test_delete_session_deletes_gym_records_with_one_statement(self):
+        statements = []
+        def capture_statement(conn, cursor, statement, *args):
+            statements.append(statement)
+        event.listen(db.engine, 'before_cursor_execute', capture_statement)
+        response = self.test_client.delete('/api/sessions/2019-05-31',
+                headers={'Authorization': 'Bearer ' + self.token})
+        event.remove(db.engine, 'before_cursor_execute', capture_statement)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len([s for s in statements if s.startswith('DELETE FROM gym_records')]), 1)
+        self.assertEqual(len([s for s in statements if s.startswith('DELETE FROM sessions')]), 1)
+        self.assertEqual(GymRecord.query.count(), 12)
+
+
+class TestDeleteSessionRange(BaseTestClass, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.token = self.register('test')
+
+        for ex in ['exercise1', 'exercise2']:
+            db.session.add(Exercise(exercise_name=ex))
+        db.session.commit()
+
+        for token in (self.token, self.register('other')):
+            for month, weight in ((5, 100), (6, 120), (7, 110), (8, 90)):
+                json = {"date" : f"2019-{month:02}-15",
+                        "exercises" : [{"exercise name" : "exercise1", "reps": [5, 5], "weights": [weight, weight]}]}
+                self.test_client.post('/api/sessions', headers={'Authorization': 'Bearer ' + token}, json=json)
+
+    def register(self, username):
+        self.test_client.post('/api/register', json={'username': username, 'password': 'pass'})
+        credentials = b64encode(f'{username}:pass'.encode())
+        return self.test_client.get('/api/token', headers={'Authorization': b'Basic ' + credentials}) \
+                               .json.get('token')
+
+    def delete(self, query_string):
+        return self.test_client.delete('/api/sessions', headers={'Authorization': 'Bearer ' + self.token},
+                                       query_string=query_string)
+
+    def test_delete_range_deletes_sessions_between_dates_inclusive(self):
+        response = self.delete({'from': '2019-06-15', 'to': '2019-07-15'})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json, "2 sessions for user 'test' from '2019-06-15' to '2019-07-15' deleted")
+        user_id = User.query.filter_by(username='test').first().id
+        self.assertEqual(sorted(session.date.month for session in Session.query.filter_by(user_id = user_id)), [5, 8])
+        self.assertEqual(Session.query.count(), 6)
+        self.assertEqual(GymRecord.query.count(), 12)
+
+    def test_delete_range_with_one_bound_is_open_ended(self):
+        response = self.delete({'from': '2019-07-01'})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json, "2 sessions for user 'test' from '2019-07-01' deleted")
+        response = self.delete({'to': '2019-05-31'})
+        self.assertEqual(response.json, "1 sessions for user 'test' to '2019-05-31' deleted")
+        self.assertEqual(Session.query.count(), 5)
+
+    def test_delete_range_rebuilds_personal_records(self):
+        self.delete({'from': '2019-06-01', 'to': '2019-06-30'})
+        records = self.test_client.get('/api/records', headers={'Authorization': 'Bearer ' + self.token}).json
+        self.assertEqual(records[0]['max weight'], 110)
+        self.assertEqual(records[0]['last performed'], 'Thu, 15 Aug 2019 00:00:00 -0000')
+
+    def test_delete_range_without_bounds_is_rejected(self):
+        response = self.delete({})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json['message'],
+                         "Either or both of 'from' and 'to' must be provided to delete a range of sessions")
+        self.assertEqual(Session.query.count(), 8)
+
+    def test_delete_range_without_sessions_informs_user(self):
+        response = self.delete({'from': '2020-01-01'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json['message'], "No sessions for user 'test' found from '2020-01-01'")
+
+    def test_delete_range_with_invalid_date_leaves_sessions_unchanged(self):
+        response = self.delete({'from': '2019-06-31'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Session.query.count(), 8)
@@ -0,0 +1,101 @@
+from base64 import b64encode
+import os
+import shutil
+import tempfile
+import unittest
+
+from tests import BaseTestClass, TestConfig
+
+from app import create_app, db, exercise_catalog
+from app.models.exercise import Exercise
+
+class TestExerciseCatalog(BaseTestClass, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.test_client.post('/api/register', json={'username': 'test', 'password': 'pass'})
+        self.token = self.test_client.get('/api/token',
+                                          headers={'Authorization': b'Basic ' + b64encode(b'test:pass')}) \
+                                     .json.get('token')
+
+        for ex in ['exercise1', 'exercise2', 'exercise3']:
+            db.session.add(Exercise(exercise_name=ex))
+        db.session.commit()
+
+    def test_catalog_reloads_on_miss_and_then_hits(self):
+        self.assertEqual(exercise_catalog.ids_for(['exercise1', 'exercise2']), {'exercise1': 1, 'exercise2': 2})
+        self.assertEqual(exercise_catalog.stats(), {'size': 3, 'hits': 0, 'misses': 2})
+
+        self.assertEqual(exercise_catalog.names_for([3]), {3: 'exercise3'})
+        self.assertEqual(exercise_catalog.stats(), {'size': 3, 'hits': 1, 'misses': 2})
+
+    def test_catalog_ignores_unrecognised_names(self):
+        self.assertEqual(exercise_catalog.ids_for(['exercise1', 'abc123']), {'exercise1': 1})
+
+    def test_add_exercise_writes_through_to_catalog(self):
+        exercise_catalog.load()
+        response = self.test_client.post('/api/exercises',
+                                         headers={'Authorization': 'Bearer ' + self.token},
+                                         json={'exercises': 'exercise4'})
+        self.assertEqual(response.status_code, 201)
+        misses = exercise_catalog.stats()['misses']
+
+        response = self.test_client.get('/api/exercises', headers={'Authorization': 'Bearer ' + self.token})
+        self.assertEqual(response.json, ['Exercise4', 'exercise1', 'exercise2', 'exercise3'])
+        self.assertEqual(exercise_catalog.ids_for(['Exercise4']), {'Exercise4': 4})
+        self.assertEqual(exercise_catalog.stats()['misses'], misses)
+
+    def test_add_record_resolves_exercises_from_catalog(self):
+        exercise_catalog.load()
+        json = {"date" : "2019-06-30",
+                "exercises" : [{"exercise name" : "exercise1", "reps": [8, 8, 8], "weights": [100, 100, 100]},
+                               {"exercise name" : "exercise3", "reps": [12, 10], "weights": [120, 100]}]}
+        response = self.test_client.post('/api/sessions', headers={'Authorization': 'Bearer ' + self.token}, json=json)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(exercise_catalog.stats(), {'size': 3, 'hits': 2, 'misses': 0})
+
+
+class TestExerciseCatalogAcrossWorkers(unittest.TestCase):
+    """Two applications sharing one SQLite file stand in for two worker processes"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        config = type('WorkersTestConfig', (TestConfig,), {
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(self.directory, 'app.db')})
+        self.worker_a = create_app(config)
+        with self.worker_a.app_context():
+            db.create_all()
+        self.worker_b = create_app(config)
+
+        client = self.worker_a.test_client()
+        client.post('/api/register', json={'username': 'test', 'password': 'pass'})
+        token = client.get('/api/token', headers={'Authorization': b'Basic ' + b64encode(b'test:pass')}).json['token']
+        self.headers = {'Authorization': 'Bearer ' + token}
+
+    def tearDown(self):
+        for app in (self.worker_a, self.worker_b):
+            with app.app_context():
+                db.session.remove()
+                db.get_engine(app).dispose()
+        shutil.rmtree(self.directory)
+
+    def get(self, app, url, etag=None):
+        headers = dict(self.headers, **({'If-None-Match': etag} if etag else {}))
+        return app.test_client().get(url, headers=headers)
+
+    def test_reads_pick_up_exercises_added_by_another_worker(self):
+        self.assertEqual(self.get(self.worker_b, '/api/exercises').json, [])
+        response = self.worker_a.test_client().post('/api/exercises', headers=self.headers,
+                                                    json={'exercises': 'squat'})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.get(self.worker_b, '/api/exercises').json, ['Squat'])
+        self.assertEqual(self.get(self.worker_b, '/api/exercises?q=squ').json, ['Squat'])
+
+    def test_etag_matches_the_catalog_served(self):
+        etag = self.get(self.worker_b, '/api/exercises').headers['ETag']
+        self.worker_a.test_client().post('/api/exercises', headers=self.headers, json={'exercises': 'squat'})
+        response = self.get(self.worker_b, '/api/exercises', etag=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json, ['Squat'])
+        self.assertEqual(response.headers['ETag'], self.get(self.worker_a, '/api/exercises').headers['ETag'])
+        self.assertEqual(self.get(self.worker_b, '/api/exercises', etag=response.headers['ETag']).status_code, 304)
@@ -0,0 +1,90 @@
+from base64 import b64encode
+import unittest
+
+from tests import BaseTestClass
+
+from app import db, exercise_catalog
+from app.models.exercise import Exercise
+from app.search import ExerciseIndex
+
+NAMES = ['Bulgarian Split Squat', 'Cable Flys', 'Dumbbell Bench Press', 'Dumbbell Step Up',
+         'Seated Barbell Press', 'Seated Dumbbell Curl', 'Seated Row', 'Squat']
+
+class TestExerciseIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = ExerciseIndex(NAMES)
+
+    def test_search_ranks_name_prefixes_before_word_prefixes(self):
+        self.assertEqual(self.index.search('squ'), ['Squat', 'Bulgarian Split Squat'])
+        self.assertEqual(self.index.search('DUMBBELL  b'), ['Dumbbell Bench Press'])
+        self.assertEqual(self.index.search('seated'), ['Seated Barbell Press', 'Seated Dumbbell Curl', 'Seated Row'])
+
+    def test_search_matches_words_within_names(self):
+        self.assertEqual(self.index.search('press', limit=2), ['Dumbbell Bench Press', 'Seated Barbell Press'])
+        self.assertEqual(self.index.search('dumbbell c'), ['Seated Dumbbell Curl'])
+
+    def test_search_falls_back_to_similar_names(self):
+        self.assertEqual(self.index.search('dumbel bench pres')[0], 'Dumbbell Bench Press')
+        self.assertEqual(self.index.search('seatd row')[0], 'Seated Row')
+        self.assertEqual(self.index.search('xyz'), [])
+        self.assertEqual(self.index.search('  '), [])
+
+    def test_search_respects_limit(self):
+        self.assertEqual(len(self.index.search('s', limit=3)), 3)
+
+    def test_suggest_returns_most_similar_name(self):
+        self.assertEqual(self.index.suggest('bulgarian split sqat'), 'Bulgarian Split Squat')
+        self.assertIsNone(self.index.suggest('abc123'))
+        self.assertIsNone(self.index.suggest(42))
+
+    def test_add_indexes_new_names_incrementally(self):
+        self.index.add(['Squat Jump', 'Squat'])
+        self.assertEqual(len(self.index), len(NAMES) + 1)
+        self.assertEqual(self.index.search('squat'), ['Squat', 'Squat Jump', 'Bulgarian Split Squat'])
+
+
+class TestExerciseSearch(BaseTestClass, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.test_client.post('/api/register', json={'username': 'test', 'password': 'pass'})
+        self.token = self.test_client.get('/api/token',
+                                          headers={'Authorization': b'Basic ' + b64encode(b'test:pass')}) \
+                                     .json.get('token')
+
+        for ex in NAMES:
+            db.session.add(Exercise(exercise_name=ex))
+        db.session.commit()
+
+    def search(self, query_string):
+        return self.test_client.get('/api/exercises', headers={'Authorization': 'Bearer ' + self.token},
+                                    query_string=query_string)
+
+    def test_search_returns_ranked_suggestions(self):
+        response = self.search({'q': 'seated', 'limit': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json, ['Seated Barbell Press', 'Seated Dumbbell Curl'])
+        self.assertEqual(self.search({'q': 'cabel flys'}).json, ['Cable Flys'])
+
+    def test_search_without_query_returns_all_exercises(self):
+        self.assertEqual(self.search({}).json, sorted(NAMES))
+
+    def test_search_with_invalid_limit_fails(self):
+        self.assertEqual(self.search({'q': 'seated', 'limit': 0}).status_code, 400)
+        self.assertEqual(self.search({'q': 'seated', 'limit': 51}).status_code, 400)
+
+    def test_search_finds_added_exercises(self):
+        self.search({'q': 'row'})
+        self.test_client.post('/api/exercises', headers={'Authorization': 'Bearer ' + self.token},
+                              json={'exercises': ['bent over row']})
+        self.assertEqual(self.search({'q': 'row'}).json, ['Bent Over Row', 'Seated Row'])
+        self.assertEqual(exercise_catalog.stats()['size'], len(NAMES) + 1)
+
+    def test_unrecognised_exercise_suggests_similar_name(self):
+        json = {"date" : "2019-06-30",
+                "exercises" : [{"exercise name" : "Seated Rows", "reps": [8], "weights": [100]}]}
+        response = self.test_client.post('/api/sessions', headers={'Authorization': 'Bearer ' + self.token}, json=json)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json['message']['exercises'],
+                         "Exercise 'Seated Rows' not recognised - please add as an exercise - did you mean 'Seated Row'?")
@@ -0,0 +1,69 @@
+from base64 import b64encode
+from datetime import datetime
+import json
+import unittest
+import unittest.mock as mock
+
+from tests import BaseTestClass
+
+from app import db
+from app.archive import archive_sessions
+from app.models.exercise import Exercise
+
+class TestExportSessions(BaseTestClass, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.test_client.post('/api/register', json={'username': 'test', 'password': 'pass'})
+        self.token = self.test_client.get('/api/token',
+                                          headers={'Authorization': b'Basic ' + b64encode(b'test:pass')}) \
+                                     .json.get('token')
+
+        for ex in ['exercise1', 'exercise2', 'exercise3']:
+            db.session.add(Exercise(exercise_name=ex))
+        db.session.commit()
+
+    def add_sessions(self):
+        json1 = {"date" : "2019-05-31",
+                 "exercises" : [{"exercise name" : "exercise1", "reps": [8, 8, 8], "weights": [100, 100, 100]},
+                                {"exercise name" : "exercise2", "reps": [6, 5], "weights": [100, 100]},
+                                {"exercise name" : "exercise3", "reps": [12, 10, 8, 6], "weights": [120, 100, 80, 60]}]}
+
+        json2 = {"date" : "2019-06-30", "exercises" : []}
+
+        json3 = {"date" : "2019-07-31",
+                 "exercises" : [{"exercise name" : "exercise1", "reps": [8, 8, 8], "weights": [100, 100, 100]},
+                                {"exercise name" : "exercise2", "reps": [8, 7, 6], "weights": [100, 110, 120]}]}
+
+        for json_data in [json3, json1, json2]:
+            self.test_client.post('/api/sessions', headers={'Authorization': 'Bearer ' + self.token}, json=json_data)
+
+    def test_export_streams_one_session_per_line_matching_get_sessions(self):
+        self.add_sessions()
+        response = self.test_client.get('/api/sessions/export', headers={'Authorization': 'Bearer ' + self.token})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        self.assertTrue(response.is_streamed)
+
+        exported = [json.loads(line) for line in response.data.decode().splitlines()]
+        sessions = self.test_client.get('/api/sessions', headers={'Authorization': 'Bearer ' + self.token}).json
+        self.assertEqual(len(exported), 3)
+        self.assertEqual(exported, sessions)
+        self.assertEqual(exported[1]['session']['exercises'], [])
+
+    def test_export_with_no_sessions_is_empty(self):
+        response = self.test_client.get('/api/sessions/export', headers={'Authorization': 'Bearer ' + self.token})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, b'')
+
+    def test_export_pages_through_live_and_archived_sessions(self):
+        self.add_sessions()
+        archive_sessions(datetime(2019, 6, 1))
+        self.test_client.post('/api/sessions', headers={'Authorization': 'Bearer ' + self.token},
+                              json={"date" : "2019-05-30", "exercises" : []})
+        with mock.patch('app.resources.export.EXPORT_BATCH_SIZE', 1):
+            response = self.test_client.get('/api/sessions/export', headers={'Authorization': 'Bearer ' + self.token})
+            exported = [json.loads(line) for line in response.data.decode().splitlines()]
+        sessions = self.test_client.get('/api/sessions', headers={'Authorization': 'Bearer ' + self.token}).json
+        self.assertEqual(len(exported), 4)
+        self.assertEqual(exported, sessions)
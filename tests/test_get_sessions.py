@@ -1,7 +1,9 @@
 from base64 import b64encode
-from datetime import datetime
+from datetime import date, datetime, timedelta
 import unittest
 
+from sqlalchemy import event
+
 from tests import BaseTestClass
 
 from app import db
@@ -90,3 +92,112 @@ class TestGetRecord(BaseTestClass, unittest.TestCase):
         self.assertEqual(response.status_code, 400)
         self.assertEqual(response.json['message'],
                 "Bad date parameter provided '2019-06-29xxx' - could not be parsed in format 'YYYY-MM-DD'")
+
+
+class TestGetSessionsQueryCount(BaseTestClass, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.test_client.post('/api/register', json={'username': 'test', 'password': 'pass'})
+        self.token = self.test_client.get('/api/token',
+                                          headers={'Authorization': b'Basic ' + b64encode(b'test:pass')}) \
+                                     .json.get('token')
+
+        for ex in ['exercise1', 'exercise2', 'exercise3']:
+            db.session.add(Exercise(exercise_name=ex))
+        db.session.commit()
+
+        self.statements = 0
+        event.listen(db.engine, 'before_cursor_execute', self.count_statement)
+
+    def tearDown(self):
+        event.remove(db.engine, 'before_cursor_execute', self.count_statement)
+        super().tearDown()
+
+    def count_statement(self, *args):
+        self.statements += 1
+
+    def add_sessions(self, count, start=0):
+        for day in range(start, start + count):
+            json = {"date" : (date(2019, 1, 1) + timedelta(days=day)).isoformat(),
+                    "exercises" : [{"exercise name" : "exercise1", "reps": [8, 8, 8], "weights": [100, 100, 100]},
+                                   {"exercise name" : "exercise3", "reps": [12, 10], "weights": [60, 80]}]}
+            self.test_client.post('/api/sessions', headers={'Authorization': 'Bearer ' + self.token}, json=json)
+
+    def count_get_statements(self):
+        self.statements = 0
+        response = self.test_client.get('/api/sessions', headers={'Authorization': 'Bearer ' + self.token})
+        self.assertEqual(response.status_code, 200)
+        return self.statements, len(response.json)
+
+    def test_get_sessions_issues_constant_number_of_queries(self):
+        self.add_sessions(1)
+        statements_for_one, sessions = self.count_get_statements()
+        self.assertEqual(sessions, 1)
+
+        self.add_sessions(49, start=1)
+        statements_for_fifty, sessions = self.count_get_statements()
+        self.assertEqual(sessions, 50)
+
+        self.assertEqual(statements_for_one, statements_for_fifty)
+
+
+class TestGetSessionsPagination(BaseTestClass, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.test_client.post('/api/register', json={'username': 'test', 'password': 'pass'})
+        self.token = self.test_client.get('/api/token',
+                                          headers={'Authorization': b'Basic ' + b64encode(b'test:pass')}) \
+                                     .json.get('token')
+
+        db.session.add(Exercise(exercise_name='exercise1'))
+        db.session.commit()
+
+        self.dates = ['2019-05-31', '2019-06-30', '2019-07-31', '2019-08-31', '2019-09-30']
+        for session_date in self.dates:
+            json = {"date" : session_date,
+                    "exercises" : [{"exercise name" : "exercise1", "reps": [8, 8], "weights": [100, 100]}]}
+            self.test_client.post('/api/sessions', headers={'Authorization': 'Bearer ' + self.token}, json=json)
+
+    def get_sessions(self, query_string):
+        return self.test_client.get('/api/sessions', query_string=query_string,
+                                    headers={'Authorization': 'Bearer ' + self.token})
+
+    def session_dates(self, response):
+        return [datetime.strptime(s['session']['date'], '%a, %d %b %Y %H:%M:%S -0000').strftime('%Y-%m-%d')
+                for s in response.json]
+
+    def test_get_sessions_filters_by_date_range(self):
+        response = self.get_sessions({'from': '2019-06-30', 'to': '2019-08-31'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.session_dates(response), ['2019-06-30', '2019-07-31', '2019-08-31'])
+
+    def test_get_sessions_pages_through_all_sessions_with_cursor(self):
+        response = self.get_sessions({'limit': 2})
+        self.assertEqual(self.session_dates(response), self.dates[:2])
+        cursor = response.headers['X-Next-Cursor']
+
+        response = self.get_sessions({'limit': 2, 'cursor': cursor})
+        self.assertEqual(self.session_dates(response), self.dates[2:4])
+        cursor = response.headers['X-Next-Cursor']
+
+        response = self.get_sessions({'limit': 2, 'cursor': cursor})
+        self.assertEqual(self.session_dates(response), self.dates[4:])
+        self.assertNotIn('X-Next-Cursor', response.headers)
+
+    def test_get_sessions_pages_within_date_range(self):
+        response = self.get_sessions({'from': '2019-06-01', 'limit': 1})
+        self.assertEqual(self.session_dates(response), ['2019-06-30'])
+        response = self.get_sessions({'from': '2019-06-01', 'limit': 1,
+                                      'cursor': response.headers['X-Next-Cursor']})
+        self.assertEqual(self.session_dates(response), ['2019-07-31'])
+
+    def test_get_sessions_rejects_bad_cursor(self):
+        response = self.get_sessions({'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json['message']['cursor'], "Bad cursor parameter provided 'not-a-cursor'")
+
+    def test_get_sessions_rejects_out_of_range_limit(self):
+        response = self.get_sessions({'limit': 0})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,73 @@
+from base64 import b64encode
+import re
+import unittest
+
+from sqlalchemy import event
+
+from tests import BaseTestClass
+
+from app import db, sql_instrumentation
+from app.models.exercise import Exercise
+
+class TestSQLInstrumentation(BaseTestClass, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.test_client.post('/api/register', json={'username': 'test', 'password': 'pass'})
+        self.token = self.test_client.get('/api/token',
+                                          headers={'Authorization': b'Basic ' + b64encode(b'test:pass')}) \
+                                     .json.get('token')
+
+        for ex in ['exercise1', 'exercise2']:
+            db.session.add(Exercise(exercise_name=ex))
+        db.session.commit()
+
+        json = {"date" : "2019-06-30",
+                "exercises" : [{"exercise name" : "exercise1", "reps": [8, 8], "weights": [100, 100]}]}
+        self.test_client.post('/api/sessions', headers={'Authorization': 'Bearer ' + self.token}, json=json)
+
+    def server_timing(self, response):
+        match = re.fullmatch(r'db;dur=(\d+\.\d\d);desc="(\d+) statements"', response.headers['Server-Timing'])
+        self.assertIsNotNone(match, response.headers['Server-Timing'])
+        return float(match.group(1)), int(match.group(2))
+
+    def test_server_timing_header_counts_the_statements_of_the_request(self):
+        statements = []
+        def capture_statement(conn, cursor, statement, *args):
+            statements.append(statement)
+        event.listen(db.engine, 'before_cursor_execute', capture_statement)
+        response = self.test_client.get('/api/sessions', headers={'Authorization': 'Bearer ' + self.token})
+        event.remove(db.engine, 'before_cursor_execute', capture_statement)
+
+        duration, count = self.server_timing(response)
+        self.assertEqual(count, len(statements))
+        self.assertGreater(count, 0)
+        self.assertGreaterEqual(duration, 0)
+
+    def test_server_timing_header_is_added_to_unmatched_requests(self):
+        response = self.test_client.get('/api/unknown')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.server_timing(response)[1], 0)
+
+    def test_totals_are_kept_per_resource_method(self):
+        sql_instrumentation.reset()
+        for _ in range(3):
+            self.test_client.get('/api/sessions', headers={'Authorization': 'Bearer ' + self.token})
+        _, count = self.server_timing(self.test_client.post('/api/exercises',
+                                                            headers={'Authorization': 'Bearer ' + self.token},
+                                                            json={'exercises': ['exercise3']}))
+
+        stats = sql_instrumentation.stats()
+        self.assertEqual(list(stats), ['Exercises.post', 'Sessions.get'])
+        self.assertEqual(stats['Sessions.get']['requests'], 3)
+        self.assertGreaterEqual(stats['Sessions.get']['statements'], 3)
+        self.assertEqual(stats['Exercises.post'], {'requests': 1, 'statements': count, 'max statements': count,
+                                                   'db time ms': stats['Exercises.post']['db time ms']})
+
+    def test_totals_are_served_from_instrumentation(self):
+        sql_instrumentation.reset()
+        self.test_client.get('/api/sessions', headers={'Authorization': 'Bearer ' + self.token})
+        response = self.test_client.get('/api/instrumentation', headers={'Authorization': 'Bearer ' + self.token})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.json), ['Sessions.get'])
+        self.assertEqual(response.json['Sessions.get']['requests'], 1)
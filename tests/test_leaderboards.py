@@ -0,0 +1,123 @@
+from base64 import b64encode
+import unittest
+import unittest.mock as mock
+
+from tests import BaseTestClass
+
+from app import db, leaderboards
+from app.leaderboards import TopK
+from app.models.exercise import Exercise
+
+class TestTopK(unittest.TestCase):
+
+    def test_ranks_tied_values_alike(self):
+        board = TopK(3, [(1, 100), (2, 120), (3, 100), (4, 90)], complete=True)
+        self.assertEqual(board.top(10), [(1, 2, 120), (2, 1, 100), (2, 3, 100), (4, 4, 90)])
+        self.assertEqual(board.top(2), [(1, 2, 120), (2, 1, 100)])
+
+    def test_raise_value(self):
+        board = TopK(2, [(1, 100), (2, 90)], complete=True)
+        board.raise_value(2, 80)
+        self.assertEqual(board.top(10), [(1, 1, 100), (2, 2, 90)])
+        board.raise_value(2, 110)
+        self.assertEqual(board.top(10), [(1, 2, 110), (2, 1, 100)])
+
+        board.raise_value(3, 50)
+        self.assertEqual(board.top(10), [(1, 2, 110), (2, 1, 100)])
+        self.assertFalse(board.complete)
+
+    def test_users_tied_at_the_last_rank_are_kept_together(self):
+        board = TopK(2, [(1, 100), (2, 90), (3, 90)], complete=True)
+        board.raise_value(4, 95)
+        self.assertEqual(board.top(10), [(1, 1, 100), (2, 4, 95)])
+        self.assertFalse(board.complete)
+
+        # users below an incomplete board may have any value below it, so they can only join above its last value
+        board.raise_value(5, 94)
+        self.assertEqual(board.top(10), [(1, 1, 100), (2, 4, 95)])
+        board.raise_value(5, 95)
+        self.assertEqual(board.top(10), [(1, 1, 100), (2, 4, 95), (2, 5, 95)])
+
+
+class TestLeaderboards(BaseTestClass, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        for ex in ['exercise1', 'exercise2']:
+            db.session.add(Exercise(exercise_name=ex))
+        db.session.commit()
+
+        self.tokens = {}
+        for username in ('ann', 'bob', 'cat'):
+            self.test_client.post('/api/register', json={'username': username, 'password': 'pass'})
+            self.tokens[username] = self.test_client.get('/api/token', headers={
+                                        'Authorization': b'Basic ' + b64encode(f'{username}:pass'.encode())}) \
+                                                    .json.get('token')
+
+        self.post_session('ann', '2019-05-31', [8, 3], [100, 120])
+        self.post_session('bob', '2019-05-31', [5], [110])
+        self.post_session('cat', '2019-05-31', [1], [120])
+
+    def post_session(self, username, session_date, reps, weights, exercise_name='exercise1'):
+        response = self.test_client.post('/api/sessions', headers={'Authorization': 'Bearer ' + self.tokens[username]},
+                                         json={'date': session_date,
+                                               'exercises': [{'exercise name': exercise_name,
+                                                              'reps': reps, 'weights': weights}]})
+        self.assertEqual(response.status_code, 201)
+
+    def leaderboard(self, query='', exercise_name='exercise1'):
+        return self.test_client.get(f'/api/leaderboards/{exercise_name}{query}',
+                                    headers={'Authorization': 'Bearer ' + self.tokens['ann']})
+
+    def test_leaderboard_by_max_weight(self):
+        response = self.leaderboard()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json, [{'rank': 1, 'username': 'ann', 'max weight': 120},
+                                         {'rank': 1, 'username': 'cat', 'max weight': 120},
+                                         {'rank': 3, 'username': 'bob', 'max weight': 110}])
+
+    def test_leaderboard_by_estimated_1rm(self):
+        response = self.leaderboard('?metric=estimated_1rm&limit=2')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json, [{'rank': 1, 'username': 'ann', 'estimated 1rm': 132.0},
+                                         {'rank': 2, 'username': 'bob', 'estimated 1rm': 128.33333333333334}])
+
+    def test_new_records_update_the_cached_leaderboard(self):
+        self.leaderboard()
+        with mock.patch.object(leaderboards, 'compute', wraps=leaderboards.compute) as compute:
+            self.post_session('bob', '2019-06-30', [1], [130])
+            self.assertEqual([entry['username'] for entry in self.leaderboard().json], ['bob', 'ann', 'cat'])
+            self.assertEqual(compute.call_count, 0)
+
+    def test_deletes_recompute_the_leaderboard(self):
+        self.post_session('bob', '2019-06-30', [1], [130])
+        self.assertEqual(self.leaderboard().json[0]['username'], 'bob')
+        response = self.test_client.delete('/api/sessions/2019-06-30',
+                                           headers={'Authorization': 'Bearer ' + self.tokens['bob']})
+        self.assertEqual(response.status_code, 201)
+        with mock.patch.object(leaderboards, 'compute', wraps=leaderboards.compute) as compute:
+            self.assertEqual([entry['username'] for entry in self.leaderboard().json], ['ann', 'cat', 'bob'])
+            self.assertEqual(compute.call_count, 1)
+
+    def test_rolled_back_records_are_not_applied(self):
+        self.leaderboard()
+        with mock.patch('app.resources.sessions.log_created', side_effect=Exception('log failed')):
+            response = self.test_client.post('/api/sessions', headers={'Authorization': 'Bearer ' + self.tokens['bob']},
+                                             json={'date': '2019-06-30',
+                                                   'exercises': [{'exercise name': 'exercise1',
+                                                                  'reps': [1], 'weights': [130]}]})
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(self.leaderboard().json[0]['max weight'], 120)
+
+    def test_exercise_nobody_performed(self):
+        self.assertEqual(self.leaderboard(exercise_name='exercise2').json, [])
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.leaderboard(exercise_name='exercise3').status_code, 404)
+        self.assertEqual(self.leaderboard('?metric=reps').status_code, 400)
+        self.assertEqual(self.leaderboard('?limit=0').status_code, 400)
+        self.assertEqual(self.leaderboard('?limit=101').status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
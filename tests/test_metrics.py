@@ -0,0 +1,89 @@
+from base64 import b64encode
+import os
+import tempfile
+import unittest
+
+from prometheus_client import REGISTRY
+import sqlalchemy
+
+from tests import BaseTestClass
+
+from app import db
+from app.metrics import InstrumentedQueuePool
+from app.models.user import User
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class TestMetrics(BaseTestClass, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.test_client.post('/api/register', json={'username': 'test', 'password': 'pass'})
+
+    def get_token(self, password):
+        credentials = b64encode(f'test:{password}'.encode())
+        return self.test_client.get('/api/token', headers={'Authorization': b'Basic ' + credentials})
+
+    def test_request_latency_is_recorded_per_route_method_and_status(self):
+        labels = {'route': '/api/sessions/<session_date>', 'method': 'GET', 'status': '401'}
+        count = sample('http_request_duration_seconds_count', **labels)
+        self.test_client.get('/api/sessions/2019-06-30')
+        self.test_client.get('/api/sessions/2019-07-31')
+        self.assertEqual(sample('http_request_duration_seconds_count', **labels), count + 2)
+
+        count = sample('http_request_duration_seconds_count', route='unmatched', method='GET', status='404')
+        self.test_client.get('/api/unknown')
+        self.assertEqual(sample('http_request_duration_seconds_count', route='unmatched', method='GET', status='404'),
+                         count + 1)
+
+    def test_no_requests_remain_in_flight(self):
+        self.test_client.get('/api/exercises')
+        self.assertEqual(sample('http_requests_in_flight'), 0)
+
+    def test_auth_outcomes_are_counted(self):
+        before = {outcome: sample('auth_attempts_total', scheme='password', outcome=outcome)
+                  for outcome in ('success', 'failure')}
+        token = self.get_token('pass').json['token']
+        self.get_token('wrong')
+        self.assertEqual(sample('auth_attempts_total', scheme='password', outcome='success'), before['success'] + 1)
+        self.assertEqual(sample('auth_attempts_total', scheme='password', outcome='failure'), before['failure'] + 1)
+
+        before = {outcome: sample('auth_attempts_total', scheme='token', outcome=outcome)
+                  for outcome in ('success', 'unknown', 'expired')}
+        self.test_client.get('/api/exercises', headers={'Authorization': 'Bearer ' + token})
+        self.test_client.get('/api/exercises', headers={'Authorization': 'Bearer invalid_token'})
+        user = User.query.filter_by(username='test').first()
+        user.set_token(expires_in=-1)
+        db.session.commit()
+        self.test_client.get('/api/exercises', headers={'Authorization': 'Bearer ' + user.access_token})
+        self.assertEqual(sample('auth_attempts_total', scheme='token', outcome='success'), before['success'] + 1)
+        self.assertEqual(sample('auth_attempts_total', scheme='token', outcome='unknown'), before['unknown'] + 1)
+        self.assertEqual(sample('auth_attempts_total', scheme='token', outcome='expired'), before['expired'] + 1)
+
+    def test_metrics_are_served_in_prometheus_text_format(self):
+        self.test_client.get('/api/exercises')
+        response = self.test_client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain'))
+        body = response.get_data(as_text=True)
+        self.assertIn('http_request_duration_seconds_bucket{', body)
+        self.assertIn('route="/api/exercises"', body)
+        self.assertIn('auth_attempts_total{', body)
+
+
+class TestInstrumentedQueuePool(unittest.TestCase):
+
+    def test_checkouts_record_wait_time_and_pool_size(self):
+        with tempfile.TemporaryDirectory() as directory:
+            engine = sqlalchemy.create_engine('sqlite:///' + os.path.join(directory, 'pool.db'),
+                                              poolclass=InstrumentedQueuePool, pool_size=3)
+            checkouts = sample('db_pool_checkout_wait_seconds_count')
+            conn = engine.connect()
+            self.assertEqual(sample('db_pool_size'), 3)
+            self.assertEqual(sample('db_pool_checked_out'), 1)
+            conn.close()
+            self.assertEqual(sample('db_pool_checked_out'), 0)
+            self.assertEqual(sample('db_pool_checkout_wait_seconds_count'), checkouts + 1)
+            engine.dispose()
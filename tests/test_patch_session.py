@@ -0,0 +1,169 @@
+from base64 import b64encode
+from datetime import datetime
+import unittest
+
+from tests import BaseTestClass
+
+from app import db
+from app.archive import archive_sessions
+from app.models.exercise import Exercise
+from app.models.exercise_sets import ExerciseSets
+from app.models.gym_record import GymRecord
+from app.models.session_change import SessionChange
+
+class TestPatchSession(BaseTestClass, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.test_client.post('/api/register', json={'username': 'test', 'password': 'pass'})
+        self.token = self.test_client.get('/api/token',
+                                          headers={'Authorization': b'Basic ' + b64encode(b'test:pass')}) \
+                                     .json.get('token')
+
+        for ex in ['exercise1', 'exercise2', 'exercise3']:
+            db.session.add(Exercise(exercise_name=ex))
+        db.session.commit()
+
+    def post_sessions(self):
+        json1 = {"date" : "2019-05-31",
+                 "exercises" : [{"exercise name" : "exercise2", "reps": [6, 5], "weights": [100, 102.5]},
+                                {"exercise name" : "exercise1", "reps": [8, 8, 8], "weights": [100, 100, 100]},
+                                {"exercise name" : "exercise2", "reps": [3], "weights": [110]}]}
+        json2 = {"date" : "2019-06-30",
+                 "exercises" : [{"exercise name" : "exercise1", "reps": [8, 7], "weights": [105, 105]}]}
+        for json in (json1, json2):
+            response = self.test_client.post('/api/sessions', headers={'Authorization': 'Bearer ' + self.token},
+                                             json=json)
+            self.assertEqual(response.status_code, 201)
+
+    def patch(self, session_date, json):
+        return self.test_client.patch(f'/api/sessions/{session_date}',
+                                      headers={'Authorization': 'Bearer ' + self.token}, json=json)
+
+    def session(self, session_date):
+        session = self.test_client.get(f'/api/sessions/{session_date}',
+                                       headers={'Authorization': 'Bearer ' + self.token}).json[0]['session']
+        return {exercise: list(zip(reps, weights))
+                for exercise, reps, weights in zip(session['exercises'], session['reps'], session['weights'])}
+
+    def records(self):
+        return {record['exercise name']: record['max weight']
+                for record in self.test_client.get('/api/records',
+                                                   headers={'Authorization': 'Bearer ' + self.token}).json}
+
+    def in_each_layout(self, test):
+        for layout in ('rows', 'packed'):
+            with self.subTest(layout=layout):
+                self.tearDown()
+                self.setUp()
+                self.app.config['SET_STORAGE'] = layout
+                self.post_sessions()
+                test()
+
+    def test_append_sets(self):
+        def test():
+            response = self.patch('2019-06-30', {'add': [{'exercise name': 'exercise1', 'reps': [5], 'weights': [110]},
+                                                         {'exercise name': 'exercise3', 'reps': [10], 'weights': [20]}]})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json['personal records'],
+                             [{'max weight': 110, 'exercise name': 'exercise1'}])
+            self.assertEqual(self.session('2019-06-30'), {'exercise1': [(8, 105), (7, 105), (5, 110)],
+                                                          'exercise3': [(10, 20)]})
+            self.assertEqual(self.records(), {'exercise1': 110, 'exercise2': 110, 'exercise3': 20})
+        self.in_each_layout(test)
+
+    def test_append_only_writes_new_rows(self):
+        self.post_sessions()
+        before = [(record.record_id, record.reps, record.weight) for record in GymRecord.query.order_by(GymRecord.record_id)]
+        self.patch('2019-05-31', {'add': [{'exercise name': 'exercise2', 'reps': [2], 'weights': [115]}]})
+        after = [(record.record_id, record.reps, record.weight) for record in GymRecord.query.order_by(GymRecord.record_id)]
+        self.assertEqual(after, before + [(before[-1][0] + 1, 2, 115)])
+
+    def test_update_and_remove(self):
+        def test():
+            response = self.patch('2019-05-31', {'remove': ['exercise1'],
+                                                 'update': [{'exercise name': 'exercise2', 'set': 2, 'weight': 90},
+                                                            {'exercise name': 'exercise2', 'set': 0, 'reps': 7}]})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json['personal records'], [])
+            self.assertEqual(self.session('2019-05-31'), {'exercise2': [(7, 100), (5, 102), (3, 90)]})
+            # the records of the exercises changed are rebuilt from what is left
+            self.assertEqual(self.records(), {'exercise1': 105, 'exercise2': 102.5})
+        self.in_each_layout(test)
+
+    def test_remove_and_add_the_same_exercise(self):
+        def test():
+            response = self.patch('2019-06-30', {'remove': ['exercise1'],
+                                                 'add': [{'exercise name': 'exercise1', 'reps': [1], 'weights': [120]}]})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(self.session('2019-06-30'), {'exercise1': [(1, 120)]})
+        self.in_each_layout(test)
+
+    def test_packed_layout_repacks_only_the_exercises_changed(self):
+        self.app.config['SET_STORAGE'] = 'packed'
+        self.post_sessions()
+        before = {row.record_id: (row.reps, row.weights) for row in ExerciseSets.query}
+        self.patch('2019-05-31', {'update': [{'exercise name': 'exercise2', 'set': 1, 'reps': 4}]})
+        after = {row.record_id: (row.reps, row.weights) for row in ExerciseSets.query}
+        self.assertEqual(after.keys(), before.keys())
+        self.assertEqual(len([record_id for record_id in before if after[record_id] != before[record_id]]), 1)
+
+    def test_patch_archived_session(self):
+        self.post_sessions()
+        archive_sessions(datetime(2019, 6, 1))
+        response = self.patch('2019-05-31', {'update': [{'exercise name': 'exercise1', 'set': 1, 'weight': 130}],
+                                             'add': [{'exercise name': 'exercise3', 'reps': [5], 'weights': [50]}]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.session('2019-05-31'), {'exercise1': [(8, 100), (8, 130), (8, 100)],
+                                                      'exercise2': [(6, 100), (5, 102), (3, 110)],
+                                                      'exercise3': [(5, 50)]})
+        self.assertEqual(self.records(), {'exercise1': 130, 'exercise2': 110, 'exercise3': 50})
+
+    def test_patch_is_logged_as_a_change(self):
+        self.post_sessions()
+        self.patch('2019-05-31', {'add': [{'exercise name': 'exercise3', 'reps': [5], 'weights': [50]}]})
+        change = SessionChange.query.order_by(SessionChange.change_id.desc()).first()
+        self.assertEqual((change.date, change.operation), (datetime(2019, 5, 31), 'created'))
+
+    def test_invalid_patches(self):
+        self.post_sessions()
+        cases = [('2019-05-30', {'add': [{'exercise name': 'exercise1', 'reps': [5], 'weights': [50]}]},
+                  "Session for user 'test' on '2019-05-30' not found"),
+                 ('2019-05-31', {}, "One or more of 'remove', 'update' and 'add' must be provided to update a session"),
+                 ('2019-05-31', {'remove': ['exercise3']}, "Exercise 'exercise3' not in session for user 'test' on '2019-05-31'"),
+                 ('2019-05-31', {'update': [{'exercise name': 'exercise1', 'set': 3, 'reps': 1}]},
+                  "Set 3 of exercise 'exercise1' not in session for user 'test' on '2019-05-31'"),
+                 ('2019-05-31', {'remove': ['exercise1'], 'update': [{'exercise name': 'exercise1', 'set': 0, 'reps': 1}]},
+                  "Set 0 of exercise 'exercise1' not in session for user 'test' on '2019-05-31'")]
+        for session_date, json, message in cases:
+            with self.subTest(json=json):
+                response = self.patch(session_date, json)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json['message'], message)
+
+        cases = [({'remove': 'exercise1'}, {'remove': "'remove' must be a list of exercise names"}),
+                 ({'remove': [['exercise1']]}, {'remove': "'remove' must be a list of exercise names"}),
+                 ({'update': {'exercise name': 'exercise1', 'set': 0, 'reps': 1}},
+                  {'update': "'update' must be a list of sets"}),
+                 ({'update': [{'exercise name': ['exercise1'], 'set': 0, 'reps': 1}]},
+                  {'update': "'exercise name' must be a string, not ['exercise1']"})]
+        for json, message in cases:
+            with self.subTest(json=json):
+                response = self.patch('2019-05-31', json)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json['message'], message)
+
+        for json in ({'remove': ['exercise4']},
+                     {'update': [{'exercise name': 'exercise1', 'set': 0}]},
+                     {'add': [{'exercise name': 'exercise1', 'reps': [5]}]},
+                     {'replace': []}):
+            with self.subTest(json=json):
+                self.assertEqual(self.patch('2019-05-31', json).status_code, 400)
+        self.assertEqual(self.patch('bad-date', {'remove': ['exercise1']}).status_code, 400)
+        self.assertEqual(self.test_client.patch('/api/sessions', headers={'Authorization': 'Bearer ' + self.token},
+                                                json={}).status_code, 405)
+        self.assertEqual(GymRecord.query.count(), 8)
+
+
+if __name__ == "__main__":
+    unittest.main()
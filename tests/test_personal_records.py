@@ -0,0 +1,95 @@
+from base64 import b64encode
+import unittest
+
+from tests import BaseTestClass
+
+from app import db
+from app.models.exercise import Exercise
+
+class TestPersonalRecords(BaseTestClass, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.test_client.post('/api/register', json={'username': 'test', 'password': 'pass'})
+        self.token = self.test_client.get('/api/token',
+                                          headers={'Authorization': b'Basic ' + b64encode(b'test:pass')}) \
+                                     .json.get('token')
+
+        for ex in ['exercise1', 'exercise2']:
+            db.session.add(Exercise(exercise_name=ex))
+        db.session.commit()
+
+        self.json1 = {"date" : "2019-05-31",
+                      "exercises" : [{"exercise name" : "exercise1", "reps": [8, 8, 6], "weights": [100, 100, 110]},
+                                     {"exercise name" : "exercise2", "reps": [10, 10], "weights": [50, 50]}]}
+
+        self.json2 = {"date" : "2019-06-30",
+                      "exercises" : [{"exercise name" : "exercise1", "reps": [10, 5], "weights": [100, 120]},
+                                     {"exercise name" : "exercise2", "reps": [8], "weights": [50]}]}
+
+    def post_session(self, json):
+        return self.test_client.post('/api/sessions', headers={'Authorization': 'Bearer ' + self.token}, json=json)
+
+    def get_records(self):
+        response = self.test_client.get('/api/records', headers={'Authorization': 'Bearer ' + self.token})
+        self.assertEqual(response.status_code, 200)
+        return {record['exercise name']: record for record in response.json}
+
+    def test_first_session_sets_records_without_reporting_them(self):
+        response = self.post_session(self.json1)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json['personal records'], [])
+
+        records = self.get_records()
+        self.assertEqual(records['exercise1']['max weight'], 110)
+        self.assertAlmostEqual(records['exercise1']['estimated 1rm'], 110 * (1 + 6 / 30))
+        self.assertEqual(records['exercise1']['last performed'], 'Fri, 31 May 2019 00:00:00 -0000')
+        self.assertEqual(records['exercise1']['reps at weight'], [{'weight': 100, 'reps': 8},
+                                                                  {'weight': 110, 'reps': 6}])
+        self.assertEqual(records['exercise2']['reps at weight'], [{'weight': 50, 'reps': 10}])
+
+    def test_post_reports_records_beaten(self):
+        self.post_session(self.json1)
+        response = self.post_session(self.json2)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json['personal records'],
+                         [{'exercise name': 'exercise1',
+                           'max weight': 120,
+                           'estimated 1rm': 140,
+                           'reps at weight': [{'weight': 100, 'reps': 10}]}])
+
+        records = self.get_records()
+        self.assertEqual(records['exercise1']['max weight'], 120)
+        self.assertEqual(records['exercise1']['last performed'], 'Sun, 30 Jun 2019 00:00:00 -0000')
+        self.assertEqual(records['exercise1']['reps at weight'], [{'weight': 100, 'reps': 10},
+                                                                  {'weight': 110, 'reps': 6},
+                                                                  {'weight': 120, 'reps': 5}])
+        self.assertEqual(records['exercise2']['reps at weight'], [{'weight': 50, 'reps': 10}])
+
+    def test_deleting_record_holder_rebuilds_records(self):
+        self.post_session(self.json1)
+        self.post_session(self.json2)
+        self.test_client.delete('/api/sessions/2019-06-30', headers={'Authorization': 'Bearer ' + self.token})
+
+        records = self.get_records()
+        self.assertEqual(records['exercise1']['max weight'], 110)
+        self.assertAlmostEqual(records['exercise1']['estimated 1rm'], 110 * (1 + 6 / 30))
+        self.assertEqual(records['exercise1']['last performed'], 'Fri, 31 May 2019 00:00:00 -0000')
+        self.assertEqual(records['exercise1']['reps at weight'], [{'weight': 100, 'reps': 8},
+                                                                  {'weight': 110, 'reps': 6}])
+
+    def test_deleting_only_session_removes_records(self):
+        self.post_session(self.json1)
+        self.test_client.delete('/api/sessions/2019-05-31', headers={'Authorization': 'Bearer ' + self.token})
+        self.assertEqual(self.get_records(), {})
+
+    def test_deleting_session_holding_no_records_leaves_records_untouched(self):
+        self.post_session(self.json1)
+        self.post_session(self.json2)
+        self.post_session({"date" : "2019-04-30",
+                           "exercises" : [{"exercise name" : "exercise2", "reps": [5], "weights": [40]}]})
+        before = self.get_records()
+        self.test_client.delete('/api/sessions/2019-04-30', headers={'Authorization': 'Bearer ' + self.token})
+        after = self.get_records()
+        self.assertEqual(after['exercise1'], before['exercise1'])
+        self.assertEqual(after['exercise2']['reps at weight'], [{'weight': 50, 'reps': 10}])
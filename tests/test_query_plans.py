@@ -0,0 +1,83 @@
+from base64 import b64encode
+import unittest
+
+from sqlalchemy import event
+
+from tests import BaseTestClass
+
+from app import db, leaderboards
+from app.models.exercise import Exercise
+from python_helper_functions.create_views import AGGREGATED_DATA_QUERY
+
+class TestQueryPlans(BaseTestClass, unittest.TestCase):
+    """Check with EXPLAIN QUERY PLAN that the hot queries read gym_records through an index"""
+
+    def setUp(self):
+        super().setUp()
+        self.test_client.post('/api/register', json={'username': 'test', 'password': 'pass'})
+        self.token = self.test_client.get('/api/token',
+                                          headers={'Authorization': b'Basic ' + b64encode(b'test:pass')}) \
+                                     .json.get('token')
+
+        for ex in ['exercise1', 'exercise2', 'exercise3']:
+            db.session.add(Exercise(exercise_name=ex))
+        db.session.commit()
+
+        for session_date in ['2019-05-31', '2019-06-30']:
+            json = {"date" : session_date,
+                    "exercises" : [{"exercise name" : "exercise1", "reps": [8, 8, 8], "weights": [100, 100, 100]},
+                                   {"exercise name" : "exercise3", "reps": [12, 10], "weights": [120, 100]}]}
+            self.test_client.post('/api/sessions', headers={'Authorization': 'Bearer ' + self.token}, json=json)
+
+        self.statements = []
+        event.listen(db.engine, 'before_cursor_execute', self.capture_statement)
+
+    def tearDown(self):
+        event.remove(db.engine, 'before_cursor_execute', self.capture_statement)
+        super().tearDown()
+
+    def capture_statement(self, conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT') and 'gym_records' in statement:
+            self.statements.append((statement, parameters))
+
+    def query_plan(self, statement, parameters=()):
+        with db.engine.connect() as conn:
+            return [row[-1] for row in conn.execute('EXPLAIN QUERY PLAN ' + statement, parameters)]
+
+    def assertUsesIndex(self, plan, index_name):
+        gym_records_steps = [step for step in plan if 'gym_records' in step]
+        self.assertTrue(gym_records_steps, plan)
+        for step in gym_records_steps:
+            self.assertIn(index_name, step, plan)
+
+    def test_get_sessions_reads_records_by_session_index(self):
+        self.test_client.get('/api/sessions', headers={'Authorization': 'Bearer ' + self.token})
+        self.assertTrue(self.statements)
+        for statement, parameters in self.statements:
+            self.assertUsesIndex(self.query_plan(statement, parameters), 'ix_gym_records_session_id_exercise_id')
+
+    def test_delete_session_reads_records_by_index(self):
+        self.test_client.delete('/api/sessions/2019-06-30', headers={'Authorization': 'Bearer ' + self.token})
+        self.assertTrue(self.statements)
+        for statement, parameters in self.statements:
+            self.assertUsesIndex(self.query_plan(statement, parameters), 'INDEX ix_gym_records_')
+
+    def test_aggregated_data_view_for_user_reads_records_by_index(self):
+        plan = self.query_plan(f'SELECT * FROM ({AGGREGATED_DATA_QUERY}) WHERE username = ?', ('test',))
+        self.assertUsesIndex(plan, 'COVERING INDEX ix_gym_records_session_id_exercise_id')
+
+    def test_records_by_exercise_read_by_exercise_index(self):
+        plan = self.query_plan('SELECT session_id, reps, weight FROM gym_records WHERE exercise_id = ?', (1,))
+        self.assertUsesIndex(plan, 'COVERING INDEX ix_gym_records_exercise_id_session_id')
+
+    def test_leaderboard_reads_personal_records_by_exercise_index(self):
+        statements = []
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            statements.append((statement, parameters))
+        event.listen(db.engine, 'before_cursor_execute', capture)
+        try:
+            leaderboards.compute(1, 'estimated_1rm')
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', capture)
+        plan = self.query_plan(*statements[-1])
+        self.assertIn('USING INDEX ix_personal_records_exercise_id (exercise_id=?)', ' '.join(plan))
@@ -0,0 +1,158 @@
+from base64 import b64encode
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from sqlalchemy import event
+
+from tests import TestConfig
+
+from app import create_app, db
+from app.models.exercise import Exercise
+
+class TestReadReplica(unittest.TestCase):
+    """Two SQLite files stand in for the primary and its replica, replicated by copying one over the other"""
+
+    read_your_writes = True
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.primary = os.path.join(self.directory, 'primary.db')
+        self.replica = os.path.join(self.directory, 'replica.db')
+        config = type('ReplicaTestConfig', (TestConfig,), {'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + self.primary,
+                                                           'SQLALCHEMY_REPLICA_URI': 'sqlite:///' + self.replica,
+                                                           'REPLICA_READ_YOUR_WRITES': self.read_your_writes})
+        self.app = create_app(config)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.test_client = self.app.test_client()
+        db.create_all()
+
+        self.test_client.post('/api/register', json={'username': 'test', 'password': 'pass'})
+        self.token = self.get_token()
+        for ex in ['exercise1', 'exercise2']:
+            db.session.add(Exercise(exercise_name=ex))
+        db.session.commit()
+        self.post_session('2019-05-31')
+        self.replicate()
+
+    def tearDown(self):
+        db.session.remove()
+        self.app_context.pop()
+        for bind in (None, 'replica'):
+            db.get_engine(self.app, bind).dispose()
+        shutil.rmtree(self.directory)
+
+    def replicate(self):
+        db.session.remove()
+        db.get_engine(self.app, 'replica').dispose()
+        with sqlite3.connect(self.primary) as source, sqlite3.connect(self.replica) as target:
+            source.backup(target)
+
+    def get_token(self):
+        return self.test_client.get('/api/token', headers={'Authorization': b'Basic ' + b64encode(b'test:pass')}) \
+                               .json.get('token')
+
+    def post_session(self, session_date):
+        json = {"date" : session_date,
+                "exercises" : [{"exercise name" : "exercise1", "reps": [8, 8], "weights": [100, 100]}]}
+        response = self.test_client.post('/api/sessions', headers={'Authorization': 'Bearer ' + self.token},
+                                         json=json)
+        self.assertEqual(response.status_code, 201)
+
+    def get(self, url):
+        statements = {'primary': [], 'replica': []}
+        engines = {'primary': db.get_engine(self.app), 'replica': db.get_engine(self.app, 'replica')}
+        listeners = {name: lambda conn, cursor, statement, *args, name=name: statements[name].append(statement)
+                     for name in engines}
+        for name, engine in engines.items():
+            event.listen(engine, 'before_cursor_execute', listeners[name])
+        response = self.test_client.get(url, headers={'Authorization': 'Bearer ' + self.token})
+        for name, engine in engines.items():
+            event.remove(engine, 'before_cursor_execute', listeners[name])
+        return response, statements
+
+    def reads(self, statements, table):
+        return [s for s in statements if s.startswith('SELECT') and f'FROM {table}' in s]
+
+    def test_get_sessions_reads_from_replica(self):
+        response, statements = self.get('/api/sessions')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json), 1)
+        self.assertTrue(self.reads(statements['replica'], 'sessions'))
+        self.assertFalse(self.reads(statements['primary'], 'sessions'))
+        self.assertFalse(self.reads(statements['primary'], 'gym_records'))
+
+    def test_records_and_volume_read_from_replica(self):
+        for url in ('/api/records', '/api/analytics/volume'):
+            response, statements = self.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.json), 1)
+            self.assertTrue(statements['replica'])
+
+    def test_exercises_served_match_their_etag(self):
+        # added through another worker, and not yet replicated
+        with sqlite3.connect(self.primary) as primary:
+            primary.execute("INSERT INTO exercises (exercise_name) VALUES ('exercise3')")
+        response, _ = self.get('/api/exercises')
+        self.assertEqual(response.json, ['exercise1', 'exercise2', 'exercise3'])
+        self.replicate()
+        self.assertEqual(self.get('/api/exercises')[0].headers['ETag'], response.headers['ETag'])
+
+    def test_leaderboard_names_users_not_yet_replicated(self):
+        self.assertEqual(self.get('/api/leaderboards/exercise1')[0].status_code, 200)
+        # a user registered and raised into the cached board by this process, and not yet replicated
+        self.test_client.post('/api/register', json={'username': 'other', 'password': 'pass'})
+        token = self.test_client.get('/api/token', headers={'Authorization': b'Basic ' + b64encode(b'other:pass')}) \
+                                .json.get('token')
+        json = {"date" : "2019-06-01", "exercises" : [{"exercise name" : "exercise1", "reps": [1], "weights": [200]}]}
+        response = self.test_client.post('/api/sessions', headers={'Authorization': 'Bearer ' + token}, json=json)
+        self.assertEqual(response.status_code, 201)
+        response, _ = self.get('/api/leaderboards/exercise1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([entry['username'] for entry in response.json], ['other', 'test'])
+
+    def test_tokens_are_verified_on_primary(self):
+        self.token = self.get_token()
+        response, statements = self.get('/api/sessions')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(self.reads(statements['primary'], 'users'))
+
+    def test_writes_go_to_primary(self):
+        self.post_session('2019-06-30')
+        with sqlite3.connect(self.primary) as primary, sqlite3.connect(self.replica) as replica:
+            self.assertEqual(primary.execute('SELECT COUNT(*) FROM sessions').fetchone(), (2,))
+            self.assertEqual(replica.execute('SELECT COUNT(*) FROM sessions').fetchone(), (1,))
+
+    def test_users_read_their_own_writes_before_they_are_replicated(self):
+        self.post_session('2019-06-30')
+        response, statements = self.get('/api/sessions')
+        self.assertEqual(len(response.json), 2)
+        self.assertFalse(self.reads(statements['replica'], 'sessions'))
+
+        self.replicate()
+        response, statements = self.get('/api/sessions')
+        self.assertEqual(len(response.json), 2)
+        self.assertTrue(self.reads(statements['replica'], 'sessions'))
+
+
+class TestReadReplicaWithoutReadYourWrites(TestReadReplica):
+
+    read_your_writes = False
+
+    def test_users_read_their_own_writes_before_they_are_replicated(self):
+        self.post_session('2019-06-30')
+        response, statements = self.get('/api/sessions')
+        self.assertEqual(len(response.json), 1)
+        self.assertTrue(self.reads(statements['replica'], 'sessions'))
+
+    def test_analytics_are_not_memoized_against_versions_the_replica_lacks(self):
+        self.post_session('2019-06-30')
+        for url in ('/api/analytics/volume', '/api/analytics/progress/exercise1'):
+            with self.subTest(url=url):
+                self.assertEqual(self.get(url)[0].status_code, 200)
+        self.replicate()
+        self.assertEqual(len(self.get('/api/analytics/volume')[0].json), 2)
+        self.assertEqual(self.get('/api/analytics/progress/exercise1')[0].json['sessions'], 2)
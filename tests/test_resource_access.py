@@ -1,6 +1,13 @@
 from base64 import b64encode
+from datetime import datetime, timedelta
+from time import monotonic
 import unittest
+import unittest.mock as mock
 
+from flask import current_app
+from sqlalchemy import event
+
+from app import db
 from app.models.user import User
 from tests import BaseTestClass
 
@@ -44,6 +51,77 @@ class TestGetTokenAccess(BaseTestClass, unittest.TestCase):
         self.assertTrue('token' in response.json)
 
 
+class TestTokenCacheAccess(BaseTestClass, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.test_client.post('/api/register', json={"username": "test", "password": "pass"})
+
+    def get_token(self):
+        return self.test_client.get('/api/token',
+                headers={'Authorization': b'Basic ' + b64encode(b'test:pass')}).json['token']
+
+    def get_exercises(self, token):
+        return self.test_client.get('/api/exercises', headers={'Authorization': 'Bearer ' + token})
+
+    def test_repeat_requests_are_served_from_token_cache(self):
+        token = self.get_token()
+        self.assertEqual(self.get_exercises(token).status_code, 200)
+        self.assertEqual(self.get_exercises(token).status_code, 200)
+        self.assertEqual(current_app.extensions['token_cache'].stats(), {'size': 1, 'hits': 1, 'misses': 1})
+
+    def test_cached_tokens_authenticate_without_querying_users(self):
+        token = self.get_token()
+        engine = db.engine
+        statements = []
+        def before_cursor_execute(conn, cursor, statement, *args):
+            statements.append(statement)
+        # each request gets an app context of its own, as in production, rather than sharing the test's
+        self.app_context.pop()
+        event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            self.assertEqual(self.get_exercises(token).status_code, 200)
+            self.assertTrue(any('FROM users' in statement for statement in statements))
+            del statements[:]
+            self.assertEqual(self.get_exercises(token).status_code, 200)
+        finally:
+            event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+            self.app_context.push()
+        self.assertEqual([statement for statement in statements if 'FROM users' in statement], [])
+
+    def test_issuing_new_token_invalidates_cached_token(self):
+        old_token = self.get_token()
+        self.assertEqual(self.get_exercises(old_token).status_code, 200)
+        new_token = self.get_token()
+        self.assertEqual(self.get_exercises(old_token).status_code, 401)
+        self.assertEqual(self.get_exercises(new_token).status_code, 200)
+
+    def test_replaced_token_is_rejected_once_its_cache_entry_expires(self):
+        old_token = self.get_token()
+        self.assertEqual(self.get_exercises(old_token).status_code, 200)
+        # re-issued by another worker, whose token cache this one does not share
+        user = User.query.first()
+        user.set_token()
+        db.session.commit()
+        self.assertEqual(self.get_exercises(old_token).status_code, 200)
+        with mock.patch('app.cache.monotonic', return_value=monotonic() + 61):
+            self.assertEqual(self.get_exercises(old_token).status_code, 401)
+
+    def test_expired_token_is_rejected_even_if_cached(self):
+        token = self.get_token()
+        self.assertEqual(self.get_exercises(token).status_code, 200)
+        current_app.extensions['token_cache'].set(token, (1, 'test', datetime.utcnow() - timedelta(seconds=1)))
+        self.assertEqual(self.get_exercises(token).status_code, 401)
+
+    def test_cached_user_is_loaded_on_first_use(self):
+        token = self.get_token()
+        self.get_exercises(token)
+        response = self.test_client.post('/api/sessions', headers={'Authorization': 'Bearer ' + token},
+                                         json={'date': '2019-05-31', 'exercises': []})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(User.query.first().data_version, 1)
+
+
 class TestAddExerciseAccess(BaseTestClass, unittest.TestCase):
 
     def test_post_request_with_invalid_token_fails(self):
@@ -82,3 +160,75 @@ class TestDeleteSessionAccess(BaseTestClass, unittest.TestCase):
         response = self.test_client.delete('/api/sessions/2019-01-01',
                 headers={'Authorization': 'Bearer invalid_token'})
         self.assertEqual(response.status_code, 401)
+
+
+class TestExportSessionsAccess(BaseTestClass, unittest.TestCase):
+
+    def test_get_request_with_invalid_token_fails(self):
+        response = self.test_client.get('/api/sessions/export',
+                headers={'Authorization': 'Bearer invalid_token'})
+        self.assertEqual(response.status_code, 401)
+
+
+class TestGetRecordsAccess(BaseTestClass, unittest.TestCase):
+
+    def test_get_request_with_invalid_token_fails(self):
+        response = self.test_client.get('/api/records',
+                headers={'Authorization': 'Bearer invalid_token'})
+        self.assertEqual(response.status_code, 401)
+
+
+class TestGetVolumeAccess(BaseTestClass, unittest.TestCase):
+
+    def test_get_request_with_invalid_token_fails(self):
+        response = self.test_client.get('/api/analytics/volume',
+                headers={'Authorization': 'Bearer invalid_token'})
+        self.assertEqual(response.status_code, 401)
+
+
+class TestGetProgressAccess(BaseTestClass, unittest.TestCase):
+
+    def test_get_request_with_invalid_token_fails(self):
+        response = self.test_client.get('/api/analytics/progress/exercise1',
+                headers={'Authorization': 'Bearer invalid_token'})
+        self.assertEqual(response.status_code, 401)
+
+
+class TestBatchSessionsAccess(BaseTestClass, unittest.TestCase):
+
+    def test_post_request_with_invalid_token_fails(self):
+        response = self.test_client.post('/api/sessions/batch',
+                headers={'Authorization': 'Bearer invalid_token'})
+        self.assertEqual(response.status_code, 401)
+
+
+class TestGetInstrumentationAccess(BaseTestClass, unittest.TestCase):
+
+    def test_get_request_with_invalid_token_fails(self):
+        response = self.test_client.get('/api/instrumentation',
+                headers={'Authorization': 'Bearer invalid_token'})
+        self.assertEqual(response.status_code, 401)
+
+
+class TestDeleteSessionRangeAccess(BaseTestClass, unittest.TestCase):
+
+    def test_delete_request_with_invalid_token_fails(self):
+        response = self.test_client.delete('/api/sessions?from=2019-01-01',
+                headers={'Authorization': 'Bearer invalid_token'})
+        self.assertEqual(response.status_code, 401)
+
+
+class TestGetSessionChangesAccess(BaseTestClass, unittest.TestCase):
+
+    def test_get_request_with_invalid_token_fails(self):
+        response = self.test_client.get('/api/sessions/changes?since=0',
+                headers={'Authorization': 'Bearer invalid_token'})
+        self.assertEqual(response.status_code, 401)
+
+
+class TestGetLeaderboardAccess(BaseTestClass, unittest.TestCase):
+
+    def test_get_request_with_invalid_token_fails(self):
+        response = self.test_client.get('/api/leaderboards/exercise1',
+                headers={'Authorization': 'Bearer invalid_token'})
+        self.assertEqual(response.status_code, 401)
@@ -0,0 +1,155 @@
+from base64 import b64encode
+from datetime import datetime, timedelta
+import unittest
+
+from sqlalchemy import event
+
+from tests import BaseTestClass
+
+from app import db
+from app.models.exercise import Exercise
+from app.models.session_change import compact_changes, SessionChange
+from app.models.user import User
+
+class TestSessionChanges(BaseTestClass, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.test_client.post('/api/register', json={'username': 'test', 'password': 'pass'})
+        self.token = self.test_client.get('/api/token',
+                                          headers={'Authorization': b'Basic ' + b64encode(b'test:pass')}) \
+                                     .json.get('token')
+
+        db.session.add(Exercise(exercise_name='exercise1'))
+        db.session.commit()
+
+    def post_session(self, session_date, weight=100):
+        response = self.test_client.post('/api/sessions', headers={'Authorization': 'Bearer ' + self.token},
+                                         json={'date': session_date,
+                                               'exercises': [{'exercise name': 'exercise1',
+                                                              'reps': [8], 'weights': [weight]}]})
+        self.assertEqual(response.status_code, 201)
+
+    def delete(self, url):
+        response = self.test_client.delete(url, headers={'Authorization': 'Bearer ' + self.token})
+        self.assertEqual(response.status_code, 201)
+
+    def changes(self, since, limit=None):
+        url = f'/api/sessions/changes?since={since}' + (f'&limit={limit}' if limit is not None else '')
+        return self.test_client.get(url, headers={'Authorization': 'Bearer ' + self.token})
+
+    def test_changes_since_start(self):
+        self.post_session('2019-05-31')
+        self.post_session('2019-06-30', weight=110)
+        response = self.changes(0)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['cursor'], 2)
+        self.assertFalse(response.json['more'])
+        self.assertEqual(response.json['deleted'], [])
+        self.assertEqual([session['session']['date'] for session in response.json['created']],
+                         ['Fri, 31 May 2019 00:00:00 -0000', 'Sun, 30 Jun 2019 00:00:00 -0000'])
+        self.assertEqual(response.json['created'][1]['session']['weights'], [[110]])
+
+    def test_changes_since_cursor_only_include_later_changes(self):
+        self.post_session('2019-05-31')
+        self.post_session('2019-06-30')
+        cursor = self.changes(0).json['cursor']
+
+        self.delete('/api/sessions/2019-05-31')
+        self.post_session('2019-07-31')
+        response = self.changes(cursor)
+        self.assertEqual(response.json['cursor'], cursor + 2)
+        self.assertEqual(response.json['deleted'], ['2019-05-31'])
+        self.assertEqual([session['session']['date'] for session in response.json['created']],
+                         ['Wed, 31 Jul 2019 00:00:00 -0000'])
+
+        response = self.changes(response.json['cursor'])
+        self.assertEqual(response.json, {'cursor': cursor + 2, 'more': False, 'created': [], 'deleted': []})
+
+    def test_only_last_change_to_a_date_is_returned(self):
+        self.post_session('2019-05-31')
+        self.delete('/api/sessions/2019-05-31')
+        self.post_session('2019-05-31', weight=120)
+        self.post_session('2019-06-30')
+        self.delete('/api/sessions/2019-06-30')
+
+        response = self.changes(0)
+        self.assertEqual(response.json['deleted'], ['2019-06-30'])
+        self.assertEqual([session['session']['weights'] for session in response.json['created']], [[[120]]])
+
+    def test_batch_and_range_delete_are_logged(self):
+        response = self.test_client.post('/api/sessions/batch', headers={'Authorization': 'Bearer ' + self.token},
+                                         json={'sessions': [{'date': '2019-05-31', 'exercises': []},
+                                                            {'date': '2019-06-30', 'exercises': []},
+                                                            {'date': '2019-07-31', 'exercises': []}]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.changes(0).json['created']), 3)
+
+        self.delete('/api/sessions?from=2019-06-01')
+        self.assertEqual(self.changes(3).json['deleted'], ['2019-06-30', '2019-07-31'])
+
+    def test_limit_pages_changes(self):
+        for day in range(1, 6):
+            self.post_session(f'2019-05-0{day}')
+        response = self.changes(0, limit=2)
+        self.assertTrue(response.json['more'])
+        self.assertEqual(response.json['cursor'], 2)
+        self.assertEqual(len(response.json['created']), 2)
+
+        response = self.changes(4, limit=2)
+        self.assertFalse(response.json['more'])
+        self.assertEqual(len(response.json['created']), 1)
+
+    def test_user_is_locked_before_changes_are_logged(self):
+        engine = db.engine
+        statements = []
+        def before_execute(conn, clauseelement, multiparams, params):
+            statements.append(clauseelement)
+        event.listen(engine, 'before_execute', before_execute)
+        try:
+            self.post_session('2019-05-31')
+            self.delete('/api/sessions/2019-05-31')
+        finally:
+            event.remove(engine, 'before_execute', before_execute)
+        logged = [i for i, statement in enumerate(statements)
+                  if getattr(statement, 'table', None) is SessionChange.__table__]
+        locks = [i for i, statement in enumerate(statements) if getattr(statement, '_for_update_arg', None) is not None]
+        self.assertEqual(len(logged), 2)
+        self.assertEqual(len(locks), 2)
+        self.assertTrue(all(lock < log for lock, log in zip(locks, logged)))
+        # FOR NO KEY UPDATE, which does not conflict with the key share locks taken by inserts referencing the user
+        self.assertTrue(all(statements[lock]._for_update_arg.key_share for lock in locks))
+
+    def test_since_is_required(self):
+        response = self.test_client.get('/api/sessions/changes', headers={'Authorization': 'Bearer ' + self.token})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.changes(-1).status_code, 400)
+
+    def test_compaction_deletes_superseded_changes(self):
+        self.post_session('2019-05-31')
+        self.delete('/api/sessions/2019-05-31')
+        self.post_session('2019-06-30')
+        self.assertEqual(compact_changes(datetime(2019, 1, 1)), 1)
+        db.session.commit()
+        self.assertEqual([change.change_id for change in SessionChange.query.order_by(SessionChange.change_id)],
+                         [2, 3])
+        self.assertEqual(User.query.first().changes_horizon, 0)
+        self.assertEqual(self.changes(0).json['deleted'], ['2019-05-31'])
+
+    def test_compacted_cursor_gets_gone(self):
+        self.post_session('2019-05-31')
+        self.post_session('2019-06-30')
+        SessionChange.query.filter_by(change_id = 1).update({'changed_at': datetime.utcnow() - timedelta(days=100)})
+        db.session.commit()
+        self.assertEqual(compact_changes(datetime.utcnow() - timedelta(days=90)), 1)
+        db.session.commit()
+        self.assertEqual(User.query.first().changes_horizon, 1)
+
+        response = self.changes(0)
+        self.assertEqual(response.status_code, 410)
+        self.assertEqual(response.json['cursor'], 2)
+        self.assertEqual(self.changes(1).status_code, 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
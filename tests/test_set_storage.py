@@ -0,0 +1,90 @@
+from base64 import b64encode
+import unittest
+
+from tests import BaseTestClass
+
+from app import db
+from app.models.exercise import Exercise
+from app.models.exercise_sets import ExerciseSets
+from app.models.gym_record import GymRecord
+from app.set_storage import convert_sets, pack, unpack
+
+URLS = ['/api/sessions', '/api/sessions?format=columnar', '/api/sessions/2019-06-30', '/api/sessions/export',
+        '/api/records', '/api/analytics/volume']
+
+class TestSetStorage(BaseTestClass, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.test_client.post('/api/register', json={'username': 'test', 'password': 'pass'})
+        self.token = self.test_client.get('/api/token',
+                                          headers={'Authorization': b'Basic ' + b64encode(b'test:pass')}) \
+                                     .json.get('token')
+
+        for ex in ['exercise1', 'exercise2', 'exercise3']:
+            db.session.add(Exercise(exercise_name=ex))
+        db.session.commit()
+
+    def post_sessions(self):
+        json1 = {"date" : "2019-05-31",
+                 "exercises" : [{"exercise name" : "exercise2", "reps": [6, 5], "weights": [100, 102.5]},
+                                {"exercise name" : "exercise1", "reps": [8, 8, 8], "weights": [100, 100, 100]},
+                                {"exercise name" : "exercise2", "reps": [3], "weights": [110]}]}
+        json2 = {"date" : "2019-06-30",
+                 "exercises" : [{"exercise name" : "exercise1", "reps": [8, 7], "weights": [105, 105]},
+                                {"exercise name" : "exercise3", "reps": [12, 10, 8], "weights": [120, 80, 60]}]}
+        json3 = {"date" : "2019-07-31", "exercises" : []}
+        for json in (json1, json2, json3):
+            response = self.test_client.post('/api/sessions', headers={'Authorization': 'Bearer ' + self.token},
+                                             json=json)
+            self.assertEqual(response.status_code, 201)
+
+    def responses(self):
+        return [self.test_client.get(url, headers={'Authorization': 'Bearer ' + self.token}).get_data(as_text=True)
+                for url in URLS]
+
+    def test_pack_and_unpack_round_trip(self):
+        self.assertEqual(list(unpack(*pack([8, 6, 1], [100.0, 102.5, 0.1]))), [(8, 100.0), (6, 102.5), (1, 0.1)])
+        self.assertEqual(list(unpack(*pack([], []))), [])
+
+    def test_packed_layout_stores_one_row_per_session_and_exercise(self):
+        self.app.config['SET_STORAGE'] = 'packed'
+        self.post_sessions()
+        self.assertEqual(GymRecord.query.count(), 0)
+        self.assertEqual(ExerciseSets.query.count(), 4)
+
+    def test_packed_layout_serves_identical_responses(self):
+        self.post_sessions()
+        rows = self.responses()
+
+        db.drop_all()
+        db.create_all()
+        self.setUp()
+        self.app.config['SET_STORAGE'] = 'packed'
+        self.post_sessions()
+        self.assertEqual(self.responses(), rows)
+
+    def test_delete_session_in_packed_layout(self):
+        self.app.config['SET_STORAGE'] = 'packed'
+        self.post_sessions()
+        response = self.test_client.delete('/api/sessions/2019-06-30', headers={'Authorization': 'Bearer ' + self.token})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(ExerciseSets.query.count(), 2)
+        records = self.test_client.get('/api/records', headers={'Authorization': 'Bearer ' + self.token}).json
+        self.assertEqual([record['max weight'] for record in records], [100, 110])
+
+    def test_convert_sets_between_layouts(self):
+        self.post_sessions()
+        rows = self.responses()
+
+        self.assertEqual(convert_sets('packed', batch_size=1), 11)
+        db.session.commit()
+        self.app.config['SET_STORAGE'] = 'packed'
+        self.assertEqual(GymRecord.query.count(), 0)
+        self.assertEqual(self.responses(), rows)
+
+        self.assertEqual(convert_sets('rows'), 11)
+        db.session.commit()
+        self.app.config['SET_STORAGE'] = 'rows'
+        self.assertEqual(ExerciseSets.query.count(), 0)
+        self.assertEqual(self.responses(), rows)
@@ -0,0 +1,69 @@
+import unittest
+
+from tests import BaseTestClass
+
+from app import db
+from app.models.exercise_sets import ExerciseSets
+from app.models.gym_record import GymRecord
+from app.models.personal_record import PersonalRecord, rebuild_personal_records, RepRecord
+from app.models.session import Session
+from app.models.user import User
+from python_helper_functions.helper import EXERCISE_NAMES
+from python_helper_functions.synthetic_data import generate, load
+
+class TestSyntheticData(BaseTestClass, unittest.TestCase):
+
+    def personal_records(self):
+        summaries = sorted((pr.user_id, pr.exercise_id, pr.max_weight, pr.max_weight_session_id,
+                            pr.estimated_1rm, pr.estimated_1rm_session_id,
+                            pr.last_performed, pr.last_performed_session_id)
+                           for pr in PersonalRecord.query)
+        rep_records = sorted((rr.user_id, rr.exercise_id, rr.weight, rr.reps, rr.session_id)
+                             for rr in RepRecord.query)
+        return summaries, rep_records
+
+    def test_generate_is_deterministic_from_seed(self):
+        self.assertEqual(generate(2, 5, 6, seed=1), generate(2, 5, 6, seed=1))
+        self.assertNotEqual(generate(2, 5, 6, seed=1)['gym_records'], generate(2, 5, 6, seed=2)['gym_records'])
+
+    def test_load_creates_users_sessions_and_sets(self):
+        counts = load(db.engine, 3, 10, 7, log=lambda message: None)
+        self.assertEqual(counts['users'], 3)
+        self.assertEqual(User.query.count(), 3)
+        self.assertEqual(Session.query.count(), 30)
+        self.assertEqual(GymRecord.query.count(), 210)
+        self.assertEqual(counts['exercises'], len(EXERCISE_NAMES))
+        self.assertEqual(db.session.query(Session.user_id, Session.date).distinct().count(), 30)
+        self.assertTrue(User.query.filter_by(username='user1').first().check_password('user1'))
+
+    def test_load_allocates_ids_after_existing_data(self):
+        load(db.engine, 2, 4, 5, seed=0, log=lambda message: None)
+        counts = load(db.engine, 2, 4, 5, seed=0, log=lambda message: None)
+        self.assertEqual(counts['exercises'], 0)
+        self.assertEqual(User.query.count(), 4)
+        self.assertEqual(GymRecord.query.count(), 80)
+
+    def test_personal_records_match_those_rebuilt_from_gym_records(self):
+        load(db.engine, 3, 20, 9, log=lambda message: None)
+        generated = self.personal_records()
+        self.assertTrue(generated[0] and generated[1])
+
+        for user in User.query:
+            rebuild_personal_records(user.id, [exercise_id for exercise_id, in db.session
+                                                                                .query(GymRecord.exercise_id)
+                                                                                .distinct()])
+        db.session.commit()
+        self.assertEqual(self.personal_records(), generated)
+
+    def test_packed_layout_matches_rows_layout(self):
+        load(db.engine, 2, 10, 9, log=lambda message: None, layout='packed')
+        self.app.config['SET_STORAGE'] = 'packed'
+        generated = self.personal_records()
+        self.assertEqual(GymRecord.query.count(), 0)
+
+        for user in User.query:
+            rebuild_personal_records(user.id, [exercise_id for exercise_id, in db.session
+                                                                                .query(ExerciseSets.exercise_id)
+                                                                                .distinct()])
+        db.session.commit()
+        self.assertEqual(self.personal_records(), generated)